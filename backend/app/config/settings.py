@@ -10,13 +10,110 @@ load_dotenv()
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
-    # Gemini API Configuration
-    gemini_api_key: str
+    # LLM Backend Configuration
+    llm_backend: str = "gemini"  # "gemini", "fake" (local stand-in) or "replay" (serve a recorded cassette)
+    llm_cassette_path: str = "data/llm_cassette.jsonl.gz"  # Recorded LLM calls for record/replay
+    llm_cassette_record: bool = False  # Record every call served by the active backend into the cassette
+    llm_cassette_sequential_fallback: bool = True  # Replay unknown prompts from the recording order
+    llm_cassette_replay_speed: float = 1.0  # Multiplier on recorded timings (0 = replay without delays)
+    
+    # Gemini API Configuration (the API key is only required for the gemini backend)
+    gemini_api_key: Optional[str] = None
     gemini_model: str = "gemini-2.5-flash"  # Updated to use available model
+    gemini_max_concurrency: int = 8  # Max Gemini calls in flight per worker process
+    gemini_timeout_seconds: float = 60.0  # Per-call timeout for a single generation
+    
+    # Gemini Quota Configuration (applied per model)
+    gemini_rate_limit_enabled: bool = True  # Pace outbound calls to stay under the quota
+    gemini_rpm_limit: int = 1000  # Requests per minute
+    gemini_tpm_limit: int = 1000000  # Tokens per minute (prompt + output)
+    
+    # Gemini Model Routing Configuration
+    gemini_fallback_models: str = ""  # Comma-separated models tried in order when the primary fails
+    gemini_fast_model: str = ""  # Cheaper, faster model preferred for Soft roasts and under load
+    gemini_latency_slo_seconds: float = 20.0  # Models with a rolling p95 above this are deprioritized
+    gemini_router_max_error_rate: float = 0.5  # Models with a recent error rate above this are deprioritized
+    gemini_router_min_samples: int = 20  # Latency samples needed before the SLO check applies
+    
+    # Gemini Resilience Configuration
+    gemini_hedge_enabled: bool = True  # Fire a second call when the first is slower than usual
+    gemini_hedge_percentile: float = 95.0  # Observed latency percentile that triggers a hedge
+    gemini_hedge_min_delay_seconds: float = 2.0  # Never hedge earlier than this
+    gemini_hedge_min_samples: int = 20  # Latency samples needed before hedging starts
+    gemini_breaker_failure_rate: float = 0.5  # Failure ratio that opens the circuit breaker
+    gemini_breaker_min_calls: int = 10  # Calls in the window before the ratio is trusted
+    gemini_breaker_window_seconds: float = 60.0  # Sliding window for the failure ratio
+    gemini_breaker_open_seconds: float = 30.0  # How long to fail fast once the breaker opens
+    
+    roast_generation_mode: str = "single"  # "single" (one generation) or "sectioned" (parallel per-section calls)
+    gemini_response_mode: str = "schema"  # "schema" (JSON mode + response schema) or "text" (free-form)
+    
+    # Admission Control Configuration (/roast and /roast/stream)
+    admission_enabled: bool = True  # Shed load instead of queueing without bound
+    admission_max_active: int = 16  # Roast requests running at once per worker process
+    admission_max_queue: int = 64  # Roast requests allowed to wait for a slot
+    admission_max_wait_seconds: float = 10.0  # Longest wait before a queued request is shed with 503
+    
+    # Roast Quota Configuration (sliding window, per signed-in user or per anonymous IP)
+    quota_enabled: bool = False  # Enforce per-user and per-IP roast quotas (needs clients that send their JWT)
+    quota_window_seconds: float = 3600.0  # Length of the sliding window
+    quota_user_roasts: int = 100  # Roasts per window for each signed-in (JWT) user
+    quota_ip_roasts: int = 20  # Roasts per window for each anonymous client IP
+    quota_forwarded_for_hops: int = 0  # Trusted proxies that append to X-Forwarded-For (0 = use the connecting address)
+    quota_db_path: Optional[str] = None  # Optional SQLite file so quotas survive restarts
+    
+    # Batch Configuration
+    batch_max_concurrency: int = 4  # Max roasts generated at once for a single /roast/batch call
+    roast_pack_size: int = 4  # Startups per model call when a batch asks for packed mode
+    
+    # Roast Job Queue Configuration
+    job_queue_db_path: str = "data/roast_jobs.db"  # SQLite file (WAL mode) holding queued jobs
+    job_queue_workers: int = 2  # Jobs processed concurrently by this process
+    job_long_poll_max_seconds: float = 30.0  # Upper bound for GET /roast/jobs/{id}?wait=
+    
+    # Write-Behind Persistence Configuration (roasts are saved to Supabase in the background)
+    persistence_batch_size: int = 50  # Roasts per bulk insert; a full batch is flushed right away
+    persistence_flush_interval_seconds: float = 2.0  # Longest a roast waits in memory before it is saved
+    persistence_max_buffer: int = 5000  # Roasts held in memory before new ones go straight to the spill file
+    persistence_spill_path: str = "data/roast_spill.jsonl"  # Append-only file for roasts saved while Supabase is down
+    persistence_replay_interval_seconds: float = 30.0  # How often spilled roasts are retried while inserts fail
+    
+    # Roast Statistics Configuration (/stats is served from in-process counters)
+    stats_reconcile_interval_seconds: float = 300.0  # How often the counters are re-checked against the database
+    
+    # Dependency Health Probe Configuration (/health and /ready read cached results)
+    health_probe_interval_seconds: float = 15.0  # Time between background probes of Supabase and the LLM backend
+    health_probe_timeout_seconds: float = 5.0  # A probe slower than this counts as a failure
+    
+    # Roast Cache Configuration
+    roast_cache_enabled: bool = True
+    roast_cache_max_entries: int = 1024  # In-memory LRU capacity
+    roast_cache_ttl_seconds: int = 86400  # Cached roasts expire after a day
+    roast_cache_db_path: Optional[str] = None  # Optional SQLite file for a restart-safe tier
+    
+    # Near-Duplicate Reuse Configuration (MinHash/LSH over idea_description + target_users)
+    near_duplicate_enabled: bool = True
+    near_duplicate_threshold: float = 0.8  # Estimated Jaccard similarity needed to reuse a stored roast
+    near_duplicate_swap_name: bool = True  # Put the new startup name into reused roasts
+    near_duplicate_max_entries: int = 200000  # Roasts indexed with NEAR_DUPLICATE_DB_PATH; the oldest are dropped first
+    near_duplicate_memory_max_entries: int = 2000  # Roasts indexed without a file, when every payload is held in memory
+    near_duplicate_db_path: Optional[str] = None  # Optional SQLite file so the index survives restarts
+    
+    # Fake LLM Backend Configuration (used when LLM_BACKEND=fake)
+    fake_llm_latency_ms: float = 1500.0  # Median time to produce a full response
+    fake_llm_latency_sigma: float = 0.4  # Log-normal spread of the latency (0 = fixed)
+    fake_llm_chunk_chars: int = 40  # Characters per streamed chunk
+    fake_llm_failure_rate: float = 0.0  # Fraction of calls that raise a connection error
+    fake_llm_malformed_rate: float = 0.0  # Fraction of responses truncated into malformed JSON
+    fake_llm_seed: Optional[int] = None  # Seed for latency and fault injection
     
     # Supabase Configuration
     supabase_url: str
     supabase_key: str
+    supabase_pool_max_connections: int = 20  # Open connections to the Supabase REST API per worker process
+    supabase_pool_max_keepalive: int = 10  # Idle connections kept alive for reuse
+    supabase_connect_timeout_seconds: float = 5.0  # Time to open a new connection
+    supabase_timeout_seconds: float = 10.0  # Time to wait for a response or a free pooled connection
     
     # Google OAuth Configuration (optional - only needed for auth endpoints)
     google_client_id: Optional[str] = None
@@ -27,6 +124,7 @@ class Settings(BaseSettings):
     jwt_secret_key: Optional[str] = None
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 24
+    jwt_claims_cache_size: int = 1024  # Verified tokens remembered to skip repeated signature checks
     
     # Frontend Configuration (optional - for OAuth redirects)
     frontend_base_url: str = "http://localhost:8080"
@@ -43,7 +141,7 @@ class Settings(BaseSettings):
         super().__init__(**kwargs)
         
         # Validate critical settings
-        if not self.gemini_api_key:
+        if self.llm_backend == "gemini" and not self.gemini_api_key:
             raise ValueError(
                 "GEMINI_API_KEY is required but not found in environment variables. "
                 "Please set GEMINI_API_KEY in your .env file or environment."
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from app.schemas.roast import RoastRequest, RoastResponse
 from app.services.roast_service import roast_service
-from app.services.db_service import db_service
+from app.services.async_db_service import async_db_service
+from app.services.generation_pool import generation_pool
+from app.services.cache_service import roast_cache
+from app.services.near_duplicate import near_duplicate_index
+from app.services.single_flight import roast_single_flight
+from app.services.json_repair import repair_stats
+from app.services.job_queue import roast_job_queue
+from app.services.write_buffer import roast_write_buffer
+from app.services.stats_service import roast_stats
+from app.services.health_service import dependency_prober
+from app.services.admission import admit_roast_request, roast_admission
+from app.services.auth_service import assign_priority_lane, claims_cache
+from app.services.quota_service import enforce_roast_quota, roast_quotas
 from app.config.settings import settings
 from app.routes.auth import router as auth_router
+from app.routes.roast import router as roast_router
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,19 +44,40 @@ app.add_middleware(
 
 # Register routers
 app.include_router(auth_router)
+app.include_router(roast_router)
 
 @app.on_event("startup")
 async def startup_event():
     """Startup event to validate configuration"""
     logger.info(f"Starting {settings.app_name}")
-    logger.info(f"Using Gemini model: {settings.gemini_model}")
-    logger.info("✅ Gemini API key configured successfully")
-    
-    # Test database connection
-    if db_service.health_check():
-        logger.info("✅ Supabase database connection healthy")
+    logger.info(f"Using {settings.llm_backend} backend with models: {', '.join(route.name for route in roast_service.router.routes)}")
+    if settings.llm_backend == "gemini":
+        logger.info("✅ Gemini API key configured successfully")
     else:
-        logger.warning("⚠️ Supabase database connection failed - roasts will not be persisted")
+        logger.warning(f"⚠️ Using the {settings.llm_backend} LLM backend - roasts are not generated by Gemini")
+    
+    # Probe Supabase and the LLM backend now and then in the background
+    await dependency_prober.start()
+    if dependency_prober.status("database") != "healthy":
+        logger.warning("⚠️ Supabase database connection failed - roasts are spilled to disk until it recovers")
+    
+    # Seed /stats counters and save roasts to the database in the background
+    await roast_stats.start()
+    await roast_write_buffer.start()
+    
+    # Resume durable roast jobs
+    await roast_job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event to release background resources"""
+    await roast_job_queue.stop()
+    await roast_write_buffer.stop()
+    await roast_stats.stop()
+    await dependency_prober.stop()
+    await async_db_service.close()
+    generation_pool.shutdown()
+    logger.info(f"Stopped {settings.app_name}")
 
 @app.get("/")
 async def root():
@@ -51,18 +86,24 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint to verify the service is running"""
-    db_healthy = db_service.health_check()
+    """Liveness check; answers from process state without touching dependencies"""
     return {
-        "status": "alive", 
+        "status": "alive",
         "model": settings.gemini_model,
-        "database": "healthy" if db_healthy else "unavailable"
+        "database": dependency_prober.status("database"),
+        "uptime_seconds": dependency_prober.uptime_seconds()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check from the cached dependency probes; 503 while a required dependency is down"""
+    readiness = dependency_prober.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @app.get("/stats")
 async def get_stats():
-    """Get roast statistics from the database"""
-    stats = db_service.get_roast_stats()
+    """Get roast statistics, served from in-process counters kept in sync with the database"""
+    stats = roast_stats.get_stats()
     if stats:
         return stats
     else:
@@ -71,7 +112,27 @@ async def get_stats():
             detail="Statistics unavailable - database connection issue"
         )
 
-@app.post("/roast", response_model=RoastResponse)
+@app.get("/metrics")
+async def get_metrics():
+    """Get in-process performance counters for the roast pipeline"""
+    return {
+        "generation": generation_pool.snapshot(),
+        "cache": roast_cache.snapshot(),
+        "near_duplicates": near_duplicate_index.snapshot(),
+        "coalescing": roast_single_flight.snapshot(),
+        "json_repair": repair_stats.snapshot(),
+        "roast_service": roast_service.snapshot(),
+        "jobs": roast_job_queue.snapshot(),
+        "persistence": roast_write_buffer.snapshot(),
+        "database": async_db_service.snapshot(),
+        "stats": roast_stats.snapshot(),
+        "health": dependency_prober.snapshot(),
+        "admission": roast_admission.snapshot(),
+        "auth": {"claims_cache": claims_cache.snapshot()},
+        "quotas": roast_quotas.snapshot()
+    }
+
+@app.post("/roast", response_model=RoastResponse, dependencies=[Depends(admit_roast_request), Depends(enforce_roast_quota), Depends(assign_priority_lane)])
 async def roast_startup(request: RoastRequest):
     """
     Roast a startup idea with brutal honesty and constructive feedback.
@@ -86,7 +147,12 @@ async def roast_startup(request: RoastRequest):
     - Nuclear: Ruthless, sarcastic roasting with no mercy
     
     The endpoint includes automatic retry logic for API failures, robust
-    error handling, and non-blocking database persistence.
+    error handling, and non-blocking database persistence: the roast is
+    queued and saved by a background task, so the response never waits
+    for Supabase.
+    
+    Under overload, requests beyond the admission limits are rejected fast
+    with 429 (queue full) or 503 (waited too long) and a Retry-After header.
     """
     try:
         logger.info(f"Processing roast request for: {request.startup_name}")
@@ -98,11 +164,7 @@ async def roast_startup(request: RoastRequest):
         
         # Save to database in the background (fail-safe - don't block user response)
         try:
-            db_result = db_service.save_roast(request, roast_response)
-            if db_result:
-                logger.info(f"✅ Roast for {request.startup_name} saved to database")
-            else:
-                logger.warning(f"⚠️ Failed to save roast for {request.startup_name} to database")
+            roast_write_buffer.enqueue(request, roast_response)
         except Exception as db_error:
             # Log the database error but don't raise - user must get their roast
             logger.error(f"❌ Database save error for {request.startup_name}: {str(db_error)}")
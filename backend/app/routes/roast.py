@@ -0,0 +1,266 @@
+"""
+Roast delivery routes for RoastMyStartup API
+
+This module holds the alternative ways of getting a roast besides the
+classic POST /roast in main.py:
+1. /roast/stream - Server-Sent Events stream that pushes each roast section
+   as soon as the model finishes writing it
+2. /roast/batch - Roasts a cohort of startups with bounded concurrency
+   (optionally several per model call) and streams results back as NDJSON
+   in completion order
+3. /roast/jobs - Accepts a roast as a durable background job and returns a
+   job id immediately; /roast/jobs/{job_id} reports status with optional
+   long-polling
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.config.settings import settings
+from app.schemas.roast import BatchRoastRequest, RoastJobResponse, RoastRequest, RoastResponse
+from app.services.roast_service import roast_service
+from app.services.write_buffer import roast_write_buffer
+from app.services.job_queue import roast_job_queue
+from app.services.admission import admit_roast_request
+from app.services.rate_scheduler import current_lane
+from app.services.auth_service import assign_priority_lane, get_optional_user
+from app.services.quota_service import QuotaCharge, client_ip, current_quota_charge, enforce_roast_quota, roast_quotas
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/roast", tags=["roast"])
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Format a single Server-Sent Event
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame string
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _roast_event_stream(request: RoastRequest) -> AsyncIterator[str]:
+    """Relay roast service events as SSE frames and persist the finished roast"""
+    async for event, payload in roast_service.stream_startup(request):
+        yield format_sse(event, payload)
+
+        if event == "complete":
+            # Queue the database save after the client already has the full roast (fail-safe)
+            try:
+                roast_write_buffer.enqueue(request, RoastResponse(**payload))
+            except Exception as db_error:
+                logger.error(f"❌ Database save error for {request.startup_name}: {str(db_error)}")
+
+
+@router.post("/stream", dependencies=[Depends(admit_roast_request), Depends(enforce_roast_quota), Depends(assign_priority_lane)])
+async def roast_startup_stream(request: RoastRequest):
+    """
+    Stream a startup roast as Server-Sent Events
+
+    Events:
+    - field: {"field": name, "value": text} for brutal_roast, honest_feedback,
+      competitor_reality_check and pitch_rewrite, and
+      {"field": "survival_tips", "index": i, "value": tip} per tip
+    - reset: {"detail": message} if the stream broke after some fields were
+      sent; discard them, the roast is regenerated and arrives as complete
+    - complete: the full validated RoastResponse
+    - error: {"detail": message} if generation failed
+    """
+    logger.info(f"Processing streaming roast request for: {request.startup_name}")
+    return StreamingResponse(
+        _roast_event_stream(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering so events flush immediately
+        }
+    )
+
+
+async def _batch_result_stream(
+    requests: List[RoastRequest],
+    packed: bool = False,
+    charge: Optional[QuotaCharge] = None
+) -> AsyncIterator[str]:
+    """Generate roasts under the batch concurrency cap and emit NDJSON lines as they finish"""
+    # Batch work yields Gemini quota to interactive requests
+    current_lane.set("batch")
+    semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+    
+    async def roast_one(index: int, request: RoastRequest) -> List[Tuple[int, RoastRequest, object]]:
+        async with semaphore:
+            try:
+                return [(index, request, await roast_service.analyze_startup(request))]
+            except HTTPException as e:
+                return [(index, request, e)]
+            except Exception as e:
+                logger.error(f"Unexpected batch error for {request.startup_name}: {str(e)}")
+                return [(index, request, HTTPException(status_code=500, detail="An unexpected error occurred while processing this roast."))]
+    
+    async def roast_group(start: int, group: List[RoastRequest]) -> List[Tuple[int, RoastRequest, object]]:
+        async with semaphore:
+            try:
+                outcomes = await roast_service.analyze_startups_packed(group)
+            except Exception as e:
+                logger.error(f"Unexpected packed batch error: {str(e)}")
+                error = HTTPException(status_code=500, detail="An unexpected error occurred while processing this roast.")
+                outcomes = [error] * len(group)
+            return [(start + offset, request, outcome) for offset, (request, outcome) in enumerate(zip(group, outcomes))]
+    
+    if packed:
+        size = max(1, settings.roast_pack_size)
+        tasks = [
+            asyncio.ensure_future(roast_group(start, requests[start:start + size]))
+            for start in range(0, len(requests), size)
+        ]
+    else:
+        tasks = [asyncio.ensure_future(roast_one(index, request)) for index, request in enumerate(requests)]
+    succeeded = 0
+    saved = 0
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for index, request, result in await next_done:
+                line = {"index": index, "startup_name": request.startup_name}
+                
+                if isinstance(result, RoastResponse):
+                    succeeded += 1
+                    # Queue each roast as it finishes, so a client leaving mid-batch loses nothing generated;
+                    # the write buffer still saves them in bulk (fail-safe)
+                    try:
+                        roast_write_buffer.enqueue(request, result)
+                        saved += 1
+                    except Exception as db_error:
+                        logger.error(f"❌ Database save error for {request.startup_name}: {str(db_error)}")
+                    line.update(status="ok", roast=result.model_dump())
+                else:
+                    line.update(status="error", status_code=result.status_code, error=result.detail)
+                
+                yield json.dumps(line) + "\n"
+    finally:
+        # Stop outstanding work if the client went away mid-batch
+        for task in tasks:
+            task.cancel()
+        if charge is not None:
+            # Refund the startups that failed or were served without a new generation
+            charge.settle()
+    
+    yield json.dumps({
+        "status": "done",
+        "total": len(requests),
+        "succeeded": succeeded,
+        "failed": len(requests) - succeeded,
+        "saved": saved,
+    }) + "\n"
+
+
+@router.post("/batch", dependencies=[Depends(admit_roast_request)])
+async def roast_startup_batch(
+    batch: BatchRoastRequest,
+    http_request: Request,
+    user: Optional[dict] = Depends(get_optional_user)
+):
+    """
+    Roast a cohort of startups in one call
+
+    Requests are fanned out through the normal generation pipeline (cache,
+    coalescing, retries) with at most BATCH_MAX_CONCURRENCY in flight. Results
+    are streamed back as newline-delimited JSON in completion order. With
+    "packed": true, ROAST_PACK_SIZE startups share each model call and only
+    items that fail in the packed output are retried individually.
+    Lines:
+    - {"index", "startup_name", "status": "ok", "roast": {...}} per success
+    - {"index", "startup_name", "status": "error", "status_code", "error"} per failure
+    - a final {"status": "done", ...} summary line; "saved" counts roasts queued for the bulk database save
+
+    Every startup in the batch is charged against the caller's roast quota up
+    front; startups that fail or are served from the cache are refunded when
+    the batch ends. A batch larger than the caller's whole quota is rejected
+    with 413.
+
+    The whole batch holds one admission slot until its last line is sent, so
+    concurrent batches are queued and shed like /roast (429/503 with
+    Retry-After).
+    """
+    charge = None
+    if settings.quota_enabled:
+        charge = roast_quotas.enforce(user, client_ip(http_request), cost=len(batch.requests))
+        current_quota_charge.set(charge)
+
+    logger.info(f"Processing batch roast request for {len(batch.requests)} startups")
+    return StreamingResponse(
+        _batch_result_stream(batch.requests, packed=batch.packed, charge=charge),
+        media_type="application/x-ndjson"
+    )
+
+
+def _to_iso(timestamp: Optional[float]) -> Optional[str]:
+    """Format a stored epoch timestamp as ISO 8601 (UTC)"""
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _job_response(job: dict) -> RoastJobResponse:
+    """Convert a stored job record into the public response schema"""
+    return RoastJobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        created_at=_to_iso(job["created_at"]),
+        started_at=_to_iso(job["started_at"]),
+        finished_at=_to_iso(job["finished_at"]),
+        result=RoastResponse.model_validate_json(job["result"]) if job["result"] else None,
+        error=job["error"]
+    )
+
+
+@router.post("/jobs", response_model=RoastJobResponse, status_code=202)
+async def create_roast_job(
+    request: RoastRequest,
+    http_request: Request,
+    user: Optional[dict] = Depends(get_optional_user)
+):
+    """
+    Queue a roast for background generation
+
+    Returns immediately with a job id. The job survives a server restart and
+    is processed by the local worker pool; poll GET /roast/jobs/{job_id}.
+    The job outlives this request, so its roast is charged against the
+    caller's quota when the job is accepted.
+
+    Job intake is not admission-controlled: accepting a job only writes it to
+    the queue, and generation is already capped at JOB_QUEUE_WORKERS.
+    """
+    if settings.quota_enabled:
+        roast_quotas.enforce(user, client_ip(http_request))
+
+    job = roast_job_queue.submit(request)
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=RoastJobResponse)
+async def get_roast_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for the job to finish")
+):
+    """
+    Get the status of a roast job
+
+    With ?wait=N the request is held open for up to N seconds (capped by
+    JOB_LONG_POLL_MAX_SECONDS) until the job completes or fails.
+    """
+    job = await roast_job_queue.wait(job_id, min(wait, settings.job_long_poll_max_seconds))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Roast job not found")
+    return _job_response(job)
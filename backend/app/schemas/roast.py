@@ -1,4 +1,4 @@
-from typing import List, Literal
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -43,4 +43,21 @@ class RoastResponse(BaseModel):
                 ],
                 "pitch_rewrite": "We provide mindfulness and stress-relief solutions through tactile meditation tools..."
             }
-        }
\ No newline at end of file
+        }
+
+
+class BatchRoastRequest(BaseModel):
+    """Request schema for roasting a cohort of startups in one call"""
+    requests: List[RoastRequest] = Field(..., min_length=1, max_length=200, description="Startups to roast")
+    packed: bool = Field(False, description="Roast several startups per model call to cut per-item token overhead")
+
+
+class RoastJobResponse(BaseModel):
+    """Response schema for an asynchronous roast job"""
+    job_id: str = Field(..., description="Job identifier to poll")
+    status: Literal["queued", "running", "completed", "failed"] = Field(..., description="Current job state")
+    created_at: str = Field(..., description="When the job was accepted (ISO 8601, UTC)")
+    started_at: Optional[str] = Field(None, description="When a worker picked the job up")
+    finished_at: Optional[str] = Field(None, description="When the job completed or failed")
+    result: Optional[RoastResponse] = Field(None, description="The roast, once completed")
+    error: Optional[str] = Field(None, description="User-friendly error message, if failed")
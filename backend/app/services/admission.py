@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Optional
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Bounded admission for expensive requests.
+
+    At most `max_active` requests run at once. Up to `max_queue` more wait in
+    FIFO order for at most `max_wait_seconds`. Anything beyond that is shed
+    immediately (429), and queued requests that wait too long are shed with
+    503, both with a Retry-After computed from the queue length and the
+    recent average service time.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, max_wait_seconds: float):
+        """
+        Initialize the controller
+
+        Args:
+            max_active: Requests allowed to run concurrently
+            max_queue: Requests allowed to wait for a slot
+            max_wait_seconds: Longest a request may wait before it is shed
+        """
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Exponentially weighted average of admitted request duration
+        self.avg_service_seconds = 0.0
+
+        # Counters since process start
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.total_wait_seconds = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: the time to drain the current queue"""
+        drain = (len(self._waiters) + 1) / self.max_active * (self.avg_service_seconds or 1.0)
+        return max(1, math.ceil(drain))
+
+    def _reject(self, status_code: int, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot
+
+        Raises:
+            HTTPException: 429 if the wait queue is full, 503 if the wait exceeded max_wait_seconds
+        """
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise self._reject(429, "Too many roast requests right now. Please try again shortly.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the timeout fired
+                self.admitted += 1
+                return
+            self._remove(waiter)
+            self.shed_timeout += 1
+            logger.warning(f"⚠️ Shed a roast request after waiting {self.max_wait_seconds:.0f}s for capacity")
+            raise self._reject(503, "Our roasting service is overloaded. Please try again shortly.")
+        except asyncio.CancelledError:
+            # The client went away while queued; hand the slot on if we were just granted one
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self._remove(waiter)
+            raise
+        finally:
+            self.total_wait_seconds += time.perf_counter() - started
+
+        self.admitted += 1
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """Free a slot and hand it to the oldest waiter"""
+        if service_seconds is not None:
+            self.avg_service_seconds = (
+                service_seconds if not self.avg_service_seconds
+                else 0.9 * self.avg_service_seconds + 0.1 * service_seconds
+            )
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot passes straight to the waiter
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        """
+        Get admission gauges and counters
+
+        Returns:
+            dict: Active and queued requests, admitted/shed counts and average wait/service times
+        """
+        return {
+            "enabled": settings.admission_enabled,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "avg_queue_wait_seconds": round(self.total_wait_seconds / self.queued, 3) if self.queued else 0.0,
+            "avg_service_seconds": round(self.avg_service_seconds, 3),
+        }
+
+
+# Global admission controller for roast generation endpoints
+roast_admission = AdmissionController(
+    max_active=settings.admission_max_active,
+    max_queue=settings.admission_max_queue,
+    max_wait_seconds=settings.admission_max_wait_seconds
+)
+
+
+async def admit_roast_request() -> AsyncIterator[None]:
+    """
+    FastAPI dependency that holds an admission slot for the whole request
+
+    The slot is released after the response (including a streamed body) has
+    been sent.
+    """
+    if not settings.admission_enabled:
+        yield
+        return
+
+    await roast_admission.acquire()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        roast_admission.release(time.perf_counter() - started)
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.db_service import build_roast_record
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ROAST_LEVELS = ["Soft", "Medium", "Nuclear"]
+
+
+class AsyncDatabaseService:
+    """
+    Async Supabase data access for the request path.
+
+    Talks to the Supabase REST (PostgREST) API through one pooled httpx
+    client, so connections are kept alive between queries, independent
+    queries run concurrently and nothing blocks the event loop. Methods keep
+    the fail-safe semantics of DatabaseService: errors are logged and
+    reported as None/False, never raised.
+    """
+
+    def __init__(self, supabase_url: str, supabase_key: str, max_connections: int, max_keepalive: int,
+                 connect_timeout: float, timeout: float, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the service; the HTTP client is created on first use
+
+        Args:
+            supabase_url: Supabase project URL
+            supabase_key: Supabase API key
+            max_connections: Maximum open connections in the pool
+            max_keepalive: Idle connections kept alive for reuse
+            connect_timeout: Seconds to wait for a new connection
+            timeout: Seconds to wait for a response (and for a free pooled connection)
+            transport: Optional httpx transport, e.g. a mock in tests
+        """
+        self.base_url = f"{supabase_url.rstrip('/')}/rest/v1"
+        self.headers = {
+            "apikey": supabase_key,
+            "Authorization": f"Bearer {supabase_key}",
+        }
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Whether the project allows PostgREST aggregate functions (unknown until first tried)
+        self.aggregates_supported: Optional[bool] = None
+
+        # Counters since process start
+        self.queries = 0
+        self.failures = 0
+        self.query_seconds = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Pooled connections belong to the loop that opened them
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport
+            )
+            self._loop = loop
+        return self._client
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send one query through the pool
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and error responses
+        """
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            response.raise_for_status()
+            return response
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def save_roast(self, request: RoastRequest, response: RoastResponse) -> Optional[dict]:
+        """
+        Save a roast generation to the database
+
+        Args:
+            request: The original roast request
+            response: The generated roast response
+
+        Returns:
+            dict: The inserted record if successful, None if failed
+        """
+        rows = await self.insert_roast_records([build_roast_record(request, response)])
+        return rows[0] if rows else None
+
+    async def insert_roast_records(self, rows: List[dict]) -> Optional[List[dict]]:
+        """
+        Insert prebuilt roasts table rows with a single bulk insert
+
+        Args:
+            rows: Rows produced by build_roast_record
+
+        Returns:
+            list: The inserted records if successful, None if failed
+        """
+        if not rows:
+            return []
+
+        try:
+            result = await self._request("POST", "/roasts", json=rows, headers={"Prefer": "return=representation"})
+            data = result.json()
+            if data:
+                logger.info(f"✅ Successfully saved {len(data)} roasts to database")
+                return data
+            logger.error(f"❌ No data returned from bulk database insert of {len(rows)} roasts")
+            return None
+
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk save {len(rows)} roasts to database: {str(e)}")
+            return None
+
+    async def count_roasts(self, roast_level: Optional[str] = None) -> int:
+        """
+        Count roasts, optionally for one roast level, without fetching rows
+
+        Raises:
+            httpx.HTTPError: If the query fails
+        """
+        params = {"select": "id"}
+        if roast_level is not None:
+            params["roast_level"] = f"eq.{roast_level}"
+        result = await self._request("HEAD", "/roasts", params=params, headers={"Prefer": "count=exact"})
+        # Content-Range looks like "0-24/3573" or "*/0"
+        return int(result.headers["content-range"].rsplit("/", 1)[1])
+
+    async def get_roast_stats(self) -> Optional[dict]:
+        """
+        Get basic statistics about roasts in the database
+
+        Returns:
+            dict: Statistics if successful, None if failed
+        """
+        counts = await self.get_roast_counts()
+        if counts is None:
+            return None
+
+        total_count, level_counts = counts
+        return {
+            "total_roasts": total_count,
+            "roast_levels": {level: level_counts.get(level, 0) for level in ROAST_LEVELS},
+            "last_updated": datetime.utcnow().isoformat()
+        }
+
+    async def get_roast_counts(self) -> Optional[Tuple[int, Dict[str, int]]]:
+        """
+        Count roasts in total and per roast level
+
+        Uses one grouped aggregate query. Supabase projects have PostgREST
+        aggregates disabled unless enabled explicitly; in that case this
+        falls back to concurrent exact counts.
+
+        Returns:
+            (total, {roast_level: count}) if successful, None if failed
+        """
+        try:
+            if self.aggregates_supported is not False:
+                try:
+                    result = await self._request("GET", "/roasts", params={"select": "roast_level,count()"})
+                    self.aggregates_supported = True
+                    levels = {row["roast_level"]: row["count"] for row in result.json()}
+                    return sum(levels.values()), levels
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 400:
+                        raise
+                    self.aggregates_supported = False
+                    logger.warning("⚠️ PostgREST aggregates are disabled; counting roasts per level instead")
+
+            total_count, *level_counts = await asyncio.gather(
+                self.count_roasts(),
+                *(self.count_roasts(level) for level in ROAST_LEVELS)
+            )
+            return total_count, dict(zip(ROAST_LEVELS, level_counts))
+
+        except Exception as e:
+            logger.error(f"❌ Failed to count roasts: {str(e)}")
+            return None
+
+    async def health_check(self) -> bool:
+        """
+        Check if the database connection is healthy
+
+        Returns:
+            bool: True if healthy, False otherwise
+        """
+        try:
+            await self._request("GET", "/roasts", params={"select": "id", "limit": "1"})
+            return True
+        except Exception as e:
+            logger.error(f"❌ Database health check failed: {str(e)}")
+            return False
+
+    def snapshot(self) -> dict:
+        """
+        Get query counters
+
+        Returns:
+            dict: Query and failure counts, average latency and peak concurrent queries
+        """
+        return {
+            "max_connections": self.limits.max_connections,
+            "queries": self.queries,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "avg_query_ms": round(self.query_seconds / self.queries * 1000, 2) if self.queries else 0.0,
+        }
+
+
+# Global async database service instance
+async_db_service = AsyncDatabaseService(
+    supabase_url=settings.supabase_url,
+    supabase_key=settings.supabase_key,
+    max_connections=settings.supabase_pool_max_connections,
+    max_keepalive=settings.supabase_pool_max_keepalive,
+    connect_timeout=settings.supabase_connect_timeout_seconds,
+    timeout=settings.supabase_timeout_seconds
+)
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import jwt
+from fastapi import Depends, Request
+
+from app.config.settings import settings
+from app.services.rate_scheduler import current_lane
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ClaimsCache:
+    """
+    LRU cache of verified JWT claims.
+
+    Hot tokens skip signature verification until their own expiry; entries
+    are only added after jwt.decode succeeded, so invalid tokens are always
+    checked in full.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of tokens remembered
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Cached claims for a token that has not expired yet"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return claims
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, claims: dict) -> None:
+        """Remember verified claims until the token's own expiry"""
+        expires_at = float(claims.get("exp", time.time() + 60))
+        with self._lock:
+            self._entries[token] = (expires_at, claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        """
+        Get cache counters
+
+        Returns:
+            dict: Size, hits, misses and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global claims cache instance
+claims_cache = ClaimsCache(max_entries=settings.jwt_claims_cache_size)
+
+
+def decode_jwt_token(token: str) -> Optional[dict]:
+    """
+    Verify and decode a JWT issued by create_jwt_token
+
+    Args:
+        token: JWT token string
+
+    Returns:
+        dict: The token claims, or None if the token is invalid or expired
+    """
+    claims = claims_cache.get(token)
+    if claims is not None:
+        return claims
+
+    if not settings.jwt_secret_key:
+        return None
+    try:
+        claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except jwt.PyJWTError:
+        return None
+
+    claims_cache.set(token, claims)
+    return claims
+
+
+async def get_optional_user(request: Request) -> Optional[dict]:
+    """
+    Dependency that verifies an optional "Authorization: Bearer <jwt>" header
+
+    An invalid or expired token is treated like no token at all, so the
+    request is served anonymously instead of being rejected.
+
+    Returns:
+        dict: The user's token claims, or None for anonymous requests
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    claims = decode_jwt_token(token)
+    if claims is None:
+        logger.info("Ignoring an invalid or expired bearer token; serving the request anonymously")
+    return claims
+
+
+async def assign_priority_lane(user: Optional[dict] = Depends(get_optional_user)) -> str:
+    """
+    Dependency that puts signed-in users in the higher-priority Gemini lane
+
+    Returns:
+        str: The lane assigned to this request
+    """
+    lane = "authenticated" if user else "anonymous"
+    current_lane.set(lane)
+    return lane
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: str) -> str:
+    """Collapse whitespace and casing so trivially different submissions share a key"""
+    return " ".join(value.split()).lower()
+
+
+def request_key(request: RoastRequest) -> str:
+    """
+    Build a stable cache key for a roast request
+
+    Args:
+        request: The roast request to key
+
+    Returns:
+        str: SHA-256 hex digest of the normalized request fields
+    """
+    parts = [
+        _normalize(request.startup_name),
+        _normalize(request.idea_description),
+        _normalize(request.target_users),
+        _normalize(request.budget),
+        request.roast_level,
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class RoastCache:
+    """
+    Two-tier cache for generated roasts.
+
+    The first tier is an in-process LRU with a TTL. The optional second tier
+    is a SQLite file that survives restarts; its reads and writes run in a
+    worker thread, and disk hits are promoted back into memory.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, db_path: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of roasts kept in memory
+            ttl_seconds: How long a cached roast stays valid
+            db_path: Optional SQLite file for the persistent tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, RoastResponse]]" = OrderedDict()
+        self._lock = threading.Lock()  # Guards the memory tier and counters
+        self._db_lock = threading.Lock()  # Serializes the SQLite connection across threads
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db_path:
+            self._open_disk_tier(db_path)
+
+    def _open_disk_tier(self, db_path: str) -> None:
+        """Open (or create) the SQLite tier; the cache keeps working in memory if this fails"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS roast_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM roast_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            logger.info(f"✅ Roast cache disk tier ready at {db_path}")
+        except Exception as e:
+            logger.error(f"❌ Failed to open roast cache disk tier at {db_path}: {str(e)}")
+            self._db = None
+
+    def _remember(self, key: str, expires_at: float, response: RoastResponse) -> None:
+        """Insert into the memory tier, evicting the least recently used entry if full"""
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[RoastResponse]:
+        """
+        Look up a cached roast
+
+        The memory tier is checked inline; a disk lookup runs in a thread so
+        it never blocks the event loop.
+
+        Args:
+            key: Key produced by request_key()
+
+        Returns:
+            RoastResponse if a fresh entry exists, None otherwise
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+                self.expirations += 1
+
+        if self._db is not None:
+            found = await asyncio.to_thread(self._read_disk, key, now)
+            if found is not None:
+                expires_at, response = found
+                with self._lock:
+                    self._remember(key, expires_at, response)
+                    self.disk_hits += 1
+                return response
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, response: RoastResponse) -> None:
+        """
+        Store a generated roast in both tiers
+
+        The memory tier is updated inline; the disk write runs in a thread.
+
+        Args:
+            key: Key produced by request_key()
+            response: The roast to cache
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, response)
+
+        if self._db is not None:
+            await asyncio.to_thread(self._write_disk, key, response, expires_at)
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, RoastResponse]]:
+        """Fetch a fresh entry from the SQLite tier (blocking)"""
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM roast_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and row[1] > now:
+                return row[1], RoastResponse.model_validate_json(row[0])
+        except Exception as e:
+            logger.error(f"❌ Roast cache disk lookup failed: {str(e)}")
+        return None
+
+    def _write_disk(self, key: str, response: RoastResponse, expires_at: float) -> None:
+        """Write an entry to the SQLite tier (blocking)"""
+        try:
+            payload = response.model_dump_json()
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO roast_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.error(f"❌ Roast cache disk write failed: {str(e)}")
+
+    def snapshot(self) -> dict:
+        """
+        Get cache counters
+
+        Returns:
+            dict: Sizes, hit/miss/eviction counters and hit ratio
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": self._db is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global roast cache instance
+roast_cache = RoastCache(
+    max_entries=settings.roast_cache_max_entries,
+    ttl_seconds=settings.roast_cache_ttl_seconds,
+    db_path=settings.roast_cache_db_path
+)
@@ -1,7 +1,7 @@
 import json
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from supabase import create_client, Client
 
 from app.config.settings import settings
@@ -11,6 +11,37 @@ from app.schemas.roast import RoastRequest, RoastResponse
 logger = logging.getLogger(__name__)
 
 
+def build_roast_record(request: RoastRequest, response: RoastResponse) -> dict:
+    """
+    Build the roasts table row for a request/response pair
+    
+    Args:
+        request: The original roast request
+        response: The generated roast response
+        
+    Returns:
+        dict: Column values for the roasts table
+    """
+    return {
+        # Request fields
+        "startup_name": request.startup_name,
+        "idea_description": request.idea_description,
+        "target_users": request.target_users,
+        "budget": request.budget,
+        "roast_level": request.roast_level,
+        
+        # Response fields
+        "brutal_roast": response.brutal_roast,
+        "honest_feedback": response.honest_feedback,
+        "competitor_reality_check": response.competitor_reality_check,
+        "survival_tips": response.survival_tips,  # This will be automatically converted to JSONB
+        "pitch_rewrite": response.pitch_rewrite,
+        
+        # Metadata
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
 class DatabaseService:
     """Service for persisting roast data to Supabase"""
     
@@ -43,24 +74,7 @@ class DatabaseService:
         """
         try:
             # Prepare the data for insertion
-            roast_data = {
-                # Request fields
-                "startup_name": request.startup_name,
-                "idea_description": request.idea_description,
-                "target_users": request.target_users,
-                "budget": request.budget,
-                "roast_level": request.roast_level,
-                
-                # Response fields
-                "brutal_roast": response.brutal_roast,
-                "honest_feedback": response.honest_feedback,
-                "competitor_reality_check": response.competitor_reality_check,
-                "survival_tips": response.survival_tips,  # This will be automatically converted to JSONB
-                "pitch_rewrite": response.pitch_rewrite,
-                
-                # Metadata
-                "created_at": datetime.utcnow().isoformat(),
-            }
+            roast_data = build_roast_record(request, response)
             
             logger.info(f"Saving roast to database for startup: {request.startup_name}")
             
@@ -80,6 +94,34 @@ class DatabaseService:
             logger.error(f"   Request data: startup_name={request.startup_name}, roast_level={request.roast_level}")
             return None
     
+    def get_roasts_page(self, after_id: int = 0, limit: int = 1000) -> Optional[List[dict]]:
+        """
+        Fetch stored roasts in id order, one page at a time
+        
+        Args:
+            after_id: Only return roasts with a larger id (the last id of the previous page)
+            limit: Maximum number of roasts to return
+            
+        Returns:
+            list: Roast records (request and response columns), empty after the last page,
+            or None if the query failed
+        """
+        try:
+            result = (
+                self.supabase.table("roasts")
+                .select("id, startup_name, idea_description, target_users, roast_level, "
+                        "brutal_roast, honest_feedback, competitor_reality_check, survival_tips, pitch_rewrite")
+                .gt("id", after_id)
+                .order("id")
+                .limit(limit)
+                .execute()
+            )
+            return result.data or []
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch roasts after id {after_id}: {str(e)}")
+            return None
+    
     def get_roast_stats(self) -> Optional[dict]:
         """
         Get basic statistics about roasts in the database
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from app.config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class GenerationPool:
+    """
+    Bounded worker pool for blocking Gemini SDK calls.
+
+    The Gemini client is synchronous, so every call is handed to a dedicated
+    thread pool instead of running on the event loop. The pool size caps the
+    number of in-flight generations; anything beyond that waits in the
+    executor queue and is reported as queue depth.
+    """
+
+    def __init__(self, max_concurrency: int, timeout_seconds: float):
+        """
+        Initialize the worker pool
+
+        Args:
+            max_concurrency: Maximum number of generations running at once
+            timeout_seconds: Per-call timeout applied to every submitted call
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="gemini-generation"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Execute a call on a worker thread while keeping the gauges up to date"""
+        with self._lock:
+            self._waiting -= 1
+            self._in_flight += 1
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool without blocking the event loop
+
+        Args:
+            fn: The blocking callable (e.g. model.generate_content)
+            timeout: Optional per-call timeout override in seconds
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            TimeoutError: If the call does not finish within the timeout
+        """
+        timeout = timeout or self.timeout_seconds
+        with self._lock:
+            self._waiting += 1
+        concurrent_future = self._executor.submit(self._run, fn, args, kwargs)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(concurrent_future), timeout=timeout)
+        except asyncio.TimeoutError:
+            # A running worker thread cannot be interrupted; it keeps its slot until the SDK returns
+            with self._lock:
+                self._timed_out += 1
+            logger.error(f"Generation call timed out after {timeout}s")
+            raise TimeoutError("Gemini generation timed out")
+        finally:
+            # Calls cancelled before a worker picked them up never reach _run
+            if concurrent_future.cancelled():
+                with self._lock:
+                    self._waiting -= 1
+
+    async def stream(self, fn: Callable[..., Iterable[Any]], *args, timeout: Optional[float] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Consume a blocking iterator on the pool and yield its items as they arrive
+
+        Args:
+            fn: Blocking callable returning an iterator (e.g. a streaming generate_content)
+            timeout: Optional override for the maximum wait between two items
+
+        Yields:
+            Items produced by the iterator, in order
+
+        Raises:
+            TimeoutError: If no item arrives within the timeout
+        """
+        timeout = timeout or self.timeout_seconds
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def pump() -> None:
+            try:
+                for item in fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                raise
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        with self._lock:
+            self._waiting += 1
+        concurrent_future = self._executor.submit(self._run, pump, (), {})
+
+        try:
+            while True:
+                try:
+                    item, error = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self._timed_out += 1
+                    logger.error(f"Streaming generation stalled for more than {timeout}s")
+                    raise TimeoutError("Gemini generation timed out")
+                if item is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            # Tell the worker to stop pulling chunks nobody will read
+            cancelled.set()
+            if concurrent_future.cancel():
+                with self._lock:
+                    self._waiting -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls submitted but not yet picked up by a worker"""
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running on a worker"""
+        return self._in_flight
+
+    def snapshot(self) -> dict:
+        """
+        Get a point-in-time view of the pool
+
+        Returns:
+            dict: Capacity, gauges and counters
+        """
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "timeout_seconds": self.timeout_seconds,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release idle worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global generation pool instance
+generation_pool = GenerationPool(
+    max_concurrency=settings.gemini_max_concurrency,
+    timeout_seconds=settings.gemini_timeout_seconds
+)
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config.settings import settings
+from app.services.async_db_service import async_db_service
+from app.services.roast_service import roast_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class DependencyStatus:
+    """Cached result of the latest probe of one dependency"""
+
+    def __init__(self, name: str, check: Callable[[], Awaitable[bool]], required: bool):
+        """
+        Initialize the status as not yet probed
+
+        Args:
+            name: Dependency name reported by /ready
+            check: Coroutine function returning True if the dependency is reachable
+            required: Whether the instance cannot serve roasts without it
+        """
+        self.name = name
+        self.check = check
+        self.required = required
+        self.healthy: Optional[bool] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.last_checked: Optional[datetime] = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.failures = 0
+
+    def record(self, healthy: bool, latency_ms: float, error: Optional[str]) -> None:
+        """Store the outcome of one probe"""
+        if self.healthy is not None and healthy != self.healthy:
+            if healthy:
+                logger.info(f"✅ {self.name} is reachable again")
+            else:
+                logger.warning(f"⚠️ {self.name} became unreachable: {error}")
+        self.healthy = healthy
+        self.latency_ms = round(latency_ms, 2)
+        self.error = error
+        self.checked_at = time.monotonic()
+        self.last_checked = datetime.utcnow()
+        self.probes += 1
+        if healthy:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get the cached status
+
+        Returns:
+            dict: Status, latency and error of the latest probe
+        """
+        if self.healthy is None:
+            status = "unknown"
+        else:
+            status = "healthy" if self.healthy else "unavailable"
+        return {
+            "status": status,
+            "required": self.required,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class DependencyProber:
+    """
+    Background health checks for external dependencies.
+
+    Every interval_seconds each dependency is probed concurrently with a
+    timeout, and the status and latency are cached. /health and /ready read
+    the cache, so uptime monitors and load balancers never wait on Supabase
+    or Gemini themselves. A result older than stale_after_seconds counts as
+    unknown, so a stuck prober makes the instance unready instead of
+    reporting an old healthy state forever.
+    """
+
+    def __init__(self, dependencies: List[DependencyStatus], interval_seconds: float, timeout_seconds: float):
+        """
+        Initialize the prober
+
+        Args:
+            dependencies: Dependencies to probe
+            interval_seconds: Time between probe rounds
+            timeout_seconds: Longest one probe may take before it counts as failed
+        """
+        self.dependencies: Dict[str, DependencyStatus] = {dependency.name: dependency for dependency in dependencies}
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = 3 * interval_seconds + timeout_seconds
+        self.started_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, dependency: DependencyStatus) -> None:
+        started = time.perf_counter()
+        try:
+            healthy = await asyncio.wait_for(dependency.check(), timeout=self.timeout_seconds)
+            error = None if healthy else "check failed"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout_seconds:g}s"
+        except Exception as e:
+            healthy, error = False, str(e) or type(e).__name__
+        dependency.record(bool(healthy), (time.perf_counter() - started) * 1000, error)
+
+    async def probe_all(self) -> None:
+        """Probe every dependency once, concurrently"""
+        await asyncio.gather(*(self._probe(dependency) for dependency in self.dependencies.values()))
+
+    async def start(self) -> None:
+        """Run a first probe round, then keep probing in the background"""
+        self.started_at = time.monotonic()
+        await self.probe_all()
+        for dependency in self.dependencies.values():
+            if dependency.healthy:
+                logger.info(f"✅ {dependency.name} reachable ({dependency.latency_ms}ms)")
+            else:
+                logger.warning(f"⚠️ {dependency.name} unreachable: {dependency.error}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background probing"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"❌ Dependency probe round failed: {str(e)}")
+
+    def is_fresh(self, dependency: DependencyStatus) -> bool:
+        """Whether the dependency has a probe result recent enough to trust"""
+        return dependency.checked_at is not None and time.monotonic() - dependency.checked_at <= self.stale_after_seconds
+
+    def status(self, name: str) -> str:
+        """
+        Get the cached status of one dependency
+
+        Returns:
+            str: "healthy", "unavailable" or "unknown" (never probed or stale)
+        """
+        dependency = self.dependencies[name]
+        if not self.is_fresh(dependency):
+            return "unknown"
+        return "healthy" if dependency.healthy else "unavailable"
+
+    def readiness(self) -> dict:
+        """
+        Get the readiness of this instance from cached probe results
+
+        The instance is ready when every required dependency was reachable
+        in a recent probe. Optional dependencies that are down make it
+        "degraded" but still ready.
+
+        Returns:
+            dict: Overall status, a ready flag and the per-dependency results
+        """
+        dependencies = {}
+        ready = True
+        degraded = False
+        for name, dependency in self.dependencies.items():
+            details = dependency.snapshot()
+            details["status"] = self.status(name)
+            dependencies[name] = details
+            if details["status"] != "healthy":
+                if dependency.required:
+                    ready = False
+                else:
+                    degraded = True
+        return {
+            "status": "ready" if ready and not degraded else "degraded" if ready else "unavailable",
+            "ready": ready,
+            "dependencies": dependencies,
+        }
+
+    def uptime_seconds(self) -> float:
+        """Seconds since the prober (and the app) started"""
+        return round(time.monotonic() - self.started_at, 1)
+
+    def snapshot(self) -> dict:
+        """
+        Get probe counters
+
+        Returns:
+            dict: Probe interval and per-dependency probe and failure counts
+        """
+        return {
+            "interval_seconds": self.interval_seconds,
+            "timeout_seconds": self.timeout_seconds,
+            "dependencies": {
+                name: {
+                    "status": self.status(name),
+                    "latency_ms": dependency.latency_ms,
+                    "probes": dependency.probes,
+                    "failures": dependency.failures,
+                }
+                for name, dependency in self.dependencies.items()
+            },
+        }
+
+
+async def _check_llm() -> bool:
+    """Reachable if any routed model answers; blocking SDK calls run in threads"""
+    results = await asyncio.gather(
+        *(asyncio.to_thread(route.backend.health_check) for route in roast_service.router.routes),
+        return_exceptions=True
+    )
+    if any(result is True for result in results):
+        return True
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+    return False
+
+
+# Global dependency prober instance. Roasts are still generated and spilled
+# to disk while Supabase is down, so only the LLM is required for readiness.
+dependency_prober = DependencyProber(
+    dependencies=[
+        DependencyStatus("database", lambda: async_db_service.health_check(), required=False),
+        DependencyStatus("llm", _check_llm, required=True),
+    ],
+    interval_seconds=settings.health_probe_interval_seconds,
+    timeout_seconds=settings.health_probe_timeout_seconds
+)
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.roast_service import roast_service
+from app.services.write_buffer import roast_write_buffer
+from app.services.rate_scheduler import current_lane
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = "id, status, request, result, error, created_at, started_at, finished_at"
+
+
+class RoastJobQueue:
+    """
+    Durable roast job queue with a local asyncio worker pool.
+
+    Jobs are stored in a SQLite database in WAL mode, so accepted work
+    survives a process restart: jobs that were running when the process died
+    are put back in the queue on the next start. Workers run the regular
+    RoastService pipeline and persist finished roasts to Supabase.
+    """
+
+    def __init__(self, db_path: str, workers: int):
+        """
+        Initialize the queue storage
+
+        Args:
+            db_path: SQLite file holding the jobs
+            workers: Number of concurrent worker tasks
+        """
+        self.db_path = db_path
+        self.worker_count = workers
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished_events: Dict[str, asyncio.Event] = {}
+        self._poller_counts: Dict[str, int] = {}  # Long-pollers waiting on each event
+
+        # Counters since process start
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite database and make sure the schema exists"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS roast_jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_roast_jobs_status ON roast_jobs (status, created_at)")
+        db.commit()
+        return db
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run one statement under the lock and commit it"""
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self._db.commit()
+            return rows
+
+    async def start(self) -> None:
+        """Open storage, requeue interrupted jobs and start the workers"""
+        self._db = self._connect()
+        self._wakeup = asyncio.Event()
+
+        requeued = self._execute(
+            "UPDATE roast_jobs SET status = 'queued', started_at = NULL WHERE status = 'running' RETURNING id"
+        )
+        if requeued:
+            logger.warning(f"⚠️ Requeued {len(requeued)} roast jobs interrupted by the last shutdown")
+
+        self._workers = [
+            asyncio.create_task(self._worker(number)) for number in range(self.worker_count)
+        ]
+        self._wakeup.set()
+        logger.info(f"✅ Roast job queue started with {self.worker_count} workers at {self.db_path}")
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs are requeued on the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+    def submit(self, request: RoastRequest) -> dict:
+        """
+        Enqueue a roast job
+
+        Args:
+            request: The startup details to roast
+
+        Returns:
+            dict: The stored job record
+        """
+        job_id = uuid.uuid4().hex
+        rows = self._execute(
+            f"INSERT INTO roast_jobs (id, status, request, created_at) VALUES (?, 'queued', ?, ?) RETURNING {JOB_COLUMNS}",
+            (job_id, request.model_dump_json(), time.time())
+        )
+        self._wakeup.set()
+        logger.info(f"Queued roast job {job_id} for {request.startup_name}")
+        return dict(rows[0])
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Look up a job
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            dict: The job record, or None if it does not exist
+        """
+        rows = self._execute(f"SELECT {JOB_COLUMNS} FROM roast_jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """
+        Long-poll a job until it finishes or the timeout passes
+
+        Args:
+            job_id: Job identifier returned by submit()
+            timeout: Maximum seconds to wait
+
+        Returns:
+            dict: The job record in its latest state, or None if it does not exist
+        """
+        job = self.get(job_id)
+        if job is None or job["status"] in ("completed", "failed") or timeout <= 0:
+            return job
+
+        event = self._finished_events.setdefault(job_id, asyncio.Event())
+        self._poller_counts[job_id] = self._poller_counts.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # The last poller of a job that has not finished drops its event
+            remaining = self._poller_counts.pop(job_id) - 1
+            if remaining:
+                self._poller_counts[job_id] = remaining
+            elif self._finished_events.get(job_id) is event:
+                del self._finished_events[job_id]
+        return self.get(job_id)
+
+    def _claim_next(self) -> Optional[dict]:
+        """Atomically move the oldest queued job to running"""
+        rows = self._execute(
+            "UPDATE roast_jobs SET status = 'running', started_at = ? "
+            "WHERE id = (SELECT id FROM roast_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+            f"RETURNING {JOB_COLUMNS}",
+            (time.time(),)
+        )
+        return dict(rows[0]) if rows else None
+
+    def _finish(self, job: dict, result: Optional[RoastResponse], error: Optional[str]) -> None:
+        """Record the outcome of a job and wake up long-pollers"""
+        finished_at = time.time()
+        self._execute(
+            "UPDATE roast_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (
+                "completed" if result is not None else "failed",
+                result.model_dump_json() if result is not None else None,
+                error,
+                finished_at,
+                job["id"],
+            )
+        )
+
+        if result is not None:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.total_wait_seconds += job["started_at"] - job["created_at"]
+        self.total_run_seconds += finished_at - job["started_at"]
+
+        event = self._finished_events.pop(job["id"], None)
+        if event is not None:
+            event.set()
+
+    async def _run_job(self, job: dict) -> None:
+        """Generate the roast for one job and persist it"""
+        request = RoastRequest.model_validate_json(job["request"])
+        logger.info(f"Running roast job {job['id']} for {request.startup_name}")
+
+        try:
+            roast_response = await roast_service.analyze_startup(request)
+        except HTTPException as e:
+            self._finish(job, None, str(e.detail))
+            return
+        except Exception as e:
+            logger.error(f"Unexpected error in roast job {job['id']}: {str(e)}")
+            self._finish(job, None, "An unexpected error occurred while processing your roast request.")
+            return
+
+        self._finish(job, roast_response, None)
+
+        # Queue the database save after the job is marked done (fail-safe)
+        try:
+            roast_write_buffer.enqueue(request, roast_response)
+        except Exception as db_error:
+            logger.error(f"❌ Database save error for roast job {job['id']}: {str(db_error)}")
+
+    async def _worker(self, number: int) -> None:
+        """Worker loop: claim queued jobs until there are none, then sleep until woken"""
+        # Background jobs yield Gemini quota to interactive requests
+        current_lane.set("batch")
+        while True:
+            job = self._claim_next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Roast job worker {number} crashed on job {job['id']}: {str(e)}")
+
+    def snapshot(self) -> dict:
+        """
+        Get queue gauges and counters
+
+        Returns:
+            dict: Queue depth, running jobs, outcome counters and average wait/run times
+        """
+        if self._db is None:
+            return {"running": False}
+
+        counts = {row["status"]: row["total"] for row in self._execute(
+            "SELECT status, COUNT(*) AS total FROM roast_jobs WHERE status IN ('queued', 'running') GROUP BY status"
+        )}
+        oldest = self._execute("SELECT MIN(created_at) AS oldest FROM roast_jobs WHERE status = 'queued'")[0]["oldest"]
+        finished = self.completed + self.failed
+
+        return {
+            "workers": self.worker_count,
+            "queue_depth": counts.get("queued", 0),
+            "running_jobs": counts.get("running", 0),
+            "oldest_queued_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.total_wait_seconds / finished, 3) if finished else 0.0,
+            "avg_run_seconds": round(self.total_run_seconds / finished, 3) if finished else 0.0,
+        }
+
+
+# Global roast job queue instance
+roast_job_queue = RoastJobQueue(
+    db_path=settings.job_queue_db_path,
+    workers=settings.job_queue_workers
+)
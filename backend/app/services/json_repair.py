@@ -0,0 +1,295 @@
+import re
+import threading
+from typing import List, Optional
+
+# Characters that end a bulk copy inside a double- or single-quoted string
+_DOUBLE_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+_SINGLE_STRING_SPECIAL = re.compile(r"['\"\\\x00-\x1f]")
+_WHITESPACE = re.compile(r"\s*")
+_BARE_TOKEN = re.compile(r"[^\s,:\[\]{}\"']+")
+
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_LITERALS = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null",
+}
+_UNQUOTED_KEY = re.compile(r"[A-Za-z_]\w*\s*:")
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?$")
+
+
+class _Frame:
+    """One open object or array while rewriting"""
+
+    __slots__ = ("kind", "state", "member_start")
+
+    def __init__(self, kind: str, member_start: int):
+        self.kind = kind
+        # Object states: key, colon, value, after; array states: value, after
+        self.state = "key" if kind == "{" else "value"
+        self.member_start = member_start
+
+
+class JsonRepairStats:
+    """Thread-safe counters for the repair stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.repaired = 0
+        self.failed = 0
+        self.regenerations = 0
+
+    def record_repair(self, success: bool) -> None:
+        """Record the outcome of one repair attempt"""
+        with self._lock:
+            if success:
+                self.repaired += 1
+            else:
+                self.failed += 1
+
+    def record_regeneration(self) -> None:
+        """Record a malformed response that had to be regenerated by the model"""
+        with self._lock:
+            self.regenerations += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get repair counters
+
+        Returns:
+            dict: Repaired, failed and regenerated response counts
+        """
+        with self._lock:
+            return {
+                "repaired": self.repaired,
+                "repair_failed": self.failed,
+                "regenerations": self.regenerations,
+            }
+
+
+def _next_significant(text: str, index: int) -> int:
+    """Index of the next non-whitespace character at or after index"""
+    return _WHITESPACE.match(text, index).end()
+
+
+def _is_closing_quote(text: str, index: int, is_key: bool) -> bool:
+    """
+    Decide whether a quote at index closes the current string or is an
+    unescaped quote inside it, by looking at what follows
+    """
+    following = _next_significant(text, index + 1)
+    if following >= len(text):
+        return True
+    ch = text[following]
+
+    if is_key:
+        return not ch.isalnum()
+
+    if ch in "}]":
+        return True
+    if ch == '"':
+        # Two quotes in a row: the second one closes if it is followed by structure
+        after_quote = _next_significant(text, following + 1)
+        return not (after_quote >= len(text) or text[after_quote] in ",]}:")
+    if ch == ",":
+        after_comma = _next_significant(text, following + 1)
+        if after_comma >= len(text) or text[after_comma] in "\"'}]{[" or text[after_comma].isdigit():
+            return True
+        return _UNQUOTED_KEY.match(text, after_comma) is not None
+    return False
+
+
+def _read_string(text: str, index: int, quote: str, is_key: bool, out: List[str]) -> Optional[int]:
+    """
+    Copy a string literal starting after its opening quote into out as a valid
+    JSON string
+
+    Returns:
+        Index just past the closing quote, or None if the text ended first
+    """
+    special = _DOUBLE_STRING_SPECIAL if quote == '"' else _SINGLE_STRING_SPECIAL
+    out.append('"')
+    length = len(text)
+
+    while index < length:
+        match = special.search(text, index)
+        if match is None:
+            out.append(text[index:])
+            break
+
+        start = match.start()
+        if start > index:
+            out.append(text[index:start])
+        ch = text[start]
+
+        if ch == quote:
+            if _is_closing_quote(text, start, is_key):
+                out.append('"')
+                return start + 1
+            out.append("'" if quote == "'" else '\\"')
+            index = start + 1
+        elif ch == '"':
+            # A double quote inside a single-quoted string
+            out.append('\\"')
+            index = start + 1
+        elif ch == "\\":
+            if start + 1 >= length:
+                break  # Dangling backslash at the truncation point
+            escaped = text[start + 1]
+            if quote == "'" and escaped == "'":
+                out.append("'")
+            elif escaped == "u" and re.match(r"[0-9a-fA-F]{4}", text[start + 2:start + 6]):
+                out.append(text[start:start + 6])
+                index = start + 6
+                continue
+            elif escaped in _VALID_ESCAPES and escaped != "u":
+                out.append(text[start:start + 2])
+            else:
+                out.append("\\\\" + escaped)
+            index = start + 2
+        else:
+            out.append(_CONTROL_ESCAPES.get(ch, f"\\u{ord(ch):04x}"))
+            index = start + 1
+
+    # Truncated inside the string: close it
+    out.append('"')
+    return None
+
+
+def _trim_trailing_comma(out: List[str]) -> None:
+    """Remove a trailing comma (and whitespace around it) from the output"""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _close_frame(frame: _Frame, out: List[str]) -> None:
+    """Close an object or array, dropping a dangling key that never got a value"""
+    if frame.kind == "{" and frame.state in ("colon", "value"):
+        del out[frame.member_start:]
+    _trim_trailing_comma(out)
+    out.append("}" if frame.kind == "{" else "]")
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite almost-JSON model output into strict JSON
+
+    Handles stray prose or markdown around the document, trailing commas,
+    unescaped inner quotes, raw newlines and control characters in strings,
+    single-quoted strings, unquoted keys, Python literals, missing colons
+    after keys, missing commas between members and output truncated at the token limit (open strings,
+    arrays and objects are closed, dangling keys dropped).
+
+    Args:
+        text: Raw or cleaned model output
+
+    Returns:
+        str: A JSON document that json.loads accepts
+
+    Raises:
+        ValueError: If the text contains no object or array at all
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object found in model output")
+
+    index = min(starts)
+    length = len(text)
+    out: List[str] = []
+    stack: List[_Frame] = []
+
+    while index < length:
+        ch = text[index]
+
+        if ch.isspace():
+            index = _next_significant(text, index)
+            continue
+
+        frame = stack[-1] if stack else None
+
+        if frame is not None and frame.kind == "{" and frame.state == "colon" and ch not in "}],:":
+            # A value right after its key: the colon is missing
+            out.append(":")
+            frame.state = "value"
+
+        if ch in "{[":
+            if frame is not None:
+                if frame.state == "after":
+                    out.append(",")  # Missing comma between members
+                frame.state = "after"
+            out.append(ch)
+            stack.append(_Frame(ch, len(out)))
+            index += 1
+
+        elif ch in "}]":
+            if frame is None:
+                break
+            stack.pop()
+            _close_frame(frame, out)
+            index += 1
+            if not stack:
+                break  # Ignore anything after the root closes
+
+        elif ch == ",":
+            if frame is not None and frame.state == "after":
+                if frame.kind == "{":
+                    frame.member_start = len(out)
+                    frame.state = "key"
+                else:
+                    frame.state = "value"
+                out.append(",")
+            index += 1
+
+        elif ch == ":":
+            if frame is not None and frame.kind == "{" and frame.state == "colon":
+                out.append(":")
+                frame.state = "value"
+            index += 1
+
+        elif ch in "\"'":
+            if frame is None:
+                break
+            if frame.state == "after":
+                # Missing comma before the next key or item
+                if frame.kind == "{":
+                    frame.member_start = len(out)
+                out.append(",")
+                frame.state = "key" if frame.kind == "{" else "value"
+            is_key = frame.kind == "{" and frame.state == "key"
+            end = _read_string(text, index + 1, ch, is_key, out)
+            if end is None:
+                frame.state = "colon" if is_key else "after"
+                break
+            frame.state = "colon" if is_key else "after"
+            index = end
+
+        else:
+            if frame is None:
+                break
+            match = _BARE_TOKEN.match(text, index)
+            token = match.group(0)
+            index = match.end()
+            if frame.kind == "{" and frame.state == "key":
+                out.append(f'"{token}"')  # Unquoted key
+                frame.state = "colon"
+            elif frame.state == "value":
+                if token in _LITERALS:
+                    out.append(_LITERALS[token])
+                elif _NUMBER.match(token):
+                    out.append(token)
+                else:
+                    out.append('"' + token.replace("\\", "\\\\").replace('"', '\\"') + '"')
+                frame.state = "after"
+            # Bare words anywhere else are stray prose and are dropped
+
+    # Close whatever the truncated output left open
+    while stack:
+        _close_frame(stack.pop(), out)
+
+    return "".join(out)
+
+
+# Global repair counters
+repair_stats = JsonRepairStats()
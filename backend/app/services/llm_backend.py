@@ -0,0 +1,525 @@
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional
+import google.generativeai as genai
+
+from app.config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default generation configuration shared by every Gemini model
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.7,  # Slightly more controlled for JSON output
+    "top_p": 0.9,
+    "top_k": 40,
+    "max_output_tokens": 4096,  # Increased for longer responses
+}
+
+# Refined safety settings to allow "Nuclear" roasts while blocking harmful content
+GEMINI_SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_ONLY_HIGH"  # Allow roast-style mean humor
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_ONLY_HIGH"  # Allow sarcasm but block actual hate speech
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"  # Standard blocking
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"  # Block dangerous content
+    }
+]
+
+
+class LLMBackend(ABC):
+    """
+    One model behind a text-generation provider.
+
+    Implementations are blocking and are called from the generation pool's
+    worker threads. Responses expose `.text` and, when the provider reports
+    it, `.usage_metadata` with prompt_token_count and candidates_token_count.
+    """
+
+    def __init__(self, model_name: str):
+        """
+        Initialize the backend
+
+        Args:
+            model_name: Name of the model this backend serves
+        """
+        self.model_name = model_name
+
+    @abstractmethod
+    def generate(self, prompt: str, generation_config: Optional[dict] = None) -> Any:
+        """
+        Generate a complete response
+
+        Args:
+            prompt: The prompt to send
+            generation_config: Per-call overrides (max_output_tokens, response schema, ...)
+
+        Returns:
+            Response object with a `.text` attribute
+        """
+
+    @abstractmethod
+    def stream(self, prompt: str, generation_config: Optional[dict] = None) -> Iterator[str]:
+        """
+        Generate a response as a stream of text chunks
+
+        Args:
+            prompt: The prompt to send
+            generation_config: Per-call overrides
+
+        Yields:
+            str: Text chunks in order
+        """
+
+    def health_check(self) -> bool:
+        """
+        Check that the model can be reached without generating anything
+
+        Local backends are always reachable; provider backends override this
+        with a cheap metadata call.
+
+        Returns:
+            bool: True if reachable
+
+        Raises:
+            Exception: Provider errors, treated as unreachable by callers
+        """
+        return True
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the google-generativeai SDK"""
+
+    _configure_lock = threading.Lock()
+    _configured = False
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+
+        # Configure Gemini API once per process
+        with GeminiBackend._configure_lock:
+            if not GeminiBackend._configured:
+                genai.configure(api_key=settings.gemini_api_key)
+                GeminiBackend._configured = True
+
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=GEMINI_GENERATION_CONFIG,
+            safety_settings=GEMINI_SAFETY_SETTINGS
+        )
+
+    def generate(self, prompt: str, generation_config: Optional[dict] = None) -> Any:
+        return self.model.generate_content(prompt, generation_config=generation_config)
+
+    def stream(self, prompt: str, generation_config: Optional[dict] = None) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, generation_config=generation_config, stream=True):
+            yield chunk.text
+
+    def health_check(self) -> bool:
+        # Model metadata lookup: authenticates and reaches the API without spending tokens
+        genai.get_model(self.model.model_name)
+        return True
+
+
+# Word pool for fake roast text; only the length and shape of the output matter
+FAKE_VOCABULARY = (
+    "your startup market users growth revenue burn runway pivot traction churn competitors "
+    "pricing moat funding investors product customers retention distribution margins scale "
+    "problem solution launch hype niche demand platform subscription enterprise onboarding "
+    "team roadmap metrics unit economics acquisition feedback validation prototype"
+).split()
+
+# Approximate words per field for realistic output sizes
+FAKE_FIELD_WORDS = {
+    "brutal_roast": 220,
+    "honest_feedback": 180,
+    "competitor_reality_check": 140,
+    "pitch_rewrite": 100,
+}
+FAKE_TIP_WORDS = 12
+FAKE_TIP_COUNT = 7
+
+_FIELD_LINE = re.compile(r"^- (\w+):", re.MULTILINE)
+_PACKED_STARTUP = re.compile(r"^STARTUP (\d+):", re.MULTILINE)
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic local stand-in for an LLM provider.
+
+    Produces roast-shaped JSON of realistic size for whatever fields (and, for
+    packed prompts, however many startups) the prompt asks for. Latency is
+    drawn from a log-normal distribution around a configurable median; streams
+    spread that latency over fixed-size chunks. Failures and malformed JSON
+    are injected at configurable rates. Output text depends only on the
+    prompt, so identical prompts give identical roasts.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        latency_ms: float,
+        latency_sigma: float,
+        chunk_chars: int,
+        failure_rate: float,
+        malformed_rate: float,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the fake backend
+
+        Args:
+            model_name: Model name reported in logs and metrics
+            latency_ms: Median time to produce a full response
+            latency_sigma: Log-normal sigma of the latency distribution (0 = fixed)
+            chunk_chars: Characters per streamed chunk
+            failure_rate: Probability (0-1) that a call raises ConnectionError
+            malformed_rate: Probability (0-1) that a response is malformed JSON
+            seed: Seed for latency and fault injection; None for a random seed
+        """
+        super().__init__(model_name)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.chunk_chars = max(1, chunk_chars)
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple:
+        """Draw (latency seconds, fail, malformed) for one call"""
+        with self._lock:
+            latency = self.latency_ms / 1000 * math.exp(self._rng.gauss(0, self.latency_sigma))
+            return latency, self._rng.random() < self.failure_rate, self._rng.random() < self.malformed_rate
+
+    def _build_text(self, prompt: str, generation_config: Optional[dict], malformed: bool) -> str:
+        """Build the response text the prompt asks for"""
+        text_rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+        def words(count: int) -> str:
+            return " ".join(text_rng.choice(FAKE_VOCABULARY) for _ in range(count)).capitalize() + "."
+
+        def roast(fields: List[str]) -> dict:
+            item = {}
+            for field in fields:
+                if field == "survival_tips":
+                    item[field] = [words(FAKE_TIP_WORDS) for _ in range(FAKE_TIP_COUNT)]
+                elif field in FAKE_FIELD_WORDS:
+                    item[field] = words(FAKE_FIELD_WORDS[field])
+            return item
+
+        fields = [field for field in _FIELD_LINE.findall(prompt) if field != "index"]
+        if not fields:
+            fields = list(FAKE_FIELD_WORDS)[:3] + ["survival_tips", "pitch_rewrite"]
+
+        startups = _PACKED_STARTUP.findall(prompt)
+        if startups:
+            payload = [{"index": int(index), **roast(fields)} for index in startups]
+        else:
+            payload = roast(fields)
+        text = json.dumps(payload)
+
+        if malformed:
+            # Cut the response short, like a model hitting its output limit
+            text = text[:int(len(text) * text_rng.uniform(0.5, 0.95))]
+        elif not (generation_config or {}).get("response_mime_type"):
+            # Free-form text mode: wrap the JSON the way chat models often do
+            text = f"```json\n{text}\n```"
+        return text
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> SimpleNamespace:
+        """Approximate token counts at four characters per token"""
+        return SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+
+    def generate(self, prompt: str, generation_config: Optional[dict] = None) -> Any:
+        latency, fail, malformed = self._draw()
+        time.sleep(latency)
+        if fail:
+            raise ConnectionError(f"Injected failure from fake backend {self.model_name}")
+        text = self._build_text(prompt, generation_config, malformed)
+        return SimpleNamespace(text=text, usage_metadata=self._usage(prompt, text))
+
+    def stream(self, prompt: str, generation_config: Optional[dict] = None) -> Iterator[str]:
+        latency, fail, malformed = self._draw()
+        text = self._build_text(prompt, generation_config, malformed)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        delay = latency / len(chunks)
+
+        for number, chunk in enumerate(chunks):
+            time.sleep(delay)
+            if fail and number >= len(chunks) // 2:
+                raise ConnectionError(f"Injected failure from fake backend {self.model_name}")
+            yield chunk
+
+
+def _prompt_key(prompt: str) -> str:
+    """Cassette lookup key for a prompt"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _usage_dict(response: Any) -> Optional[dict]:
+    """Extract token counts from a provider response, if it reports them"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_token_count": getattr(usage, "prompt_token_count", 0) or 0,
+        "candidates_token_count": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+class Cassette:
+    """
+    Gzipped JSON-lines file of recorded LLM calls.
+
+    Each line holds one call: the model, the prompt's sha256 and length, the
+    response text, chunk boundaries with their arrival offsets (for streams),
+    total latency, token usage, and the error message if the call failed.
+    Prompts themselves are not stored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the cassette
+
+        Args:
+            path: Cassette file; appended to when recording, read when replaying
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._by_prompt: dict = {}
+        self._replay_counts: dict = {}
+        self._cursor = 0
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def append(self, entry: dict) -> None:
+        """Append one recorded call"""
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Each append adds a gzip member; gzip readers concatenate them
+            with gzip.open(self.path, "at", encoding="utf-8") as cassette_file:
+                cassette_file.write(line)
+
+    def load(self) -> None:
+        """Read every recorded call into memory, indexed by prompt"""
+        with gzip.open(self.path, "rt", encoding="utf-8") as cassette_file:
+            entries = [json.loads(line) for line in cassette_file if line.strip()]
+        with self._lock:
+            self._entries = entries
+            self._by_prompt = {}
+            for entry in entries:
+                self._by_prompt.setdefault(entry["prompt_sha256"], []).append(entry)
+            self.loaded = True
+        logger.info(f"✅ Loaded {len(entries)} recorded LLM calls from {self.path}")
+
+    def lookup(self, prompt: str, sequential_fallback: bool) -> dict:
+        """
+        Find the recorded call to replay for a prompt
+
+        Repeated prompts cycle through every recording of that prompt. Unknown
+        prompts replay recordings in file order when sequential fallback is on.
+
+        Args:
+            prompt: The prompt being sent
+            sequential_fallback: Whether to serve unknown prompts from the recording order
+
+        Returns:
+            dict: The recorded call
+
+        Raises:
+            LookupError: If the prompt was never recorded and fallback is off
+        """
+        key = _prompt_key(prompt)
+        with self._lock:
+            matches = self._by_prompt.get(key)
+            if matches:
+                count = self._replay_counts.get(key, 0)
+                self._replay_counts[key] = count + 1
+                self.hits += 1
+                return matches[count % len(matches)]
+
+            self.misses += 1
+            if not sequential_fallback or not self._entries:
+                raise LookupError(f"No recorded LLM call for prompt {key[:12]} in {self.path}")
+            entry = self._entries[self._cursor % len(self._entries)]
+            self._cursor += 1
+            return entry
+
+
+# Open cassettes by path, shared by the backends of every routed model
+_cassettes: dict = {}
+
+
+def get_cassette(path: str) -> Cassette:
+    """Get the shared cassette for a path"""
+    if path not in _cassettes:
+        _cassettes[path] = Cassette(path)
+    return _cassettes[path]
+
+
+class RecordingBackend(LLMBackend):
+    """Wraps another backend and records every call it serves into a cassette"""
+
+    def __init__(self, inner: LLMBackend, cassette: Cassette):
+        """
+        Initialize the recorder
+
+        Args:
+            inner: Backend that actually serves the calls
+            cassette: Cassette receiving the recordings
+        """
+        super().__init__(inner.model_name)
+        self.inner = inner
+        self.cassette = cassette
+
+    def _record(self, prompt: str, started: float, text: str, chunks: list, usage: Optional[dict], error: Optional[str]) -> None:
+        self.cassette.append({
+            "model": self.model_name,
+            "prompt_sha256": _prompt_key(prompt),
+            "prompt_chars": len(prompt),
+            "latency": round(time.perf_counter() - started, 4),
+            "text": text,
+            "chunks": chunks,
+            "usage": usage,
+            "error": error,
+            "recorded_at": time.time(),
+        })
+
+    def generate(self, prompt: str, generation_config: Optional[dict] = None) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self.inner.generate(prompt, generation_config)
+            text = response.text
+        except Exception as e:
+            self._record(prompt, started, "", [], None, str(e))
+            raise
+        self._record(prompt, started, text, [], _usage_dict(response), None)
+        return response
+
+    def stream(self, prompt: str, generation_config: Optional[dict] = None) -> Iterator[str]:
+        started = time.perf_counter()
+        chunks = []
+        try:
+            for chunk in self.inner.stream(prompt, generation_config):
+                chunks.append([round(time.perf_counter() - started, 4), chunk])
+                yield chunk
+        except GeneratorExit:
+            raise  # The consumer stopped early; a partial stream is not worth replaying
+        except Exception as e:
+            self._record(prompt, started, "".join(text for _, text in chunks), chunks, None, str(e))
+            raise
+        self._record(prompt, started, "".join(text for _, text in chunks), chunks, None, None)
+
+    def health_check(self) -> bool:
+        return self.inner.health_check()
+
+
+class ReplayBackend(LLMBackend):
+    """Serves calls from a cassette instead of a provider"""
+
+    def __init__(self, model_name: str, cassette: Cassette, sequential_fallback: bool, speed: float):
+        """
+        Initialize the replayer
+
+        Args:
+            model_name: Model name reported in logs and metrics
+            cassette: Loaded cassette to replay
+            sequential_fallback: Serve unknown prompts from the recording order
+            speed: Multiplier on recorded timings (1 = real time, 0 = no delays)
+        """
+        super().__init__(model_name)
+        self.cassette = cassette
+        self.sequential_fallback = sequential_fallback
+        self.speed = speed
+
+    def generate(self, prompt: str, generation_config: Optional[dict] = None) -> Any:
+        entry = self.cassette.lookup(prompt, self.sequential_fallback)
+        time.sleep(entry["latency"] * self.speed)
+        if entry["error"]:
+            raise ConnectionError(f"Replayed failure: {entry['error']}")
+        usage = entry["usage"] or {"prompt_token_count": len(prompt) // 4, "candidates_token_count": len(entry["text"]) // 4}
+        return SimpleNamespace(text=entry["text"], usage_metadata=SimpleNamespace(**usage))
+
+    def stream(self, prompt: str, generation_config: Optional[dict] = None) -> Iterator[str]:
+        entry = self.cassette.lookup(prompt, self.sequential_fallback)
+        # Calls recorded without streaming replay as one chunk at their full latency
+        chunks = entry["chunks"] or [[entry["latency"], entry["text"]]]
+        elapsed = 0.0
+        for offset, chunk in chunks:
+            time.sleep(max(0.0, offset - elapsed) * self.speed)
+            elapsed = offset
+            yield chunk
+        if entry["error"]:
+            raise ConnectionError(f"Replayed failure: {entry['error']}")
+
+
+def create_backend(model_name: str) -> LLMBackend:
+    """
+    Create the configured backend for one model
+
+    Args:
+        model_name: Name of the model to serve
+
+    Returns:
+        LLMBackend: Backend selected by LLM_BACKEND, wrapped in a recorder
+        when LLM_CASSETTE_RECORD is on
+
+    Raises:
+        ValueError: If LLM_BACKEND names an unknown backend
+    """
+    if settings.llm_backend == "gemini":
+        backend = GeminiBackend(model_name)
+    elif settings.llm_backend == "fake":
+        backend = FakeBackend(
+            model_name,
+            latency_ms=settings.fake_llm_latency_ms,
+            latency_sigma=settings.fake_llm_latency_sigma,
+            chunk_chars=settings.fake_llm_chunk_chars,
+            failure_rate=settings.fake_llm_failure_rate,
+            malformed_rate=settings.fake_llm_malformed_rate,
+            seed=settings.fake_llm_seed
+        )
+    elif settings.llm_backend == "replay":
+        cassette = get_cassette(settings.llm_cassette_path)
+        if not cassette.loaded:
+            cassette.load()
+        return ReplayBackend(
+            model_name,
+            cassette,
+            sequential_fallback=settings.llm_cassette_sequential_fallback,
+            speed=settings.llm_cassette_replay_speed
+        )
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND '{settings.llm_backend}'; expected 'gemini', 'fake' or 'replay'")
+
+    if settings.llm_cassette_record:
+        logger.info(f"Recording {model_name} calls to {settings.llm_cassette_path}")
+        return RecordingBackend(backend, get_cassette(settings.llm_cassette_path))
+    return backend
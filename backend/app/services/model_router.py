@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.llm_backend import LLMBackend
+from app.services.rate_scheduler import OutboundScheduler
+from app.services.resilience import CircuitBreaker, LatencyTracker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the per-model latency histogram buckets
+LATENCY_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class ModelRoute:
+    """One routable model with its own breaker, quota scheduler and rolling statistics"""
+
+    def __init__(self, name: str, backend: LLMBackend):
+        """
+        Initialize the route
+
+        Args:
+            name: Model name
+            backend: The LLM backend serving this model
+        """
+        self.name = name
+        self.backend = backend
+        self.breaker = CircuitBreaker(
+            name=name,
+            failure_rate=settings.gemini_breaker_failure_rate,
+            min_calls=settings.gemini_breaker_min_calls,
+            window_seconds=settings.gemini_breaker_window_seconds,
+            open_seconds=settings.gemini_breaker_open_seconds
+        )
+        self.latency = LatencyTracker()
+        self.scheduler = OutboundScheduler(
+            name=name,
+            rpm=settings.gemini_rpm_limit,
+            tpm=settings.gemini_tpm_limit
+        )
+
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=200)
+        self.requests = 0
+        self.failures = 0
+        self.fallbacks_served = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, seconds: Optional[float], ok: bool) -> None:
+        """Record the outcome of one call; latency is only recorded for successes"""
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append((time.monotonic(), ok))
+            if not ok:
+                self.failures += 1
+                return
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+            self.histogram[bucket] += 1
+        self.latency.record(seconds)
+
+    def error_rate(self) -> float:
+        """Failure ratio over the most recent calls"""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def p95(self) -> Optional[float]:
+        """Rolling p95 latency, or None until enough samples exist"""
+        if len(self.latency) < settings.gemini_router_min_samples:
+            return None
+        return self.latency.percentile(95)
+
+    def is_healthy(self) -> bool:
+        """Whether this route currently meets the latency SLO and error budget"""
+        if self.breaker.state == "open":
+            return False
+        # Like the breaker, only trust the error rate once there are enough calls
+        if len(self._outcomes) >= settings.gemini_breaker_min_calls and self.error_rate() >= settings.gemini_router_max_error_rate:
+            return False
+        p95 = self.p95()
+        return p95 is None or p95 <= settings.gemini_latency_slo_seconds
+
+    def snapshot(self) -> dict:
+        """Counters, latency percentiles, histogram, breaker and quota state for this model"""
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        labels = [f"le_{bound:g}s" for bound in LATENCY_BUCKETS] + ["gt_{:g}s".format(LATENCY_BUCKETS[-1])]
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 4),
+            "fallbacks_served": self.fallbacks_served,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "latency_histogram": dict(zip(labels, self.histogram)),
+            "circuit_breaker": self.breaker.snapshot(),
+            "rate_limit": self.scheduler.snapshot(),
+        }
+
+
+class ModelRouter:
+    """
+    Latency-aware router over an ordered list of models.
+
+    The first model is the primary. Soft roasts and overload periods prefer
+    the fast model, and any model that is missing the latency SLO, burning
+    its error budget or has an open breaker is moved behind the healthy ones.
+    Callers try the returned routes in order, falling back on failure.
+    """
+
+    def __init__(self, routes: List[ModelRoute], fast_model: Optional[str] = None):
+        """
+        Initialize the router
+
+        Args:
+            routes: Routes in configured preference order (primary first)
+            fast_model: Name of the route preferred for Soft roasts and under load
+        """
+        self.routes = routes
+        self.fast_route = next((route for route in routes if route.name == fast_model), None)
+        self.fallbacks = 0
+        self.fast_routed = 0
+
+    @property
+    def primary(self) -> ModelRoute:
+        """The primary (first configured) route"""
+        return self.routes[0]
+
+    def candidates(self, roast_level: Optional[str] = None, overloaded: bool = False) -> List[ModelRoute]:
+        """
+        Order the routes for one request
+
+        Args:
+            roast_level: Roast level of the request, if there is a single one
+            overloaded: Whether generation capacity is currently saturated
+
+        Returns:
+            List[ModelRoute]: Routes to try in order
+        """
+        ordered = list(self.routes)
+        prefer_fast = self.fast_route is not None and (roast_level == "Soft" or overloaded)
+        if prefer_fast:
+            ordered.remove(self.fast_route)
+            ordered.insert(0, self.fast_route)
+
+        # Stable sort keeps the preference order within healthy and unhealthy routes
+        ordered.sort(key=lambda route: not route.is_healthy())
+        if prefer_fast and ordered[0] is self.fast_route:
+            # An unhealthy fast model sorted behind healthy ones was not routed to
+            self.fast_routed += 1
+        return ordered
+
+    def record_fallback(self, route: ModelRoute) -> None:
+        """Count a request that was served by a later route after an earlier one failed"""
+        route.fallbacks_served += 1
+        self.fallbacks += 1
+        logger.warning(f"⚠️ Fell back to model {route.name}")
+
+    def snapshot(self) -> dict:
+        """
+        Get routing counters and per-model statistics
+
+        Returns:
+            dict: Configured models, fallback totals and a per-model breakdown
+        """
+        return {
+            "models": [route.name for route in self.routes],
+            "fast_model": self.fast_route.name if self.fast_route else None,
+            "latency_slo_seconds": settings.gemini_latency_slo_seconds,
+            "fast_routed": self.fast_routed,
+            "fallbacks": self.fallbacks,
+            "per_model": {route.name: route.snapshot() for route in self.routes},
+        }
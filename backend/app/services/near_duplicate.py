@@ -0,0 +1,392 @@
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# MinHash signature length and LSH banding. Candidates are found with 8 bands
+# of 4 rows over the first 32 hashes: two submissions share a bucket with
+# probability 1 - (1 - s^4)^8 for Jaccard similarity s (~99% at 0.8, ~40% at
+# 0.5, ~1% at 0.2). The full 64 hashes then estimate the similarity.
+NUM_PERM = 64
+BANDS = 8
+ROWS = 4
+
+# Signatures use one-permutation hashing: each shingle is hashed once and
+# lands in one of NUM_PERM bins by its top bits, and each bin keeps its
+# minimum. Empty bins borrow the minimum of another bin picked by a fixed
+# probe sequence (optimal densification), so short texts still compare well.
+_BIN_BITS = NUM_PERM.bit_length() - 1  # NUM_PERM is a power of two
+_VALUE_BITS = 32 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_MIX = 0x9E3779B1  # Odd multiplier that spreads crc32 values over the top bits
+_HASH_MASK = (1 << 32) - 1
+
+# Fixed seed: signatures are persisted and must be comparable across restarts
+_rng = random.Random(20240601)
+_PROBES = [[_rng.randrange(NUM_PERM) for _ in range(4 * NUM_PERM)] for _ in range(NUM_PERM)]
+
+# Bump when the signature scheme changes so stored entries from the old
+# scheme are dropped instead of never matching
+SIGNATURE_VERSION = 2
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str, ignored: frozenset) -> List[str]:
+    """Lowercase alphanumeric words, without punctuation or the startup's own name"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in ignored]
+
+
+def signature(startup_name: str, idea_description: str, target_users: str) -> Optional[array]:
+    """
+    Compute the MinHash signature of a submission
+
+    The signature covers word bigrams of idea_description and target_users.
+    Words of the startup name are left out so a renamed submission still
+    matches its original.
+
+    Returns:
+        array: NUM_PERM per-bin minimum hashes, or None if there is no text to hash
+    """
+    ignored = frozenset(_TOKEN_PATTERN.findall(startup_name.lower()))
+    tokens = _tokens(idea_description, ignored) + ["|"] + _tokens(target_users, ignored)
+    if len(tokens) < 3:
+        return None
+
+    hashes = {
+        zlib.crc32(f"{first} {second}".encode("utf-8"))
+        for first, second in zip(tokens, tokens[1:])
+    }
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for value in hashes:
+        value = (value * _MIX) & _HASH_MASK
+        slot, value = value >> _VALUE_BITS, value & _VALUE_MASK
+        current = bins[slot]
+        if current is None or value < current:
+            bins[slot] = value
+
+    filled = [value for value in bins if value is not None]
+    sig = array("I", [0] * NUM_PERM)
+    for slot, value in enumerate(bins):
+        if value is None:
+            # Fall back to the first filled bin if no probe finds one
+            value = next((bins[probe] for probe in _PROBES[slot] if bins[probe] is not None), filled[0])
+        sig[slot] = value
+    return sig
+
+
+def similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def _band_keys(roast_level: str, sig: array) -> List[int]:
+    """One LSH bucket key per band; roast levels never share buckets"""
+    return [
+        hash((roast_level, band, *sig[band * ROWS:(band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+def swap_startup_name(response: RoastResponse, old_name: str, new_name: str) -> RoastResponse:
+    """
+    Replace every mention of the original startup name in a stored roast
+
+    Args:
+        response: The stored roast
+        old_name: Startup name the roast was written for
+        new_name: Startup name of the new submission
+
+    Returns:
+        RoastResponse: A copy mentioning new_name instead of old_name
+    """
+    if not old_name.strip() or old_name == new_name:
+        return response
+
+    pattern = re.compile(r"(?<!\w)" + re.escape(old_name) + r"(?!\w)", re.IGNORECASE)
+    data = response.model_dump()
+    for field, value in data.items():
+        if isinstance(value, str):
+            data[field] = pattern.sub(lambda _: new_name, value)
+        elif isinstance(value, list):
+            data[field] = [pattern.sub(lambda _: new_name, item) for item in value]
+    return RoastResponse(**data)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of generated roasts for reuse on near-identical submissions.
+
+    Signatures and LSH buckets are kept in memory; the roasts themselves live
+    in SQLite (a file when db_path is set, so the index survives restarts,
+    otherwise an in-memory database capped at memory_max_entries). A lookup
+    only compares the signature against entries that share at least one
+    band bucket, so its cost does not grow with the size of the index. The
+    oldest entries are dropped beyond max_entries.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, db_path: Optional[str] = None,
+                 memory_max_entries: Optional[int] = None):
+        """
+        Initialize the index
+
+        Args:
+            threshold: Estimated Jaccard similarity needed to reuse a roast
+            max_entries: Maximum number of roasts indexed
+            db_path: Optional SQLite file for persistence
+            memory_max_entries: Lower cap used when the roasts are held in
+                memory (no db_path, or the file cannot be opened)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.memory_max_entries = memory_max_entries
+        self._entries: Dict[int, Tuple[str, array]] = {}
+        self._order: Deque[int] = deque()
+        # Bucket key -> entry id, or a list of ids once several entries share it
+        self._buckets: Dict[int, Union[int, List[int]]] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.candidates_compared = 0
+        self.lookup_seconds = 0.0
+
+        self._db = self._open_store(db_path)
+
+    def _open_store(self, db_path: Optional[str]) -> sqlite3.Connection:
+        """Open the roast store and load the signatures; falls back to memory if the file cannot be used"""
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = self._prepare(sqlite3.connect(db_path, check_same_thread=False))
+                rows = db.execute("SELECT id, roast_level, signature FROM near_duplicate_roasts ORDER BY id").fetchall()
+                for entry_id, roast_level, blob in rows[-self.max_entries:]:
+                    sig = array("I")
+                    sig.frombytes(blob)
+                    self._index(entry_id, roast_level, sig)
+                if len(rows) > self.max_entries:
+                    db.execute("DELETE FROM near_duplicate_roasts WHERE id < ?", (rows[-self.max_entries][0],))
+                    db.commit()
+                logger.info(f"✅ Near-duplicate index loaded {len(self._entries)} roasts from {db_path}")
+                return db
+            except Exception as e:
+                logger.error(f"❌ Failed to open near-duplicate index at {db_path}: {str(e)}")
+                self._entries.clear()
+                self._order.clear()
+                self._buckets.clear()
+        if self.memory_max_entries is not None:
+            # Every payload now lives in this process's memory
+            self.max_entries = min(self.max_entries, self.memory_max_entries)
+        return self._prepare(sqlite3.connect(":memory:", check_same_thread=False))
+
+    @staticmethod
+    def _prepare(db: sqlite3.Connection) -> sqlite3.Connection:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS near_duplicate_roasts ("
+            "id INTEGER PRIMARY KEY, roast_level TEXT NOT NULL, startup_name TEXT NOT NULL, "
+            "signature BLOB NOT NULL, payload TEXT NOT NULL)"
+        )
+        if db.execute("PRAGMA user_version").fetchone()[0] != SIGNATURE_VERSION:
+            dropped = db.execute("DELETE FROM near_duplicate_roasts").rowcount
+            if dropped:
+                logger.warning(
+                    f"⚠️ Dropped {dropped} near-duplicate roasts with outdated signatures; "
+                    "run rebuild_near_duplicate_index.py to re-index them"
+                )
+            db.execute(f"PRAGMA user_version = {SIGNATURE_VERSION}")
+        db.commit()
+        return db
+
+    def _index(self, entry_id: int, roast_level: str, sig: array) -> None:
+        self._entries[entry_id] = (roast_level, sig)
+        self._order.append(entry_id)
+        for key in _band_keys(roast_level, sig):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self._buckets[key] = [bucket, entry_id]
+
+    def _unindex(self, entry_id: int) -> None:
+        roast_level, sig = self._entries.pop(entry_id)
+        for key in _band_keys(roast_level, sig):
+            bucket = self._buckets.get(key)
+            if isinstance(bucket, list):
+                bucket.remove(entry_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+            elif bucket == entry_id:
+                del self._buckets[key]
+
+    def _bucket(self, key: int) -> Iterable[int]:
+        bucket = self._buckets.get(key, ())
+        return (bucket,) if isinstance(bucket, int) else bucket
+
+    def _insert(self, startup_name: str, idea_description: str, target_users: str,
+                roast_level: str, response: RoastResponse, commit: bool = True) -> bool:
+        sig = signature(startup_name, idea_description, target_users)
+        if sig is None:
+            return False
+
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO near_duplicate_roasts (roast_level, startup_name, signature, payload) VALUES (?, ?, ?, ?)",
+                (roast_level, startup_name, sig.tobytes(), response.model_dump_json())
+            )
+            self._index(cursor.lastrowid, roast_level, sig)
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                entry_id = self._order.popleft()
+                self._unindex(entry_id)
+                evicted.append((entry_id,))
+            if evicted:
+                self._db.executemany("DELETE FROM near_duplicate_roasts WHERE id = ?", evicted)
+            if commit:
+                self._db.commit()
+        return True
+
+    def add(self, request: RoastRequest, response: RoastResponse) -> None:
+        """
+        Index a generated roast
+
+        Args:
+            request: The submission the roast was generated for
+            response: The generated roast
+        """
+        try:
+            self._insert(request.startup_name, request.idea_description, request.target_users,
+                         request.roast_level, response)
+        except Exception as e:
+            logger.error(f"❌ Near-duplicate index write failed: {str(e)}")
+
+    def lookup(self, request: RoastRequest) -> Optional[RoastResponse]:
+        """
+        Find a stored roast for a near-identical submission
+
+        Args:
+            request: The new submission
+
+        Returns:
+            RoastResponse for the most similar stored submission with the same
+            roast level at or above the threshold (with the startup name swapped
+            in if NEAR_DUPLICATE_SWAP_NAME is set), or None
+        """
+        started = time.perf_counter()
+        sig = signature(request.startup_name, request.idea_description, request.target_users)
+        best_id, best_score = None, 0.0
+
+        with self._lock:
+            self.lookups += 1
+            if sig is not None:
+                seen = set()
+                for key in _band_keys(request.roast_level, sig):
+                    for entry_id in self._bucket(key):
+                        if entry_id in seen:
+                            continue
+                        seen.add(entry_id)
+                        score = similarity(sig, self._entries[entry_id][1])
+                        if score > best_score:
+                            best_id, best_score = entry_id, score
+                self.candidates_compared += len(seen)
+
+            row = None
+            if best_id is not None and best_score >= self.threshold:
+                try:
+                    row = self._db.execute(
+                        "SELECT startup_name, payload FROM near_duplicate_roasts WHERE id = ?", (best_id,)
+                    ).fetchone()
+                except Exception as e:
+                    logger.error(f"❌ Near-duplicate index read failed: {str(e)}")
+            if row is not None:
+                self.hits += 1
+            self.lookup_seconds += time.perf_counter() - started
+
+        if row is None:
+            return None
+
+        logger.info(f"Reusing roast of {row[0]!r} for {request.startup_name!r} (similarity {best_score:.2f})")
+        response = RoastResponse.model_validate_json(row[1])
+        if settings.near_duplicate_swap_name:
+            response = swap_startup_name(response, row[0], request.startup_name)
+        return response
+
+    def rebuild(self, rows: Iterable[dict]) -> int:
+        """
+        Replace the index contents with rows from the roasts table
+
+        Args:
+            rows: Roast records with the request and response columns
+
+        Returns:
+            int: Number of roasts indexed
+        """
+        with self._lock:
+            self._entries.clear()
+            self._order.clear()
+            self._buckets.clear()
+            self._db.execute("DELETE FROM near_duplicate_roasts")
+
+        indexed = 0
+        for row in rows:
+            try:
+                response = RoastResponse(**{field: row[field] for field in RoastResponse.model_fields})
+                if self._insert(row["startup_name"], row["idea_description"], row["target_users"],
+                                row["roast_level"], response, commit=False):
+                    indexed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Skipped roast {row.get('id')} while rebuilding the near-duplicate index: {str(e)}")
+
+        with self._lock:
+            self._db.commit()
+        logger.info(f"✅ Near-duplicate index rebuilt with {indexed} roasts")
+        return indexed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        """
+        Get index counters
+
+        Returns:
+            dict: Size, lookups, hits, average candidates compared and average lookup time
+        """
+        with self._lock:
+            return {
+                "enabled": settings.near_duplicate_enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_ratio": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "avg_candidates": round(self.candidates_compared / self.lookups, 2) if self.lookups else 0.0,
+                "avg_lookup_ms": round(self.lookup_seconds / self.lookups * 1000, 3) if self.lookups else 0.0,
+            }
+
+
+# Global near-duplicate index instance
+near_duplicate_index = NearDuplicateIndex(
+    threshold=settings.near_duplicate_threshold,
+    max_entries=settings.near_duplicate_max_entries,
+    db_path=settings.near_duplicate_db_path,
+    memory_max_entries=settings.near_duplicate_memory_max_entries
+)
@@ -0,0 +1,326 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from app.config.settings import settings
+from app.services.auth_service import get_optional_user
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowQuota:
+    """
+    Sliding-window counters of roasts per key (user or client IP).
+
+    Each key keeps the timestamps of its roasts inside the window in memory;
+    the least recently active keys are dropped beyond `max_keys`. With a
+    SQLite file the timestamps are also written to disk and reloaded on
+    start, so quotas survive restarts.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int = 100000, db_path: Optional[str] = None):
+        """
+        Initialize the counters
+
+        Args:
+            window_seconds: Length of the sliding window
+            max_keys: Maximum number of keys tracked in memory
+            db_path: Optional SQLite file for persistence
+        """
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            self._open_store(db_path)
+
+    def _open_store(self, db_path: str) -> None:
+        """Open (or create) the SQLite store and load recent events; quotas stay in memory if this fails"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS roast_quota_events (key TEXT NOT NULL, at REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_roast_quota_events_at ON roast_quota_events (at)")
+            cutoff = time.time() - self.window_seconds
+            self._db.execute("DELETE FROM roast_quota_events WHERE at < ?", (cutoff,))
+            self._db.commit()
+            for key, at in self._db.execute("SELECT key, at FROM roast_quota_events ORDER BY at"):
+                self._events.setdefault(key, deque()).append(at)
+            logger.info(f"✅ Roast quotas loaded {len(self._events)} active clients from {db_path}")
+        except Exception as e:
+            logger.error(f"❌ Failed to open roast quota store at {db_path}: {str(e)}")
+            self._db = None
+
+    def consume(self, key: str, limit: int, cost: int = 1) -> Optional[float]:
+        """
+        Record `cost` roasts for a key if they fit in its quota
+
+        Args:
+            key: User or client identifier
+            limit: Roasts allowed per window
+            cost: Roasts this request will generate
+
+        Returns:
+            None if allowed, otherwise seconds until enough quota frees up
+        """
+        now = time.time()
+        cutoff = now - self.window_seconds
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            self._events.move_to_end(key)
+            while events and events[0] < cutoff:
+                events.popleft()
+
+            if len(events) + cost > limit:
+                if cost > limit:
+                    return self.window_seconds
+                # Wait until enough of the oldest roasts leave the window
+                return events[len(events) + cost - limit - 1] - cutoff
+
+            events.extend([now] * cost)
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+
+            if self._db is not None:
+                try:
+                    self._db.executemany("INSERT INTO roast_quota_events (key, at) VALUES (?, ?)", [(key, now)] * cost)
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"❌ Roast quota write failed: {str(e)}")
+            return None
+
+    def refund(self, key: str, cost: int = 1) -> None:
+        """
+        Give back the most recent `cost` roasts charged to a key
+
+        Args:
+            key: User or client identifier
+            cost: Roasts to give back
+        """
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return
+            refunded = min(cost, len(events))
+            for _ in range(refunded):
+                events.pop()
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "DELETE FROM roast_quota_events WHERE rowid IN "
+                        "(SELECT rowid FROM roast_quota_events WHERE key = ? ORDER BY at DESC LIMIT ?)",
+                        (key, refunded)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"❌ Roast quota refund failed: {str(e)}")
+
+    def remaining(self, key: str, limit: int) -> int:
+        """Roasts left for a key in the current window"""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            events = self._events.get(key, ())
+            return max(0, limit - sum(1 for at in events if at >= cutoff))
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class QuotaCharge:
+    """
+    Roasts charged up front for one request.
+
+    Charging before generation keeps concurrent requests from overdrawing a
+    quota. Once the request is over, settle() refunds every charged roast the
+    request did not generate itself: failures, cache and near-duplicate hits,
+    and roasts shared from another request's in-flight generation.
+    """
+
+    def __init__(self, quotas: "RoastQuotas", key: str, cost: int):
+        """
+        Initialize the charge
+
+        Args:
+            quotas: The quotas the roasts were charged to
+            key: Quota key that was charged
+            cost: Roasts charged
+        """
+        self.quotas = quotas
+        self.key = key
+        self.cost = cost
+        self.generated = 0
+        self._settled = False
+
+    def settle(self) -> None:
+        """Refund the charged roasts that were not generated"""
+        if self._settled:
+            return
+        self._settled = True
+        unused = max(0, self.cost - self.generated)
+        if unused:
+            self.quotas.window.refund(self.key, unused)
+            self.quotas.refunded += unused
+
+
+# Quota charge of the request currently being served; set per request and inherited by its tasks
+current_quota_charge: ContextVar[Optional[QuotaCharge]] = ContextVar("current_quota_charge", default=None)
+
+
+def record_generated_roast() -> None:
+    """Count a freshly generated roast against the current request's quota charge"""
+    charge = current_quota_charge.get()
+    if charge is not None:
+        charge.generated += 1
+
+
+class RoastQuotas:
+    """Per-user quotas for signed-in requests and per-IP quotas for anonymous ones"""
+
+    def __init__(self, window: SlidingWindowQuota, user_limit: int, ip_limit: int):
+        """
+        Initialize the quotas
+
+        Args:
+            window: Shared sliding-window counters
+            user_limit: Roasts per window for each signed-in user
+            ip_limit: Roasts per window for each anonymous client IP
+        """
+        self.window = window
+        self.user_limit = user_limit
+        self.ip_limit = ip_limit
+        self.allowed = 0
+        self.refunded = 0
+        self.rejected_users = 0
+        self.rejected_ips = 0
+
+    def enforce(self, user: Optional[dict], client_ip: str, cost: int = 1) -> QuotaCharge:
+        """
+        Charge a request against its quota
+
+        Args:
+            user: Verified token claims, or None for anonymous requests
+            client_ip: The client's IP address
+            cost: Roasts the request will generate
+
+        Returns:
+            QuotaCharge: The charge, to be settled once the request is over
+
+        Raises:
+            HTTPException: 413 if the request needs more roasts than a whole
+                window allows, 429 with Retry-After if the quota is exhausted
+        """
+        if user:
+            key, limit = f"user:{user.get('email')}", self.user_limit
+        else:
+            key, limit = f"ip:{client_ip}", self.ip_limit
+
+        if cost > limit:
+            # Waiting would never help, so there is no Retry-After
+            if user:
+                self.rejected_users += 1
+            else:
+                self.rejected_ips += 1
+            detail = (f"This request needs {cost} roasts but the quota allows {limit} per "
+                      f"{self.window.window_seconds / 3600:g}h.")
+            if not user:
+                detail += " Sign in for a higher limit."
+            raise HTTPException(status_code=413, detail=detail)
+
+        retry_after = self.window.consume(key, limit, cost)
+        if retry_after is None:
+            self.allowed += 1
+            return QuotaCharge(self, key, cost)
+
+        if user:
+            self.rejected_users += 1
+        else:
+            self.rejected_ips += 1
+        logger.warning(f"⚠️ Roast quota exceeded for {key}")
+        detail = f"Roast quota exceeded ({limit} roasts per {self.window.window_seconds / 3600:g}h)."
+        if not user:
+            detail += " Sign in for a higher limit."
+        raise HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def snapshot(self) -> dict:
+        """
+        Get quota counters
+
+        Returns:
+            dict: Limits, tracked clients, allowed requests, refunded roasts and rejections by kind
+        """
+        return {
+            "enabled": settings.quota_enabled,
+            "window_seconds": self.window.window_seconds,
+            "user_limit": self.user_limit,
+            "ip_limit": self.ip_limit,
+            "tracked_clients": len(self.window),
+            "allowed": self.allowed,
+            "refunded_roasts": self.refunded,
+            "rejected_users": self.rejected_users,
+            "rejected_ips": self.rejected_ips,
+        }
+
+
+# Global roast quota instance
+roast_quotas = RoastQuotas(
+    window=SlidingWindowQuota(
+        window_seconds=settings.quota_window_seconds,
+        db_path=settings.quota_db_path
+    ),
+    user_limit=settings.quota_user_roasts,
+    ip_limit=settings.quota_ip_roasts
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The client's IP address for per-IP quotas
+
+    Behind QUOTA_FORWARDED_FOR_HOPS trusted proxies this is the X-Forwarded-For
+    entry appended by the outermost of them (that many entries from the
+    right). Entries further left are supplied by the client and ignored.
+    """
+    hops = settings.quota_forwarded_for_hops
+    if hops > 0:
+        forwarded = ",".join(request.headers.getlist("X-Forwarded-For"))
+        entries = [entry.strip() for entry in forwarded.split(",") if entry.strip()]
+        if len(entries) >= hops:
+            return entries[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_roast_quota(request: Request, user: Optional[dict] = Depends(get_optional_user)) -> AsyncIterator[None]:
+    """
+    Dependency that charges one roast against the caller's quota
+
+    The charge is settled after the response has been sent, so requests that
+    fail or are served without generating a roast are refunded.
+    """
+    if not settings.quota_enabled:
+        yield
+        return
+
+    charge = roast_quotas.enforce(user, client_ip(request))
+    current_quota_charge.set(charge)
+    try:
+        yield
+    finally:
+        charge.settle()
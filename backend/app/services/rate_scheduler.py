@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Priority lanes for outbound model calls, most urgent first
+LANES = {
+    "authenticated": 0,  # Interactive requests from signed-in (JWT) users
+    "anonymous": 1,  # Interactive requests without a valid token
+    "batch": 2,  # /roast/batch and background jobs
+}
+
+# Lane of the request currently being served; set per request and inherited by its tasks
+current_lane: ContextVar[str] = ContextVar("current_lane", default="anonymous")
+
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units per minute"""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket
+
+        Args:
+            per_minute: Units added per minute, which is also the burst capacity
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        """Spend units; the level may go negative when usage is settled after the fact"""
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Give back units that were reserved but not used"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reported the quota exhausted"""
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class OutboundScheduler:
+    """
+    Requests-per-minute and tokens-per-minute aware gate for model calls.
+
+    Each call reserves one request and its estimated tokens (prompt length
+    plus max_output_tokens). When either bucket is short, callers wait in a
+    priority queue ordered by lane and arrival, and a dispatcher releases them
+    as the buckets refill. Once a call finishes the reservation is settled
+    against the actual token usage.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        """
+        Initialize the scheduler
+
+        Args:
+            name: Name used in logs (the model name)
+            rpm: Requests-per-minute quota
+            tpm: Tokens-per-minute quota
+        """
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # Counters since process start
+        self.granted: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.delayed: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.wait_seconds: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        self.throttled = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for budget"""
+        return sum(1 for entry in self._heap if not entry[2].done())
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def _grant(self, lane: str, tokens: int) -> None:
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.granted[lane] += 1
+
+    async def acquire(self, tokens: int, lane: Optional[str] = None) -> None:
+        """
+        Wait until the call fits in both budgets
+
+        Args:
+            tokens: Estimated tokens the call will use
+            lane: Priority lane; defaults to the current request's lane
+        """
+        lane = lane if lane in LANES else current_lane.get()
+        if not self._heap and self._wait_time(tokens) <= 0:
+            self._grant(lane, tokens)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (LANES[lane], next(self._sequence), waiter, lane, tokens))
+        self.delayed[lane] += 1
+        self._ensure_dispatcher()
+
+        started = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.settle(tokens, 0, released=True)  # Granted but never sent
+            raise
+        finally:
+            self.wait_seconds[lane] += time.perf_counter() - started
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        else:
+            self._wakeup.set()  # A new arrival may outrank the call being waited for
+
+    async def _dispatch(self) -> None:
+        """Release queued calls in priority order as the buckets refill"""
+        while self._heap:
+            _, _, waiter, lane, tokens = self._heap[0]
+            if waiter.done():
+                heapq.heappop(self._heap)
+                continue
+
+            wait = self._wait_time(tokens)
+            if wait <= 0:
+                heapq.heappop(self._heap)
+                self._grant(lane, tokens)
+                waiter.set_result(None)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def settle(self, estimated: int, actual: int, released: bool = False) -> None:
+        """
+        Correct a reservation once the real token usage is known
+
+        Args:
+            estimated: Tokens reserved by acquire()
+            actual: Tokens the call actually used
+            released: Also give back the reserved request (the call was never sent)
+        """
+        if actual < estimated:
+            self.tokens.refund(estimated - actual)
+        elif actual > estimated:
+            self.tokens.take(actual - estimated)
+        if released:
+            self.requests.refund(1)
+
+    def throttle(self) -> None:
+        """Back off after the provider reported the quota exhausted"""
+        self.throttled += 1
+        self.requests.drain()
+        self.tokens.drain()
+        logger.warning(f"⚠️ Gemini quota exhausted for {self.name}; pausing outbound calls until the budget refills")
+
+    def snapshot(self) -> dict:
+        """
+        Get budget levels and per-lane counters
+
+        Returns:
+            dict: Remaining request/token budget, queue depth and per-lane grants, delays and average waits
+        """
+        self.requests._refill()
+        self.tokens._refill()
+        return {
+            "rpm_limit": int(self.requests.capacity),
+            "tpm_limit": int(self.tokens.capacity),
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": int(self.tokens.level),
+            "queue_depth": self.queue_depth,
+            "throttled": self.throttled,
+            "lanes": {
+                lane: {
+                    "granted": self.granted[lane],
+                    "delayed": self.delayed[lane],
+                    "avg_wait_seconds": round(self.wait_seconds[lane] / self.delayed[lane], 3) if self.delayed[lane] else 0.0,
+                }
+                for lane in LANES
+            },
+        }
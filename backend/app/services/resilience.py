@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit breaker is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies with percentile lookups"""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the tracker
+
+        Args:
+            window: Number of most recent samples to keep
+        """
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add one latency sample"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Get a latency percentile over the window
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            float: The percentile in seconds, or None without samples
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker.
+
+    Closed: calls flow and outcomes are recorded in a sliding time window.
+    When the failure rate over at least `min_calls` calls reaches
+    `failure_rate`, the breaker opens and rejects calls for `open_seconds`.
+    After that a single half-open probe is let through; its success closes
+    the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_rate: float, min_calls: int, window_seconds: float, open_seconds: float):
+        """
+        Initialize the breaker
+
+        Args:
+            name: Name used in logs
+            failure_rate: Failure ratio (0-1) that trips the breaker
+            min_calls: Minimum calls in the window before the rate is trusted
+            window_seconds: Length of the sliding outcome window
+            open_seconds: How long to reject calls once tripped
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _trim(self, now: float) -> None:
+        """Drop outcomes that fell out of the window"""
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+                return "half_open"
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may proceed
+
+        Raises:
+            CircuitOpenError: If the breaker is open or a half-open probe is already running
+        """
+        with self._lock:
+            if self._state == "closed":
+                return
+
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+            if remaining <= 0 and not self._probe_in_flight:
+                self._state = "half_open"
+                self._probe_in_flight = True
+                logger.info(f"Circuit breaker {self.name} half-open: sending probe call")
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        """Record a successful call"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open":
+                return  # A straggler from before the breaker opened
+            if self._state == "half_open":
+                logger.info(f"✅ Circuit breaker {self.name} closed after successful probe")
+                self._state = "closed"
+                self._probe_in_flight = False
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        """Record a failed call and trip the breaker if the failure rate is too high"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open":
+                return  # A straggler from before the breaker opened
+            if self._state == "half_open":
+                self._open(now)
+                return
+
+            self._outcomes.append((now, False))
+            self._trim(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def record_abandoned(self) -> None:
+        """Record a call that was cancelled before it finished, freeing a half-open probe slot"""
+        with self._lock:
+            if self._state == "half_open":
+                self._probe_in_flight = False
+                self._state = "open"
+                self._opened_at = time.monotonic() - self.open_seconds
+
+    def _open(self, now: float) -> None:
+        """Move to the open state"""
+        self._state = "open"
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.error(f"❌ Circuit breaker {self.name} opened for {self.open_seconds:.0f}s")
+
+    def snapshot(self) -> dict:
+        """
+        Get breaker state and counters
+
+        Returns:
+            dict: State, windowed failure rate and rejection counters
+        """
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_failure_rate": round(failures / calls, 4) if calls else 0.0,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+async def hedged_call(call: Callable[[], Awaitable[Any]], hedge_delay: Optional[float]) -> Tuple[Any, bool, bool]:
+    """
+    Run a call, firing a second identical attempt if the first is slow
+
+    The first successful result wins and the other attempt is cancelled. If
+    one attempt fails the other is still awaited; the call only fails when
+    every started attempt has failed.
+
+    Args:
+        call: Zero-argument coroutine factory for one attempt
+        hedge_delay: Seconds to wait before hedging, or None to never hedge
+
+    Returns:
+        (result, hedged, hedge_won): hedged is True if a second attempt was
+        started, hedge_won if that second attempt produced the result
+    """
+    primary = asyncio.ensure_future(call())
+    attempts = [primary]
+    hedged = False
+
+    try:
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if not done:
+                hedged = True
+                attempts.append(asyncio.ensure_future(call()))
+
+        pending = set(attempts)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result(), hedged, attempt is not primary
+                last_error = attempt.exception()
+        raise last_error
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
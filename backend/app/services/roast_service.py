@@ -1,60 +1,115 @@
+import asyncio
 import json
 import logging
+import math
 import re
-from typing import Dict, Any
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+from google.api_core.exceptions import ResourceExhausted
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from fastapi import HTTPException
+from pydantic import ValidationError
 
 from app.config.settings import settings
 from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.generation_pool import generation_pool
+from app.services.resilience import CircuitOpenError, LatencyTracker, hedged_call
+from app.services.model_router import ModelRoute, ModelRouter
+from app.services.llm_backend import GEMINI_GENERATION_CONFIG, create_backend
+from app.services.cache_service import roast_cache, request_key
+from app.services.near_duplicate import near_duplicate_index
+from app.services.single_flight import roast_single_flight
+from app.services.json_repair import repair_json, repair_stats
+from app.services.quota_service import record_generated_roast
+from app.services.stream_parser import IncrementalRoastParser, TEXT_FIELDS, LIST_FIELD
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Fields every roast must contain
+REQUIRED_FIELDS = ["brutal_roast", "honest_feedback", "competitor_reality_check", "survival_tips", "pitch_rewrite"]
+
+
+def _count_regeneration(retry_state) -> None:
+    """Count a whole roast that is generated again because its JSON could not be repaired"""
+    if isinstance(retry_state.outcome.exception(), json.JSONDecodeError):
+        repair_stats.record_regeneration()
+
+
+# Retry policy shared by every whole-roast generation path
+generation_retry = retry(
+    stop=stop_after_attempt(2),  # Retry exactly 1 time (2 total attempts)
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type((json.JSONDecodeError, ValueError, ConnectionError, TimeoutError, ResourceExhausted)),
+    before_sleep=_count_regeneration,
+    reraise=True
+)
+
+# Upper bound on the output budget of one packed multi-startup call
+PACKED_MAX_OUTPUT_TOKENS = 8192
+
+# Gemini response schema mirroring RoastResponse (used in "schema" response mode)
+ROAST_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "brutal_roast": {"type": "string"},
+        "honest_feedback": {"type": "string"},
+        "competitor_reality_check": {"type": "string"},
+        "survival_tips": {"type": "array", "items": {"type": "string"}},
+        "pitch_rewrite": {"type": "string"},
+    },
+    "required": REQUIRED_FIELDS,
+}
+
+# Output token budget per field for targeted regeneration
+FIELD_TOKEN_BUDGETS = {
+    "brutal_roast": 600,
+    "honest_feedback": 500,
+    "competitor_reality_check": 400,
+    "survival_tips": 400,
+    "pitch_rewrite": 300,
+}
+
 
 class RoastService:
     """Service for generating startup roasts using Google Gemini with robust error handling"""
     
     def __init__(self):
-        """Initialize the Gemini client with refined safety settings"""
-        # Configure Gemini API
-        genai.configure(api_key=settings.gemini_api_key)
-        
-        # Initialize the model with generation configuration
-        generation_config = {
-            "temperature": 0.7,  # Slightly more controlled for JSON output
-            "top_p": 0.9,
-            "top_k": 40,
-            "max_output_tokens": 4096,  # Increased for longer responses
+        """Initialize one LLM backend per routed model"""
+        # One backend per route: the primary first, then fallbacks in configured order
+        model_names = [settings.gemini_model] + [
+            name.strip() for name in settings.gemini_fallback_models.split(",") if name.strip()
+        ]
+        if settings.gemini_fast_model:
+            model_names.append(settings.gemini_fast_model)
+        self.router = ModelRouter(
+            [ModelRoute(name, create_backend(name)) for name in dict.fromkeys(model_names)],
+            fast_model=settings.gemini_fast_model or None
+        )
+        
+        # Targeted field regeneration counters
+        self.field_regenerations = 0
+        self.fields_regenerated = 0
+        self.field_regeneration_failures = 0
+        
+        # Parse outcomes and CPU time per response mode
+        self.parse_stats = {
+            mode: {"parsed": 0, "failures": 0, "total_seconds": 0.0}
+            for mode in ("schema", "text")
         }
         
-        # Refined safety settings to allow "Nuclear" roasts while blocking harmful content
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_ONLY_HIGH"  # Allow roast-style mean humor
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH", 
-                "threshold": "BLOCK_ONLY_HIGH"  # Allow sarcasm but block actual hate speech
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"  # Standard blocking
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"  # Block dangerous content
-            }
-        ]
+        # Wall-clock generation time per generation mode
+        self.generation_stats: Dict[str, dict] = {}
         
-        self.model = genai.GenerativeModel(
-            model_name=settings.gemini_model,
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
+        # Hedging state: latency per call kind and hedge outcomes
+        self.latency_trackers: Dict[str, LatencyTracker] = {}
+        self.model_calls = 0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        
+        # Token usage per generation mode, and packed items that needed a single call
+        self.token_stats: Dict[str, dict] = {}
+        self.packed_fallbacks = 0
     
     def _get_roast_tone_instruction(self, roast_level: str) -> str:
         """Get the tone instruction based on roast level"""
@@ -79,9 +134,29 @@ class RoastService:
         }
         return tone_instructions.get(roast_level, tone_instructions["Medium"])
     
+    def _get_field_specs(self, roast_level: str) -> Dict[str, str]:
+        """Get the per-field output instructions shared by all prompt shapes"""
+        return {
+            "brutal_roast": f"Your {roast_level.lower()} roast (max 300 words)",
+            "honest_feedback": "Constructive analysis (max 250 words)",
+            "competitor_reality_check": "Market analysis (max 200 words)",
+            "survival_tips": "Array of exactly 7 short, actionable tips",
+            "pitch_rewrite": "Improved pitch (max 150 words)",
+        }
+    
+    def _build_startup_details(self, request: RoastRequest) -> str:
+        """Build the startup details block shared by all prompt shapes"""
+        return f"""STARTUP DETAILS:
+- Name: {request.startup_name}
+- Idea: {request.idea_description}
+- Target Users: {request.target_users}
+- Budget: {request.budget}
+- Requested Roast Level: {request.roast_level}"""
+    
     def _build_prompt(self, request: RoastRequest) -> str:
         """Build the complete prompt for Gemini"""
         tone_instruction = self._get_roast_tone_instruction(request.roast_level)
+        field_lines = "\n".join(f"- {field}: {spec}" for field, spec in self._get_field_specs(request.roast_level).items())
         
         prompt = f"""
 You are an expert startup advisor and investor with 20+ years of experience. You've seen thousands of startups, 
@@ -89,21 +164,12 @@ from unicorns to spectacular failures. Your job is to analyze this startup idea
 
 TONE INSTRUCTION: {tone_instruction}
 
-STARTUP DETAILS:
-- Name: {request.startup_name}
-- Idea: {request.idea_description}
-- Target Users: {request.target_users}
-- Budget: {request.budget}
-- Requested Roast Level: {request.roast_level}
+{self._build_startup_details(request)}
 
 CRITICAL: You must respond with ONLY a valid JSON object. No markdown, no explanations, just pure JSON.
 
 The JSON must have exactly these fields:
-- brutal_roast: Your {request.roast_level.lower()} roast (max 300 words)
-- honest_feedback: Constructive analysis (max 250 words)
-- competitor_reality_check: Market analysis (max 200 words)
-- survival_tips: Array of exactly 7 short, actionable tips
-- pitch_rewrite: Improved pitch (max 150 words)
+{field_lines}
 
 Keep each field concise to ensure valid JSON output. Reference their specific details: {request.startup_name}, their idea, {request.target_users}, and {request.budget}.
 
@@ -111,6 +177,78 @@ JSON Response:
 """
         return prompt
     
+    def _build_field_prompt(self, request: RoastRequest, fields: List[str]) -> str:
+        """
+        Build a small prompt that asks only for the given fields
+        
+        Args:
+            request: The startup details to analyze
+            fields: The RoastResponse fields to (re)generate
+            
+        Returns:
+            str: Prompt for a targeted generation
+        """
+        tone_instruction = self._get_roast_tone_instruction(request.roast_level)
+        specs = self._get_field_specs(request.roast_level)
+        field_lines = "\n".join(f"- {field}: {specs[field]}" for field in fields)
+        
+        return f"""
+You are an expert startup advisor and investor with 20+ years of experience reviewing this startup.
+
+TONE INSTRUCTION: {tone_instruction}
+
+{self._build_startup_details(request)}
+
+CRITICAL: You must respond with ONLY a valid JSON object. No markdown, no explanations, just pure JSON.
+
+The JSON must have exactly these fields and nothing else:
+{field_lines}
+
+JSON Response:
+"""
+    
+    def _build_packed_prompt(self, requests: List[RoastRequest]) -> str:
+        """
+        Build one prompt that roasts several startups at once
+        
+        The shared instructions and each distinct tone are stated once; only the
+        startup details repeat per item.
+        
+        Args:
+            requests: The startups to roast together
+            
+        Returns:
+            str: Prompt asking for a JSON array with one roast object per startup
+        """
+        levels = sorted({request.roast_level for request in requests})
+        tone_lines = "\n".join(f"{level.upper()}: {' '.join(self._get_roast_tone_instruction(level).split())}" for level in levels)
+        specs = self._get_field_specs("requested")
+        field_lines = "\n".join(f"- {field}: {spec}" for field, spec in specs.items())
+        startups = "\n\n".join(
+            f"STARTUP {index}:\n" + self._build_startup_details(request).split("\n", 1)[1]
+            for index, request in enumerate(requests)
+        )
+        
+        return f"""
+You are an expert startup advisor and investor with 20+ years of experience. You've seen thousands of startups, 
+from unicorns to spectacular failures. Your job is to analyze each startup below independently and provide comprehensive feedback.
+
+TONE INSTRUCTIONS (apply the tone matching each startup's Requested Roast Level):
+{tone_lines}
+
+{startups}
+
+CRITICAL: You must respond with ONLY a valid JSON array of exactly {len(requests)} objects, one per startup, in the same order. No markdown, no explanations, just pure JSON.
+
+Each object must have exactly these fields:
+- index: The startup number shown above
+{field_lines}
+
+Keep each field concise to ensure valid JSON output. Reference each startup's own details, never mix startups up.
+
+JSON Response:
+"""
+    
     def _clean_json_response(self, response_text: str) -> str:
         """
         Robust JSON cleaning to handle various markdown formatting issues
@@ -158,8 +296,7 @@ JSON Response:
         Raises:
             ValueError: If required fields are missing or invalid
         """
-        required_fields = ["brutal_roast", "honest_feedback", "competitor_reality_check", "survival_tips", "pitch_rewrite"]
-        missing_fields = [field for field in required_fields if field not in response_data]
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in response_data]
         
         if missing_fields:
             raise ValueError(f"AI response missing required fields: {missing_fields}")
@@ -189,58 +326,551 @@ JSON Response:
                 tips = tips[:7]
             response_data["survival_tips"] = tips
     
-    @retry(
-        stop=stop_after_attempt(2),  # Retry exactly 1 time (2 total attempts)
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((json.JSONDecodeError, ValueError, ConnectionError)),
-        reraise=True
-    )
-    async def _generate_roast_with_retry(self, prompt: str, startup_name: str) -> dict:
+    def _load_response_json(self, response_text: str, startup_name: str) -> dict:
         """
-        Generate roast content with retry logic for API failures and JSON parsing errors
+        Clean and parse raw model output, repairing it locally if needed
         
         Args:
-            prompt: The formatted prompt for Gemini
+            response_text: Raw text returned by Gemini
+            startup_name: Name of the startup for logging
+            
+        Returns:
+            Parsed (not yet validated) response data
+            
+        Raises:
+            json.JSONDecodeError: If the output is not valid JSON and cannot be repaired
+        """
+        # Clean and parse the JSON response
+        cleaned_response = self._clean_json_response(response_text)
+        
+        try:
+            response_data = json.loads(cleaned_response)
+        except json.JSONDecodeError as e:
+            # Try a local repair before paying for a second generation
+            try:
+                response_data = json.loads(repair_json(response_text))
+                repair_stats.record_repair(success=True)
+                logger.warning(f"Repaired malformed JSON for {startup_name}: {e}")
+            except (json.JSONDecodeError, ValueError):
+                repair_stats.record_repair(success=False)
+                logger.error(f"JSON parsing failed for {startup_name}: {e}")
+                logger.error(f"Raw response: {response_text[:500]}...")
+                logger.error(f"Cleaned response: {cleaned_response[:500]}...")
+                raise e  # This will trigger a retry
+        
+        if not isinstance(response_data, dict):
+            raise ValueError("AI response JSON must be an object")
+        
+        return response_data
+    
+    def _parse_response_text(self, response_text: str, startup_name: str) -> dict:
+        """
+        Clean, parse and validate raw model output
+        
+        Args:
+            response_text: Raw text returned by Gemini
             startup_name: Name of the startup for logging
             
         Returns:
             Parsed and validated response data
             
+        Raises:
+            json.JSONDecodeError: If the output is not valid JSON
+            ValueError: If required fields are missing or invalid
+        """
+        response_data = self._load_response_json(response_text, startup_name)
+        
+        # Validate the response structure
+        self._validate_response_structure(response_data)
+        
+        return response_data
+    
+    def _find_invalid_fields(self, response_data: dict) -> List[str]:
+        """
+        List the fields that are missing or have the wrong type
+        
+        Args:
+            response_data: Parsed JSON response
+            
+        Returns:
+            List of field names that need to be regenerated
+        """
+        invalid_fields = []
+        for field in REQUIRED_FIELDS:
+            value = response_data.get(field)
+            if field == "survival_tips":
+                valid = isinstance(value, list) and len(value) > 0 and all(isinstance(tip, str) and tip.strip() for tip in value)
+            else:
+                valid = isinstance(value, str) and bool(value.strip())
+            if not valid:
+                invalid_fields.append(field)
+        return invalid_fields
+    
+    async def _regenerate_fields(self, request: RoastRequest, response_data: dict, fields: List[str]) -> dict:
+        """
+        Regenerate only the missing or invalid fields and merge them in
+        
+        Args:
+            request: The startup details to analyze
+            response_data: Partially valid response data (kept as-is)
+            fields: The fields to regenerate
+            
+        Returns:
+            The merged response data (validation happens in the caller)
+        """
+        logger.warning(f"Regenerating fields {fields} for {request.startup_name}")
+        self.field_regenerations += 1
+        self.fields_regenerated += len(fields)
+        
+        try:
+            prompt = self._build_field_prompt(request, fields)
+            budget = sum(FIELD_TOKEN_BUDGETS[field] for field in fields)
+            response = await self._call_model(
+                "fields",
+                prompt,
+                generation_config={"max_output_tokens": budget, **self._response_config(fields)},
+                roast_level=request.roast_level
+            )
+            patch = self._load_response_json(response.text, request.startup_name)
+        except Exception as e:
+            # Leave the data as it is; validation in the caller decides whether to retry everything
+            self.field_regeneration_failures += 1
+            logger.error(f"Field regeneration failed for {request.startup_name}: {str(e)}")
+            return response_data
+        
+        for field in fields:
+            if field in patch:
+                response_data[field] = patch[field]
+        return response_data
+    
+    async def _complete_response(self, request: RoastRequest, response_data: dict) -> dict:
+        """
+        Fill in partially bad responses with a targeted regeneration, then validate
+        
+        Args:
+            request: The startup details to analyze
+            response_data: Parsed JSON response
+            
+        Returns:
+            Validated response data
+            
+        Raises:
+            ValueError: If required fields are still missing or invalid
+        """
+        invalid_fields = self._find_invalid_fields(response_data)
+        
+        # A response with nothing usable is cheaper to regenerate as a whole
+        if invalid_fields and len(invalid_fields) < len(REQUIRED_FIELDS):
+            response_data = await self._regenerate_fields(request, response_data, invalid_fields)
+        
+        self._validate_response_structure(response_data)
+        return response_data
+    
+    def _response_config(self, fields: List[str] = REQUIRED_FIELDS) -> dict:
+        """
+        Get the generation config overrides for the configured response mode
+        
+        Args:
+            fields: The RoastResponse fields the generation must produce
+            
+        Returns:
+            dict: JSON mode and response schema in "schema" mode, nothing in "text" mode
+        """
+        if settings.gemini_response_mode != "schema":
+            return {}
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": {
+                "type": "object",
+                "properties": {field: ROAST_RESPONSE_SCHEMA["properties"][field] for field in fields},
+                "required": list(fields),
+            },
+        }
+    
+    def _record_generation(self, mode: str, seconds: float) -> None:
+        """Record the wall-clock time of one successful generation"""
+        stats = self.generation_stats.setdefault(mode, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        stats["count"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+    
+    def _record_usage(self, mode: str, response: Any, roasts: int = 0) -> None:
+        """
+        Record token usage reported by Gemini and the roasts it produced
+        
+        Args:
+            mode: Generation mode the call belongs to
+            response: Gemini response carrying usage_metadata, or None
+            roasts: Number of finished roasts to attribute to the mode
+        """
+        stats = self.token_stats.setdefault(mode, {"roasts": 0, "calls": 0, "prompt_tokens": 0, "output_tokens": 0})
+        stats["roasts"] += roasts
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            stats["calls"] += 1
+            stats["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+            stats["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+    
+    def _record_parse(self, mode: str, success: bool, seconds: float) -> None:
+        """Record the outcome and CPU time of one response parse"""
+        stats = self.parse_stats[mode]
+        stats["parsed" if success else "failures"] += 1
+        stats["total_seconds"] += seconds
+    
+    async def _decode_response(self, response_text: str, request: RoastRequest) -> RoastResponse:
+        """
+        Turn raw model output into a validated RoastResponse
+        
+        In "schema" mode the raw JSON goes straight through pydantic-core in one
+        pass. Anything that fails there, and all "text" mode output, takes the
+        tolerant path: cleaning, local repair, targeted field regeneration and
+        structural validation.
+        
+        Args:
+            response_text: Raw text returned by Gemini
+            request: The startup details being analyzed
+            
+        Returns:
+            RoastResponse: The validated roast
+            
+        Raises:
+            json.JSONDecodeError: If the output cannot be parsed or repaired
+            ValueError: If required fields are still missing or invalid
+        """
+        if settings.gemini_response_mode == "schema":
+            started = time.perf_counter()
+            try:
+                roast_response = RoastResponse.model_validate_json(response_text)
+                if len(roast_response.survival_tips) != 7:
+                    response_data = roast_response.model_dump()
+                    self._validate_response_structure(response_data)
+                    roast_response = RoastResponse(**response_data)
+                self._record_parse("schema", True, time.perf_counter() - started)
+                return roast_response
+            except ValidationError as e:
+                self._record_parse("schema", False, time.perf_counter() - started)
+                logger.warning(f"Schema fast path failed for {request.startup_name}, falling back: {e.error_count()} errors")
+        
+        started = time.perf_counter()
+        try:
+            response_data = self._load_response_json(response_text, request.startup_name)
+        except (json.JSONDecodeError, ValueError):
+            self._record_parse("text", False, time.perf_counter() - started)
+            raise
+        self._record_parse("text", True, time.perf_counter() - started)
+        
+        response_data = await self._complete_response(request, response_data)
+        return RoastResponse(**response_data)
+    
+    @generation_retry
+    async def _generate_roast_with_retry(self, prompt: str, request: RoastRequest) -> RoastResponse:
+        """
+        Generate roast content with retry logic for API failures and JSON parsing errors
+        
+        Args:
+            prompt: The formatted prompt for Gemini
+            request: The startup details being analyzed
+            
+        Returns:
+            RoastResponse: The validated roast
+            
         Raises:
             Various exceptions that will be caught by the retry decorator
         """
+        startup_name = request.startup_name
         logger.info(f"Attempting to generate roast for: {startup_name}")
         
         try:
-            # Generate content using Gemini
-            response = self.model.generate_content(prompt)
+            # Generate content using Gemini on the worker pool so the event loop stays free
+            response = await self._call_model(
+                "full",
+                prompt,
+                generation_config=self._response_config(),
+                roast_level=request.roast_level
+            )
             
             # Check if response was blocked by safety filters
             if not response.text:
                 logger.error(f"Gemini response was blocked for {startup_name}")
                 raise ValueError("Content generation was blocked by safety filters")
             
-            # Clean and parse the JSON response
-            cleaned_response = self._clean_json_response(response.text)
-            
-            try:
-                response_data = json.loads(cleaned_response)
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing failed for {startup_name}: {e}")
-                logger.error(f"Raw response: {response.text[:500]}...")
-                logger.error(f"Cleaned response: {cleaned_response[:500]}...")
-                raise  # This will trigger a retry
-            
-            # Validate the response structure
-            self._validate_response_structure(response_data)
+            self._record_usage("single", response)
+            roast_response = await self._decode_response(response.text, request)
+            self._record_usage("single", None, roasts=1)
             
             logger.info(f"Successfully generated and validated roast for {startup_name}")
-            return response_data
+            return roast_response
             
         except Exception as e:
             logger.error(f"Error in roast generation attempt for {startup_name}: {str(e)}")
             raise  # Re-raise to trigger retry logic
     
+    def _estimate_tokens(self, prompt: str, generation_config: Optional[dict] = None) -> int:
+        """Upper estimate of the tokens a call will use: the prompt plus its output budget"""
+        max_output = (generation_config or {}).get("max_output_tokens", GEMINI_GENERATION_CONFIG["max_output_tokens"])
+        return len(prompt) // 4 + max_output
+    
+    def _used_tokens(self, response: Any, prompt: str) -> int:
+        """Tokens a finished call used, as reported by the provider or estimated from the text"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            return (getattr(usage, "prompt_token_count", 0) or 0) + (getattr(usage, "candidates_token_count", 0) or 0)
+        return (len(prompt) + len(getattr(response, "text", "") or "")) // 4
+    
+    async def _reserve(self, route: ModelRoute, tokens: int) -> None:
+        """Wait for request and token budget on the route's model"""
+        if settings.gemini_rate_limit_enabled:
+            await route.scheduler.acquire(tokens)
+    
+    def _hedge_delay(self, route: ModelRoute, kind: str) -> Optional[float]:
+        """
+        Decide how long to wait before hedging a call of the given kind
+        
+        Returns:
+            float: Seconds to wait, or None if this call should not be hedged
+        """
+        if not settings.gemini_hedge_enabled or generation_pool.queue_depth > 0 or route.scheduler.queue_depth > 0:
+            # Hedging without spare worker capacity or quota would only add load
+            return None
+        tracker = self.latency_trackers.setdefault(f"{route.name}/{kind}", LatencyTracker())
+        if len(tracker) < settings.gemini_hedge_min_samples:
+            return None
+        return max(tracker.percentile(settings.gemini_hedge_percentile), settings.gemini_hedge_min_delay_seconds)
+    
+    async def _call_model(
+        self,
+        kind: str,
+        prompt: str,
+        generation_config: Optional[dict] = None,
+        roast_level: Optional[str] = None
+    ) -> Any:
+        """
+        Call Gemini on the routed model, falling back to the next model on failure
+        
+        Each model has its own circuit breaker; slow calls are hedged on the
+        same model.
+        
+        Args:
+            kind: Call shape (full, fields, section, packed); latency
+                percentiles for hedging are tracked per model and kind
+            prompt: The prompt to send
+            generation_config: Per-call generation config overrides
+            roast_level: Roast level used for routing, if there is a single one
+            
+        Returns:
+            The Gemini response
+            
+        Raises:
+            CircuitOpenError: If every model's breaker is rejecting calls
+        """
+        routes = self.router.candidates(roast_level, overloaded=generation_pool.queue_depth > 0)
+        last_error: Optional[Exception] = None
+        failed_over = False
+        
+        for route in routes:
+            try:
+                route.breaker.before_call()
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            
+            estimated = self._estimate_tokens(prompt, generation_config)
+            calls = 0
+            reserved = 0  # Reservations held by calls that were sent; each is settled on its own
+            
+            async def attempt(route: ModelRoute = route) -> Any:
+                nonlocal calls, reserved
+                calls += 1
+                if calls > 1:
+                    # A hedge is a second real call and needs its own budget
+                    await self._reserve(route, estimated)
+                    reserved += 1
+                return await generation_pool.run(route.backend.generate, prompt, generation_config)
+            
+            try:
+                # Waiting for budget happens after before_call(), so a cancel here must free the probe too
+                await self._reserve(route, estimated)
+                reserved += 1
+                started = time.perf_counter()
+                response, hedged, hedge_won = await hedged_call(attempt, self._hedge_delay(route, kind))
+            except asyncio.CancelledError:
+                route.breaker.record_abandoned()
+                for _ in range(reserved):
+                    route.scheduler.settle(estimated, len(prompt) // 4)
+                raise
+            except Exception as e:
+                route.breaker.record_failure()
+                route.record(None, ok=False)
+                if isinstance(e, ResourceExhausted):
+                    route.scheduler.throttle()
+                else:
+                    for _ in range(reserved):
+                        route.scheduler.settle(estimated, len(prompt) // 4)
+                logger.error(f"Model {route.name} failed: {str(e)}")
+                last_error = e
+                failed_over = True
+                continue
+            
+            elapsed = time.perf_counter() - started
+            route.breaker.record_success()
+            route.record(elapsed, ok=True)
+            # A losing hedge still runs to completion in its worker thread, so it
+            # is charged like the winner
+            for _ in range(reserved):
+                route.scheduler.settle(estimated, self._used_tokens(response, prompt))
+            if failed_over:
+                self.router.record_fallback(route)
+            self.latency_trackers.setdefault(f"{route.name}/{kind}", LatencyTracker()).record(elapsed)
+            self.model_calls += 1
+            if hedged:
+                self.hedges_fired += 1
+                self.hedge_wins += int(hedge_won)
+            return response
+        
+        raise last_error
+    
+    def _user_error_message(self, error: Exception) -> str:
+        """
+        Map a generation failure to a user-friendly message
+        
+        Args:
+            error: The exception raised by the generation pipeline
+            
+        Returns:
+            str: Message safe to show to the user
+        """
+        # Determine the appropriate error message based on the exception type
+        if isinstance(error, CircuitOpenError):
+            return "Our roasting AI is currently unavailable. Please try again shortly."
+        elif "timed out" in str(error).lower():
+            return "Our roasting AI took too long to respond. Please try again in a moment."
+        elif "safety filters" in str(error).lower():
+            return "Content generation was blocked due to safety restrictions. Please try a different startup idea or reduce the roast intensity."
+        elif "json" in str(error).lower():
+            return "AI response formatting error. Our roasting AI is having trouble expressing its thoughts coherently. Please try again."
+        elif "missing" in str(error).lower() or "required fields" in str(error).lower():
+            return "AI response validation failed. The roasting AI didn't provide complete feedback. Please try again."
+        else:
+            return "Our roasting AI is temporarily overwhelmed. Please try again in a moment."
+    
+    async def _generate_section(self, request: RoastRequest, field: str) -> Any:
+        """
+        Generate a single roast section with its own small output budget
+        
+        Args:
+            request: The startup details to analyze
+            field: The RoastResponse field to generate
+            
+        Returns:
+            The field value, or None if the section failed
+        """
+        try:
+            response = await self._call_model(
+                "section",
+                self._build_field_prompt(request, [field]),
+                generation_config={"max_output_tokens": FIELD_TOKEN_BUDGETS[field], **self._response_config([field])},
+                roast_level=request.roast_level
+            )
+            self._record_usage("sectioned", response)
+            return self._load_response_json(response.text, request.startup_name).get(field)
+        except Exception as e:
+            logger.error(f"Section {field} failed for {request.startup_name}: {str(e)}")
+            return None
+    
+    @generation_retry
+    async def _generate_sectioned_with_retry(self, request: RoastRequest) -> RoastResponse:
+        """
+        Generate all roast sections concurrently and assemble them
+        
+        Each section is a separate, smaller generation sharing the startup
+        context, so wall-clock time tracks the slowest section instead of the
+        sum of all five. Failed sections go through targeted field
+        regeneration before validation.
+        
+        Args:
+            request: The startup details being analyzed
+            
+        Returns:
+            RoastResponse: The validated roast
+            
+        Raises:
+            Various exceptions that will be caught by the retry decorator
+        """
+        logger.info(f"Attempting sectioned roast generation for: {request.startup_name}")
+        
+        values = await asyncio.gather(*(self._generate_section(request, field) for field in REQUIRED_FIELDS))
+        response_data = {field: value for field, value in zip(REQUIRED_FIELDS, values) if value is not None}
+        
+        response_data = await self._complete_response(request, response_data)
+        
+        self._record_usage("sectioned", None, roasts=1)
+        logger.info(f"Successfully generated and validated sectioned roast for {request.startup_name}")
+        return RoastResponse(**response_data)
+    
+    async def _generate_and_cache(self, request: RoastRequest, cache_key: str) -> RoastResponse:
+        """
+        Run the full generation pipeline for one request and cache the result
+        
+        Args:
+            request: The startup details to analyze
+            cache_key: Normalized key for the request
+            
+        Returns:
+            RoastResponse: The generated roast and feedback
+        """
+        mode = settings.roast_generation_mode
+        started = time.perf_counter()
+        
+        if mode == "sectioned":
+            roast_response = await self._generate_sectioned_with_retry(request)
+        else:
+            # Build the prompt
+            prompt = self._build_prompt(request)
+            
+            # Generate and validate the roast with retry logic
+            roast_response = await self._generate_roast_with_retry(prompt, request)
+        
+        self._record_generation(mode, time.perf_counter() - started)
+        await self._store_generated(request, cache_key, roast_response)
+        
+        return roast_response
+    
+    async def _store_generated(self, request: RoastRequest, cache_key: str, roast_response: RoastResponse) -> None:
+        """Make a freshly generated roast available to identical and near-identical submissions"""
+        # Only roasts generated for a request count against its quota
+        record_generated_roast()
+        if settings.roast_cache_enabled:
+            await roast_cache.set(cache_key, roast_response)
+        if settings.near_duplicate_enabled:
+            # MinHash and the SQLite write run in a thread to keep the event loop free
+            await asyncio.to_thread(near_duplicate_index.add, request, roast_response)
+    
+    async def _lookup_stored(self, request: RoastRequest, cache_key: str) -> Optional[RoastResponse]:
+        """
+        Find a stored roast for an identical or near-identical submission
+        
+        Args:
+            request: The startup details to analyze
+            cache_key: Normalized key for the request
+            
+        Returns:
+            RoastResponse from the exact-match cache or the near-duplicate index, or None
+        """
+        if settings.roast_cache_enabled:
+            cached_response = await roast_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        
+        if settings.near_duplicate_enabled:
+            reused_response = await asyncio.to_thread(near_duplicate_index.lookup, request)
+            if reused_response is not None:
+                # Later identical submissions become exact cache hits
+                if settings.roast_cache_enabled:
+                    await roast_cache.set(cache_key, reused_response)
+                return reused_response
+        
+        return None
+    
     async def analyze_startup(self, request: RoastRequest) -> RoastResponse:
         """
         Analyze a startup and generate a comprehensive roast with robust error handling
@@ -254,37 +884,323 @@ JSON Response:
         Raises:
             HTTPException: If all retry attempts fail
         """
+        # Serve identical and near-identical submissions without touching Gemini
+        cache_key = request_key(request)
+        cached_response = await self._lookup_stored(request, cache_key)
+        if cached_response is not None:
+            logger.info(f"Serving cached roast for {request.startup_name}")
+            return cached_response
+        
         try:
-            # Build the prompt
-            prompt = self._build_prompt(request)
-            
-            # Generate roast with retry logic
-            response_data = await self._generate_roast_with_retry(prompt, request.startup_name)
-            
-            # Create and validate the final response object
-            roast_response = RoastResponse(**response_data)
+            # Identical requests already in flight (including their retries) share one generation
+            roast_response = await roast_single_flight.do(
+                cache_key,
+                lambda: self._generate_and_cache(request, cache_key)
+            )
             
             logger.info(f"Successfully completed roast analysis for {request.startup_name}")
             return roast_response
             
+        except CircuitOpenError as e:
+            # Fail fast instead of piling up calls that are likely to fail
+            logger.warning(f"Rejected roast for {request.startup_name}: {str(e)}")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to generate startup roast: {self._user_error_message(e)}",
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+        
         except Exception as e:
             # After all retries have failed, raise a user-friendly HTTP exception
             logger.error(f"All retry attempts failed for {request.startup_name}: {str(e)}")
             
-            # Determine the appropriate error message based on the exception type
-            if "safety filters" in str(e).lower():
-                error_msg = "Content generation was blocked due to safety restrictions. Please try a different startup idea or reduce the roast intensity."
-            elif "json" in str(e).lower():
-                error_msg = "AI response formatting error. Our roasting AI is having trouble expressing its thoughts coherently. Please try again."
-            elif "missing" in str(e).lower() or "required fields" in str(e).lower():
-                error_msg = "AI response validation failed. The roasting AI didn't provide complete feedback. Please try again."
-            else:
-                error_msg = "Our roasting AI is temporarily overwhelmed. Please try again in a moment."
-            
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to generate startup roast: {error_msg}"
+                detail=f"Failed to generate startup roast: {self._user_error_message(e)}"
+            )
+
+    def _packed_response_config(self, count: int) -> dict:
+        """Get generation config overrides for a packed call of `count` roasts"""
+        config = {"max_output_tokens": min(count * sum(FIELD_TOKEN_BUDGETS.values()), PACKED_MAX_OUTPUT_TOKENS)}
+        if settings.gemini_response_mode == "schema":
+            item_schema = self._response_config()["response_schema"]
+            config.update({
+                "response_mime_type": "application/json",
+                "response_schema": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"index": {"type": "integer"}, **item_schema["properties"]},
+                        "required": ["index"] + item_schema["required"],
+                    },
+                },
+            })
+        return config
+    
+    async def _generate_packed(self, requests: List[RoastRequest]) -> List[Optional[RoastResponse]]:
+        """
+        Roast several startups with a single model call
+        
+        Args:
+            requests: The startups to roast together
+            
+        Returns:
+            One entry per request: the validated RoastResponse, or None if that
+            item was missing or invalid in the packed output
+        """
+        results: List[Optional[RoastResponse]] = [None] * len(requests)
+        names = ", ".join(request.startup_name for request in requests)
+        levels = {request.roast_level for request in requests}
+        
+        try:
+            response = await self._call_model(
+                "packed",
+                self._build_packed_prompt(requests),
+                generation_config=self._packed_response_config(len(requests)),
+                roast_level=levels.pop() if len(levels) == 1 else None
+            )
+            self._record_usage("packed", response)
+            
+            cleaned = response.text.strip()
+            try:
+                items = json.loads(cleaned)
+            except json.JSONDecodeError:
+                items = json.loads(repair_json(cleaned))
+            if not isinstance(items, list):
+                raise ValueError("Packed response must be a JSON array")
+        except Exception as e:
+            logger.error(f"Packed generation failed for [{names}]: {str(e)}")
+            return results
+        
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            index = item.pop("index", position)
+            if not isinstance(index, int) or not 0 <= index < len(requests) or results[index] is not None:
+                continue
+            if self._find_invalid_fields(item):
+                continue
+            self._validate_response_structure(item)
+            results[index] = RoastResponse(**item)
+        
+        return results
+    
+    async def analyze_startups_packed(self, requests: List[RoastRequest]) -> List[Union[RoastResponse, HTTPException]]:
+        """
+        Roast several small startups in one packed model call
+        
+        Cached items are served from the cache, the rest share one prompt and
+        one JSON-array response. Only items that come back missing or invalid
+        fall back to individual analyze_startup calls.
+        
+        Args:
+            requests: The startups to roast
+            
+        Returns:
+            One entry per request, in order: a RoastResponse or the HTTPException
+            that its individual fallback raised
+        """
+        results: List[Union[RoastResponse, HTTPException, None]] = [None] * len(requests)
+        keys = [request_key(request) for request in requests]
+        
+        for position, key in enumerate(keys):
+            results[position] = await self._lookup_stored(requests[position], key)
+        
+        pending = [position for position, result in enumerate(results) if result is None]
+        if len(pending) > 1:
+            logger.info(f"Packing {len(pending)} startups into one generation")
+            packed = await self._generate_packed([requests[position] for position in pending])
+            for position, roast_response in zip(pending, packed):
+                if roast_response is not None:
+                    results[position] = roast_response
+                    self._record_usage("packed", None, roasts=1)
+                    await self._store_generated(requests[position], keys[position], roast_response)
+        
+        fallbacks = [position for position, result in enumerate(results) if result is None]
+        if fallbacks and len(pending) > 1:
+            # A lone uncached item is generated singly without ever being packed
+            self.packed_fallbacks += len(fallbacks)
+            logger.warning(f"Falling back to single generations for {len(fallbacks)} packed items")
+        if fallbacks:
+            outcomes = await asyncio.gather(
+                *(self.analyze_startup(requests[position]) for position in fallbacks),
+                return_exceptions=True
             )
+            for position, outcome in zip(fallbacks, outcomes):
+                if not isinstance(outcome, (RoastResponse, HTTPException)):
+                    outcome = HTTPException(status_code=500, detail="An unexpected error occurred while processing this roast.")
+                results[position] = outcome
+        
+        return results
+    
+    async def stream_startup(self, request: RoastRequest) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Stream a roast section by section as the model produces it
+        
+        Each RoastResponse field is yielded as a "field" event as soon as its
+        JSON value closes in the token stream; survival tips are yielded one
+        item at a time. The last event is "complete" with the validated
+        RoastResponse, or "error" with a user-friendly message. If the stream
+        fails after some fields were sent, a "reset" event tells the client to
+        discard them before the roast from the regular pipeline follows.
+        
+        Args:
+            request: The startup details to analyze
+            
+        Yields:
+            (event_name, payload) tuples
+        """
+        cache_key = request_key(request)
+        cached_response = await self._lookup_stored(request, cache_key)
+        if cached_response is not None:
+            logger.info(f"Streaming cached roast for {request.startup_name}")
+            for field in TEXT_FIELDS[:3]:
+                yield "field", {"field": field, "value": getattr(cached_response, field)}
+            for index, tip in enumerate(cached_response.survival_tips):
+                yield "field", {"field": LIST_FIELD, "index": index, "value": tip}
+            yield "field", {"field": "pitch_rewrite", "value": cached_response.pitch_rewrite}
+            yield "complete", cached_response.model_dump()
+            return
+        
+        parser = IncrementalRoastParser()
+        fields_sent = False
+        try:
+            logger.info(f"Streaming roast generation for: {request.startup_name}")
+            prompt = self._build_prompt(request)
+            
+            # Streams are not retried mid-way: use the first routed model that
+            # accepts calls and let the fallback below handle failures
+            routes = self.router.candidates(request.roast_level, overloaded=generation_pool.queue_depth > 0)
+            for route in routes:
+                try:
+                    route.breaker.before_call()
+                    break
+                except CircuitOpenError as e:
+                    last_error = e
+            else:
+                raise last_error
+            estimated = self._estimate_tokens(prompt)
+            reserved = False
+            try:
+                await self._reserve(route, estimated)
+                reserved = True
+                started = time.perf_counter()
+                async for chunk in generation_pool.stream(route.backend.stream, prompt, self._response_config()):
+                    for field, index, value in parser.feed(chunk):
+                        payload = {"field": field, "value": value}
+                        if index is not None:
+                            payload["index"] = index
+                        fields_sent = True
+                        yield "field", payload
+            except (asyncio.CancelledError, GeneratorExit):
+                route.breaker.record_abandoned()
+                if reserved:
+                    route.scheduler.settle(estimated, len(prompt) // 4)
+                raise
+            except Exception as e:
+                route.breaker.record_failure()
+                route.record(None, ok=False)
+                if isinstance(e, ResourceExhausted):
+                    route.scheduler.throttle()
+                elif reserved:
+                    route.scheduler.settle(estimated, len(prompt) // 4)
+                raise
+            route.breaker.record_success()
+            route.record(time.perf_counter() - started, ok=True)
+            route.scheduler.settle(estimated, (len(prompt) + len(parser.text)) // 4)
+            
+            if not parser.text:
+                raise ValueError("Content generation was blocked by safety filters")
+            
+            roast_response = await self._decode_response(parser.text, request)
+            await self._store_generated(request, cache_key, roast_response)
+            
+        except Exception as e:
+            # The partial stream is unusable; fall back to the regular pipeline with its retries
+            logger.error(f"Streaming generation failed for {request.startup_name}: {str(e)}")
+            if isinstance(e, json.JSONDecodeError):
+                repair_stats.record_regeneration()
+            if fields_sent:
+                # The fallback writes a different roast; drop what the client already shows
+                yield "reset", {"detail": "The roast stream was interrupted. Starting over."}
+            try:
+                roast_response = await self.analyze_startup(request)
+            except HTTPException as http_error:
+                yield "error", {"detail": http_error.detail}
+                return
+        
+        logger.info(f"Successfully streamed roast for {request.startup_name}")
+        yield "complete", roast_response.model_dump()
+
+    
+    def snapshot(self) -> dict:
+        """
+        Get roast pipeline counters
+        
+        Returns:
+            dict: Call latency, hedging, model routing and breaker state, latency and
+            token usage per generation mode, parse statistics per response mode
+            and fallback/regeneration counters
+        """
+        parsing = {}
+        for mode, stats in self.parse_stats.items():
+            attempts = stats["parsed"] + stats["failures"]
+            parsing[mode] = {
+                "parsed": stats["parsed"],
+                "failures": stats["failures"],
+                "failure_rate": round(stats["failures"] / attempts, 4) if attempts else 0.0,
+                "avg_parse_ms": round(stats["total_seconds"] * 1000 / attempts, 4) if attempts else 0.0,
+            }
+        
+        generation = {
+            mode: {
+                "count": stats["count"],
+                "avg_seconds": round(stats["total_seconds"] / stats["count"], 3),
+                "max_seconds": round(stats["max_seconds"], 3),
+            }
+            for mode, stats in self.generation_stats.items()
+        }
+        
+        tokens = {}
+        for mode, stats in self.token_stats.items():
+            total_tokens = stats["prompt_tokens"] + stats["output_tokens"]
+            tokens[mode] = {
+                "roasts": stats["roasts"],
+                "calls": stats["calls"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "output_tokens": stats["output_tokens"],
+                "tokens_per_roast": round(total_tokens / stats["roasts"], 1) if stats["roasts"] else 0.0,
+            }
+        
+        latency = {
+            kind: {
+                "samples": len(tracker),
+                "p50_seconds": round(tracker.percentile(50) or 0.0, 3),
+                "p95_seconds": round(tracker.percentile(95) or 0.0, 3),
+            }
+            for kind, tracker in self.latency_trackers.items()
+        }
+        
+        return {
+            "generation_mode": settings.roast_generation_mode,
+            "model_calls": self.model_calls,
+            "call_latency": latency,
+            "hedging": {
+                "enabled": settings.gemini_hedge_enabled,
+                "hedges_fired": self.hedges_fired,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedges_fired / self.model_calls, 4) if self.model_calls else 0.0,
+            },
+            "routing": self.router.snapshot(),
+            "tokens": tokens,
+            "packed_fallbacks": self.packed_fallbacks,
+            "generation": generation,
+            "response_mode": settings.gemini_response_mode,
+            "parsing": parsing,
+            "field_regenerations": self.field_regenerations,
+            "fields_regenerated": self.fields_regenerated,
+            "field_regeneration_failures": self.field_regeneration_failures,
+        }
 
 
 # Global service instance
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key (the leader) starts the work as a task; callers
+    arriving while it runs await the same task and receive its result or
+    exception. The task is shielded, so a disconnecting caller never cancels
+    work other callers are waiting on.
+    """
+
+    def __init__(self):
+        """Initialize the in-flight registry and counters"""
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished task from the registry and mark its exception as retrieved"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once per key among concurrent callers
+
+        Args:
+            key: Coalescing key (e.g. the normalized request hash)
+            fn: Zero-argument coroutine factory that performs the work
+
+        Returns:
+            The shared result of fn()
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            logger.info(f"Coalescing request onto in-flight generation ({self._waiters[key]} waiters)")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 1
+            self.leaders += 1
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+
+        try:
+            return await asyncio.shield(task)
+        finally:
+            # Callers that leave early stop counting as waiters; the task keeps running for the rest
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def snapshot(self) -> dict:
+        """
+        Get coalescing counters
+
+        Returns:
+            dict: In-flight keys, current waiters and lifetime counters
+        """
+        return {
+            "in_flight_keys": len(self._calls),
+            "current_waiters": sum(self._waiters.values()),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced,
+            "failures": self.failures,
+        }
+
+
+# Global single-flight group for roast generation
+roast_single_flight = SingleFlight()
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+from app.config.settings import settings
+from app.services.async_db_service import ROAST_LEVELS, async_db_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Retry interval while the counters have not been seeded yet
+SEED_RETRY_SECONDS = 10.0
+
+
+class RoastStats:
+    """
+    In-process roast statistics for /stats.
+
+    Counters are seeded from one grouped count query on start, incremented
+    for every roast the write buffer saves, and reconciled against the
+    database every reconcile_interval_seconds to pick up roasts saved by
+    other worker processes or inserted directly. Reading them never touches
+    the database, so /stats costs the same however large the roasts table
+    grows.
+    """
+
+    def __init__(self, reconcile_interval_seconds: float):
+        """
+        Initialize empty counters
+
+        Args:
+            reconcile_interval_seconds: Time between reconciliations with the database
+        """
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self.total = 0
+        self.levels = Counter({level: 0 for level in ROAST_LEVELS})
+        self.seeded = False
+        self.last_updated: Optional[datetime] = None
+        self.last_reconciled: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Saves recorded while a reconcile query is in flight
+        self._reconciling = False
+        self._delta = Counter()
+
+        # Counters since process start
+        self.reconciliations = 0
+        self.failed_reconciliations = 0
+        self.last_drift = 0
+
+    def record_saved(self, rows: List[dict]) -> None:
+        """
+        Count roasts that were just saved
+
+        Args:
+            rows: The saved roasts table rows
+        """
+        saved = Counter(row.get("roast_level") for row in rows)
+        if self._reconciling:
+            self._delta.update(saved)
+        if not self.seeded:
+            return  # The seed query will include these rows
+        self.total += len(rows)
+        self.levels.update(saved)
+        self.last_updated = datetime.utcnow()
+
+    async def reconcile(self) -> bool:
+        """
+        Replace the counters with fresh database counts
+
+        Saves that complete while the query runs are added on top, so the
+        counters may be off by the few saves in flight until the next run.
+
+        Returns:
+            bool: True if the counts were refreshed
+        """
+        self._reconciling = True
+        self._delta.clear()
+        try:
+            counts = await async_db_service.get_roast_counts()
+        finally:
+            self._reconciling = False
+
+        if counts is None:
+            self.failed_reconciliations += 1
+            return False
+
+        total, levels = counts
+        delta_total = sum(self._delta.values())
+        reconciled_total = total + delta_total
+        if self.seeded:
+            self.last_drift = reconciled_total - self.total
+            if self.last_drift:
+                logger.info(f"Roast stats reconciled with a drift of {self.last_drift:+d} roasts")
+
+        self.total = reconciled_total
+        self.levels = Counter({level: 0 for level in ROAST_LEVELS})
+        self.levels.update(levels)
+        self.levels.update(self._delta)
+        self.seeded = True
+        self.reconciliations += 1
+        self.last_reconciled = self.last_updated = datetime.utcnow()
+        return True
+
+    async def start(self) -> None:
+        """Start seeding and periodic reconciliation in the background"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the reconciliation task"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.reconcile():
+                    logger.info(f"✅ Roast stats reconciled: {self.total} roasts")
+                else:
+                    logger.warning("⚠️ Failed to reconcile roast stats with the database")
+            except Exception as e:
+                self.failed_reconciliations += 1
+                logger.error(f"❌ Roast stats reconciliation failed: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval_seconds if self.seeded else SEED_RETRY_SECONDS)
+
+    def get_stats(self) -> Optional[dict]:
+        """
+        Get roast statistics from memory
+
+        Returns:
+            dict: Total and per-level counts with freshness timestamps, or None
+            if the counters have not been seeded from the database yet
+        """
+        if not self.seeded:
+            return None
+        return {
+            "total_roasts": self.total,
+            "roast_levels": {level: self.levels[level] for level in ROAST_LEVELS},
+            "last_updated": self.last_updated.isoformat(),
+            "last_reconciled": self.last_reconciled.isoformat(),
+        }
+
+    def snapshot(self) -> dict:
+        """
+        Get reconciliation counters
+
+        Returns:
+            dict: Whether the counters are seeded, reconciliation counts and the last drift found
+        """
+        return {
+            "seeded": self.seeded,
+            "reconcile_interval_seconds": self.reconcile_interval_seconds,
+            "reconciliations": self.reconciliations,
+            "failed_reconciliations": self.failed_reconciliations,
+            "last_drift": self.last_drift,
+            "last_reconciled": self.last_reconciled.isoformat() if self.last_reconciled else None,
+        }
+
+
+# Global roast statistics instance
+roast_stats = RoastStats(reconcile_interval_seconds=settings.stats_reconcile_interval_seconds)
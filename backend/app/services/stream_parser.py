@@ -0,0 +1,117 @@
+import json
+from typing import List, Optional, Tuple
+
+# Top-level string fields of RoastResponse, emitted as soon as their value closes
+TEXT_FIELDS = ("brutal_roast", "honest_feedback", "competitor_reality_check", "pitch_rewrite")
+
+# Array field whose items are emitted one by one
+LIST_FIELD = "survival_tips"
+
+
+class IncrementalRoastParser:
+    """
+    Incremental JSON scanner for a streamed roast.
+
+    Text chunks from the model are fed in as they arrive. The scanner tracks
+    string, escape and nesting state across chunk boundaries and reports each
+    RoastResponse field the moment its value closes, without waiting for the
+    whole object. It never validates the document; the complete text is still
+    parsed and validated once the stream ends.
+    """
+
+    def __init__(self):
+        """Initialize the scanner state"""
+        self._buffer: List[str] = []
+        self._started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: List[str] = []
+        self._expecting_key = True
+        self._current_key: Optional[str] = None
+        self._tip_index = 0
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return "".join(self._buffer)
+
+    @staticmethod
+    def _decode(raw: str) -> str:
+        """Decode the body of a JSON string literal, tolerating invalid escapes"""
+        try:
+            return json.loads(f"\"{raw}\"", strict=False)
+        except json.JSONDecodeError:
+            return raw.replace('\\"', '"').replace("\\n", "\n")
+
+    def _on_string(self, raw: str) -> Optional[Tuple[str, Optional[int], str]]:
+        """Handle a completed string literal and return an event if it closes a field"""
+        value = self._decode(raw)
+
+        if len(self._stack) == 1:
+            if self._expecting_key:
+                self._current_key = value
+                return None
+            if self._current_key in TEXT_FIELDS:
+                return (self._current_key, None, value)
+            return None
+
+        if len(self._stack) == 2 and self._stack[-1] == "[" and self._current_key == LIST_FIELD:
+            index = self._tip_index
+            self._tip_index += 1
+            return (LIST_FIELD, index, value)
+
+        return None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Optional[int], str]]:
+        """
+        Feed the next chunk of model output
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            List of (field, index, value) tuples for fields that closed in this
+            chunk; index is the item position for survival_tips, else None
+        """
+        self._buffer.append(chunk)
+        events = []
+
+        for ch in chunk:
+            if not self._started:
+                # Skip markdown fences or prose before the opening brace
+                if ch != "{":
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._string_chars.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._string_chars.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    event = self._on_string("".join(self._string_chars))
+                    if event is not None:
+                        events.append(event)
+                else:
+                    self._string_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif len(self._stack) == 1:
+                if ch == ":":
+                    self._expecting_key = False
+                elif ch == ",":
+                    self._expecting_key = True
+
+        return events
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.async_db_service import async_db_service
+from app.services.db_service import build_roast_record
+from app.services.stats_service import roast_stats
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RoastWriteBuffer:
+    """
+    Write-behind buffer for roast persistence.
+
+    Request handlers enqueue finished roasts and return immediately. A
+    background task saves them to Supabase as bulk inserts, as soon as a full
+    batch is waiting or after at most flush_interval_seconds. If an insert
+    fails, the batch and everything still buffered are appended to a local
+    JSONL spill file. The spill file is replayed into Supabase once inserts
+    succeed again, and at most every replay_interval_seconds while they keep
+    failing. Stopping the buffer flushes what is left. Delivery is at least
+    once: a crash during a replay can insert some spilled roasts twice.
+    """
+
+    def __init__(self, batch_size: int, flush_interval_seconds: float, max_buffer: int,
+                 spill_path: str, replay_interval_seconds: float):
+        """
+        Initialize the buffer
+
+        Args:
+            batch_size: Roasts per bulk insert
+            flush_interval_seconds: Longest a roast waits in memory before a flush
+            max_buffer: Roasts held in memory before new ones go straight to the spill file
+            spill_path: Append-only JSONL file for roasts that could not be saved
+            replay_interval_seconds: Minimum time between replay attempts after a failure
+        """
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.replay_path = spill_path + ".replaying"
+        self.replay_interval_seconds = replay_interval_seconds
+
+        self._pending: Deque[dict] = deque()
+        self._spill_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._next_replay = 0.0
+
+        # Counters since process start
+        self.enqueued = 0
+        self.saved = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.flush_seconds = 0.0
+
+    def enqueue(self, request: RoastRequest, response: RoastResponse) -> None:
+        """
+        Queue a roast for persistence without waiting for the database
+
+        Args:
+            request: The original roast request
+            response: The generated roast response
+        """
+        record = build_roast_record(request, response)
+        self.enqueued += 1
+        if len(self._pending) >= self.max_buffer:
+            logger.warning(f"⚠️ Roast write buffer full; spilling roast for {request.startup_name} to disk")
+            self._spill([record])
+            return
+
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the background flush task"""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        spilled = self._spill_bytes()
+        if spilled:
+            logger.warning(f"⚠️ Found {spilled} bytes of spilled roasts at {self.spill_path}; replaying in the background")
+        logger.info(f"✅ Roast write buffer started (batch {self.batch_size}, every {self.flush_interval_seconds:g}s)")
+
+    async def stop(self) -> None:
+        """Flush buffered roasts and stop the background task"""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        else:
+            await self._flush_pending()
+        if self._pending:
+            self._spill(list(self._pending))
+            self._pending.clear()
+
+    async def _run(self) -> None:
+        """Flush loop: wake on a full batch or the flush interval, flush, then retry spilled roasts"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                if await self._flush_pending() and not self._stopping:
+                    await self._replay_spilled()
+            except Exception as e:
+                logger.error(f"❌ Roast write buffer flush failed: {str(e)}")
+
+        await self._flush_pending()
+
+    async def _insert(self, rows: List[dict]) -> bool:
+        """Bulk insert rows through the pooled async client"""
+        started = time.perf_counter()
+        result = await async_db_service.insert_roast_records(rows)
+        self.flush_seconds += time.perf_counter() - started
+        self.flushes += 1
+        if result is None:
+            self.failed_flushes += 1
+            self._next_replay = time.monotonic() + self.replay_interval_seconds
+            return False
+        roast_stats.record_saved(rows)
+        return True
+
+    async def _flush_pending(self) -> bool:
+        """
+        Save everything buffered in batches
+
+        Returns:
+            bool: False if an insert failed (the remaining roasts were spilled)
+        """
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if not await self._insert(batch):
+                # The database is unavailable: park this batch and the backlog on disk
+                batch.extend(self._pending)
+                self._pending.clear()
+                logger.warning(f"⚠️ Spilling {len(batch)} roasts to {self.spill_path} until the database recovers")
+                self._spill(batch)
+                return False
+            self.saved += len(batch)
+        return True
+
+    def _spill(self, rows: List[dict], requeue: bool = False) -> None:
+        """Append rows to the spill file; they are only lost if the disk write fails too"""
+        try:
+            with self._spill_lock:
+                directory = os.path.dirname(self.spill_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                    for row in rows:
+                        spill_file.write(json.dumps(row) + "\n")
+            if not requeue:
+                self.spilled += len(rows)
+        except Exception as e:
+            logger.error(f"❌ Failed to spill {len(rows)} roasts to {self.spill_path}; they are lost: {str(e)}")
+
+    def _spill_bytes(self) -> int:
+        """Size of the spilled roasts still waiting for replay"""
+        return sum(os.path.getsize(path) for path in (self.spill_path, self.replay_path) if os.path.exists(path))
+
+    def _claim_spilled(self) -> List[dict]:
+        """Move the spill file aside and read it; a leftover file from an interrupted replay is read first"""
+        with self._spill_lock:
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.spill_path):
+                    return []
+                os.replace(self.spill_path, self.replay_path)
+
+        rows = []
+        with open(self.replay_path, encoding="utf-8") as replay_file:
+            for number, line in enumerate(replay_file, start=1):
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Skipped corrupt line {number} of {self.replay_path}")
+        return rows
+
+    async def _replay_spilled(self) -> None:
+        """Insert spilled roasts; whatever fails goes back into the spill file"""
+        if time.monotonic() < self._next_replay or not self._spill_bytes():
+            return
+
+        rows = await asyncio.to_thread(self._claim_spilled)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if not await self._insert(batch):
+                self._spill(rows[start:], requeue=True)
+                break
+            self.replayed += len(batch)
+        else:
+            if rows:
+                logger.info(f"✅ Replayed {len(rows)} spilled roasts into the database")
+        if os.path.exists(self.replay_path):
+            os.remove(self.replay_path)
+
+    def snapshot(self) -> dict:
+        """
+        Get buffer gauges and counters
+
+        Returns:
+            dict: Buffered roasts, spill file size, saved/spilled/replayed counts and average flush time
+        """
+        return {
+            "pending": len(self._pending),
+            "spill_bytes": self._spill_bytes(),
+            "enqueued": self.enqueued,
+            "saved": self.saved,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "avg_flush_ms": round(self.flush_seconds / self.flushes * 1000, 2) if self.flushes else 0.0,
+        }
+
+
+# Global roast write buffer instance
+roast_write_buffer = RoastWriteBuffer(
+    batch_size=settings.persistence_batch_size,
+    flush_interval_seconds=settings.persistence_flush_interval_seconds,
+    max_buffer=settings.persistence_max_buffer,
+    spill_path=settings.persistence_spill_path,
+    replay_interval_seconds=settings.persistence_replay_interval_seconds
+)
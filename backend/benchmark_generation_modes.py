@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-shot vs. sectioned roast generation latency.
+
+Runs the same startups through RoastService in both generation modes with the
+cache disabled and prints wall-clock latency percentiles per mode.
+
+Usage:
+    python benchmark_generation_modes.py [--runs 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest
+from app.services.roast_service import roast_service
+
+STARTUPS = [
+    RoastRequest(
+        startup_name="PetRock 2.0",
+        idea_description="AI-powered rocks that provide emotional support to busy professionals",
+        target_users="Millennials who want pets but can't commit to real animals",
+        budget="$50k",
+        roast_level="Nuclear"
+    ),
+    RoastRequest(
+        startup_name="EcoFriendly",
+        idea_description="A sustainable packaging solution for e-commerce brands",
+        target_users="Environmentally conscious online retailers",
+        budget="$25k",
+        roast_level="Soft"
+    ),
+    RoastRequest(
+        startup_name="MeetingMind",
+        idea_description="An assistant that joins your meetings and summarizes them into action items",
+        target_users="Managers at mid-size software companies",
+        budget="$200k",
+        roast_level="Medium"
+    ),
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def benchmark_mode(mode: str, runs: int) -> list:
+    """Time every startup `runs` times in the given generation mode"""
+    settings.roast_generation_mode = mode
+    latencies = []
+
+    for run in range(runs):
+        for request in STARTUPS:
+            started = time.perf_counter()
+            try:
+                await roast_service.analyze_startup(request)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                print(f"❌ {mode} run {run + 1} for {request.startup_name} failed: {str(e)}")
+
+    return latencies
+
+
+async def main(runs: int):
+    """Benchmark both modes and print a comparison"""
+    settings.roast_cache_enabled = False
+    settings.near_duplicate_enabled = False
+
+    print(f"⏱️  Benchmarking generation modes with {settings.gemini_model} ({runs} runs x {len(STARTUPS)} startups)")
+    print("=" * 60)
+
+    for mode in ("single", "sectioned"):
+        latencies = await benchmark_mode(mode, runs)
+        if not latencies:
+            print(f"{mode:>10}: no successful runs")
+            continue
+        print(
+            f"{mode:>10}: n={len(latencies)} "
+            f"mean={statistics.mean(latencies):.2f}s "
+            f"p50={percentile(latencies, 50):.2f}s "
+            f"p95={percentile(latencies, 95):.2f}s "
+            f"max={max(latencies):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions per startup and mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
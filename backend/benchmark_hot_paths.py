@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the CPU-side hot paths of a roast request.
+
+Times prompt building, response cleaning, JSON parsing and repair, structure
+validation, RoastResponse construction, streaming parse, database record
+assembly and near-duplicate signatures over realistic payloads (normal, large and malformed model output),
+and compares each against a stored baseline. The script exits non-zero if
+any benchmark is slower than its baseline by more than --threshold.
+
+Baselines are machine-specific: refresh them with --update-baseline on the
+machine that runs the comparison. No API key or network access is needed.
+
+Usage:
+    python benchmark_hot_paths.py
+    python benchmark_hot_paths.py --filter parse --threshold 0.5
+    python benchmark_hot_paths.py --update-baseline
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.cache_service import request_key
+from app.services.db_service import build_roast_record
+from app.services.json_repair import repair_json
+from app.services.llm_backend import FakeBackend
+from app.services.near_duplicate import signature
+from app.services.roast_service import roast_service
+from app.services.stream_parser import IncrementalRoastParser
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+REQUEST = RoastRequest(
+    startup_name="PetRock 2.0",
+    idea_description="We're revolutionizing the pet industry with AI-powered rocks that provide emotional support to busy professionals",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+PACKED_REQUESTS = [REQUEST.model_copy(update={"startup_name": f"PetRock {i}"}) for i in range(4)]
+
+# Realistic model output from the deterministic fake backend
+_FAKE = FakeBackend("benchmark", latency_ms=0, latency_sigma=0, chunk_chars=40, failure_rate=0, malformed_rate=0, seed=1)
+RAW_RESPONSE = _FAKE.generate(roast_service._build_prompt(REQUEST), {"response_mime_type": "application/json"}).text
+FENCED_RESPONSE = "Here is the roast:\n```json\n" + RAW_RESPONSE + "\n```\n"
+RESPONSE_DATA = json.loads(RAW_RESPONSE)
+
+# A response near the output token limit
+_LARGE_DATA = dict(RESPONSE_DATA, **{
+    field: " ".join([RESPONSE_DATA[field]] * 4)
+    for field in ("brutal_roast", "honest_feedback", "competitor_reality_check", "pitch_rewrite")
+})
+LARGE_RESPONSE = json.dumps(_LARGE_DATA)
+
+# Malformed output: unescaped quotes, a trailing comma and truncation mid-string
+MALFORMED_RESPONSE = (
+    RAW_RESPONSE.replace("Your", 'Your "so-called"', 1).replace('"], ', '",], ', 1)[:int(len(RAW_RESPONSE) * 0.9)]
+)
+
+# A submission at the schema's length limits (2000 / 500 characters)
+MAX_IDEA = " ".join([REQUEST.idea_description] * 20)[:2000]
+MAX_TARGET_USERS = " ".join([REQUEST.target_users] * 10)[:500]
+
+STREAM_CHUNKS = [RAW_RESPONSE[i:i + 40] for i in range(0, len(RAW_RESPONSE), 40)]
+
+
+def parse_stream():
+    parser = IncrementalRoastParser()
+    for chunk in STREAM_CHUNKS:
+        parser.feed(chunk)
+
+
+# name -> zero-argument callable
+BENCHMARKS = {
+    "tone_instruction": lambda: roast_service._get_roast_tone_instruction("Nuclear"),
+    "build_prompt": lambda: roast_service._build_prompt(REQUEST),
+    "build_field_prompt": lambda: roast_service._build_field_prompt(REQUEST, ["survival_tips", "pitch_rewrite"]),
+    "build_packed_prompt_4": lambda: roast_service._build_packed_prompt(PACKED_REQUESTS),
+    "request_key": lambda: request_key(REQUEST),
+    "clean_json_response": lambda: roast_service._clean_json_response(FENCED_RESPONSE),
+    "clean_json_response_large": lambda: roast_service._clean_json_response(LARGE_RESPONSE),
+    "json_loads": lambda: json.loads(RAW_RESPONSE),
+    "json_loads_large": lambda: json.loads(LARGE_RESPONSE),
+    "parse_response_text": lambda: roast_service._parse_response_text(FENCED_RESPONSE, REQUEST.startup_name),
+    "parse_response_text_malformed": lambda: roast_service._load_response_json(MALFORMED_RESPONSE, REQUEST.startup_name),
+    "repair_json_malformed": lambda: repair_json(MALFORMED_RESPONSE),
+    "validate_response_structure": lambda: roast_service._validate_response_structure(dict(RESPONSE_DATA)),
+    "roast_response_construct": lambda: RoastResponse(**RESPONSE_DATA),
+    "roast_response_validate_json": lambda: RoastResponse.model_validate_json(RAW_RESPONSE),
+    "roast_response_validate_json_large": lambda: RoastResponse.model_validate_json(LARGE_RESPONSE),
+    "stream_parse": parse_stream,
+    "build_roast_record": lambda: build_roast_record(REQUEST, RoastResponse(**RESPONSE_DATA)),
+    "near_duplicate_signature": lambda: signature(REQUEST.startup_name, REQUEST.idea_description, REQUEST.target_users),
+    "near_duplicate_signature_max": lambda: signature(REQUEST.startup_name, MAX_IDEA, MAX_TARGET_USERS),
+}
+
+
+def measure(fn, min_seconds: float, repeats: int) -> float:
+    """
+    Time a callable
+
+    Calibrates an iteration count that runs for at least min_seconds, then
+    takes the median of `repeats` timed batches.
+
+    Returns:
+        float: Median microseconds per call
+    """
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - started >= min_seconds / 10:
+            break
+        iterations *= 2
+    iterations = max(1, int(iterations * min_seconds / max(time.perf_counter() - started, 1e-9)))
+
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(samples)
+
+
+def main(args) -> int:
+    # Repair and fallback paths log warnings on every call; keep the output readable
+    logging.disable(logging.WARNING)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["benchmarks_us"]
+
+    results = {}
+    regressions = []
+    print(f"⏱️  Running {len(BENCHMARKS)} microbenchmarks (threshold {args.threshold:.0%})")
+    print(f"{'benchmark':>36} {'µs/call':>10} {'baseline':>10} {'change':>8}")
+    for name, fn in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        micros = measure(fn, args.min_seconds, args.repeats)
+        results[name] = round(micros, 3)
+
+        before = baseline.get(name)
+        if before:
+            change = micros / before - 1
+            regressed = change > args.threshold
+            if regressed:
+                regressions.append(name)
+            print(f"{'❌' if regressed else '✅'} {name:>33} {micros:>10.2f} {before:>10.2f} {change:>+8.1%}")
+        else:
+            print(f"🆕 {name:>33} {micros:>10.2f} {'-':>10} {'-':>8}")
+
+    if args.update_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"python": sys.version.split()[0], "benchmarks_us": merged}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"💾 Baseline updated at {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("🎉 No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before failing")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum timed seconds per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per benchmark (median is reported)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,18 @@
+"""
+Shared pytest setup for the backend test scripts.
+
+Loading app settings requires GEMINI_API_KEY unless another LLM backend is
+selected. Most test scripts only exercise services around the model (queues,
+caches, persistence, health checks) and never call it, so without a key they
+run against the local fake backend; set LLM_BACKEND or GEMINI_API_KEY to
+override. Supabase settings (SUPABASE_URL, SUPABASE_KEY) must still be present
+in the environment, but no test here connects to them.
+
+When running a test script directly instead of through pytest, export
+LLM_BACKEND=fake yourself.
+"""
+
+import os
+
+if not os.environ.get("GEMINI_API_KEY"):
+    os.environ.setdefault("LLM_BACKEND", "fake")
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Load-generation harness for the RoastMyStartup API.
+
+Drives /roast, /roast/stream, /stats and /health with a weighted request mix,
+either open-loop at a target request rate (--rps) or closed-loop with a fixed
+number of concurrent clients (--concurrency), and reports throughput,
+p50/p95/p99 latency, error rates and event-loop lag.
+
+By default the app runs in-process (httpx ASGI transport) with the fake LLM
+backend and an in-memory stand-in for Supabase, so no API key, database or
+network is needed and the event-loop lag measured is the app's own. With
+--base-url the harness targets a running server instead; lag is then the
+harness's own loop, which tells you whether the client kept up.
+
+Results are written as JSON (--output). With --compare, p95 latency and error
+rate are checked against an earlier result file and the script exits non-zero
+on a regression beyond --max-regression.
+
+Usage:
+    python load_test.py --rps 20 --duration 30 --output results.json
+    python load_test.py --concurrency 50 --mix roast=1 --llm-latency-ms 2000
+    python load_test.py --base-url http://localhost:8000 --rps 5 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+ENDPOINTS = ("roast", "stream", "stats", "health")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a weighted endpoint mix such as 'roast=6,stream=2,stats=1,health=1'"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in --mix; expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class InMemoryDatabase:
+    """
+    Stand-in for AsyncDatabaseService backed by a list.
+
+    Calls wait --db-latency-ms without blocking the event loop, like the
+    pooled async Supabase client does.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.rows: List[dict] = []
+
+    async def insert_roast_records(self, records) -> Optional[List[dict]]:
+        await asyncio.sleep(self.latency)
+        rows = []
+        for record in records:
+            rows.append(dict(record, id=len(self.rows) + 1))
+            self.rows.append(rows[-1])
+        return rows
+
+    async def get_roast_counts(self) -> Optional[Tuple[int, Dict[str, int]]]:
+        await asyncio.sleep(self.latency)
+        levels: Dict[str, int] = {}
+        for row in self.rows:
+            levels[row["roast_level"]] = levels.get(row["roast_level"], 0) + 1
+        return len(self.rows), levels
+
+    async def health_check(self) -> bool:
+        await asyncio.sleep(self.latency)
+        return True
+
+
+def build_in_process_app(args):
+    """Import the app with the fake LLM backend and the in-memory database"""
+    data_dir = tempfile.mkdtemp(prefix="roast-load-")
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_FAILURE_RATE": str(args.llm_failure_rate),
+        "FAKE_LLM_MALFORMED_RATE": str(args.llm_malformed_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "JOB_QUEUE_DB_PATH": os.path.join(data_dir, "roast_jobs.db"),
+        "PERSISTENCE_SPILL_PATH": os.path.join(data_dir, "roast_spill.jsonl"),
+        # Every simulated client shares one IP; per-IP quotas would reject most of the run
+        "QUOTA_ENABLED": "False",
+    })
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "load-test")
+
+    from app.main import app
+    from app.services.async_db_service import async_db_service
+
+    database = InMemoryDatabase(args.db_latency_ms)
+    for name in ("insert_roast_records", "get_roast_counts", "health_check"):
+        setattr(async_db_service, name, getattr(database, name))
+    return app
+
+
+IDEA_WORDS = (
+    "ai", "blockchain", "marketplace", "subscription", "platform", "app", "pets", "restaurants", "invoices",
+    "fitness", "students", "farmers", "drones", "recipes", "podcasts", "crypto", "dating", "travel", "sneakers",
+    "plants", "lawyers", "dentists", "robots", "coffee", "parking", "laundry", "tutoring", "insurance", "gaming",
+    "weddings", "freelancers", "solar", "vr", "payroll", "recruiting", "groceries", "furniture", "music",
+)
+
+
+def make_roast_payload(rng: random.Random, unique_ratio: float, sequence: int) -> dict:
+    """Build a roast request; a share of requests repeat earlier startups (cache hits)"""
+    number = sequence if rng.random() < unique_ratio else rng.randrange(max(1, sequence // 10 + 1))
+    # Distinct startups get distinct wording so they are not near-duplicates of each other
+    words = random.Random(number).sample(IDEA_WORDS, 8)
+    return {
+        "startup_name": f"LoadTest {number}",
+        "idea_description": f"An {' '.join(words[:4])} startup that connects {' and '.join(words[4:])} to help small teams ship faster",
+        "target_users": "Engineering managers at small software companies",
+        "budget": f"${10 + number % 90}k",
+        "roast_level": ("Soft", "Medium", "Nuclear")[number % 3],
+    }
+
+
+class LoadRun:
+    """Collects per-request results and event-loop lag for one run"""
+
+    def __init__(self, client: httpx.AsyncClient, weights: Dict[str, float], args):
+        self.client = client
+        self.names = list(weights)
+        self.weights = list(weights.values())
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.sequence = 0
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.first_bytes: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.loop_lag: List[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def one_request(self) -> None:
+        """Send one request drawn from the mix and record its outcome"""
+        name = self.rng.choices(self.names, self.weights)[0]
+        self.sequence += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        first_byte = None
+        status = "error"
+
+        try:
+            if name in ("roast", "stream"):
+                payload = make_roast_payload(self.rng, self.args.unique_ratio, self.sequence)
+                path = "/roast" if name == "roast" else "/roast/stream"
+                request = self.client.build_request("POST", path, json=payload)
+            else:
+                request = self.client.build_request("GET", f"/{name}")
+
+            response = await self.client.send(request, stream=True)
+            try:
+                body = b""
+                async for chunk in response.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                    body += chunk
+            finally:
+                await response.aclose()
+
+            status = str(response.status_code)
+            if name == "stream" and response.status_code == 200 and b"event: error" in body:
+                status = "stream_error"
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight -= 1
+
+        if self.recording:
+            self.latencies[name].append(time.perf_counter() - started)
+            if first_byte is not None:
+                self.first_bytes[name].append(first_byte)
+            self.statuses[name][status] += 1
+
+    async def monitor_loop_lag(self, interval: float = 0.01) -> None:
+        """Measure how late the event loop wakes a sleeping task"""
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            if self.recording:
+                self.loop_lag.append(max(0.0, time.perf_counter() - expected))
+
+    async def open_loop(self, seconds: float) -> None:
+        """Start requests at a fixed rate regardless of how fast they finish"""
+        tasks = set()
+        interval = 1 / self.args.rps
+        next_start = time.perf_counter()
+        deadline = next_start + seconds
+        while next_start < deadline:
+            if self.in_flight < self.args.max_in_flight:
+                task = asyncio.ensure_future(self.one_request())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_start += interval
+            await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def closed_loop(self, seconds: float) -> None:
+        """Keep a fixed number of clients busy, each sending back to back"""
+        deadline = time.perf_counter() + seconds
+
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                await self.one_request()
+
+        await asyncio.gather(*(client_loop() for _ in range(self.args.concurrency)))
+
+    async def run(self) -> float:
+        """Run warmup then the measured phase; returns the measured wall time"""
+        drive = self.open_loop if self.args.rps else self.closed_loop
+        monitor = asyncio.ensure_future(self.monitor_loop_lag())
+        try:
+            if self.args.warmup > 0:
+                await drive(self.args.warmup)
+            self.recording = True
+            started = time.perf_counter()
+            await drive(self.args.duration)
+            return time.perf_counter() - started
+        finally:
+            self.recording = False
+            monitor.cancel()
+
+    def summary(self, elapsed: float) -> dict:
+        """Summarize the measured phase"""
+
+        def latency_stats(values: List[float]) -> dict:
+            return {
+                f"p{pct}_ms": round(percentile(values, pct) * 1000, 2) if values else None
+                for pct in (50, 95, 99)
+            } | {"max_ms": round(max(values) * 1000, 2) if values else None}
+
+        endpoints = {}
+        all_latencies = []
+        total_requests = total_errors = 0
+        for name in self.names:
+            latencies = self.latencies[name]
+            statuses = dict(self.statuses[name])
+            errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+            total_requests += len(latencies)
+            total_errors += errors
+            all_latencies.extend(latencies)
+            endpoints[name] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+                "statuses": statuses,
+                "latency": latency_stats(latencies),
+                "first_byte": latency_stats(self.first_bytes[name]),
+            }
+
+        return {
+            "duration_seconds": round(elapsed, 2),
+            "requests": total_requests,
+            "throughput_rps": round(total_requests / elapsed, 2),
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+            "latency": latency_stats(all_latencies),
+            "max_in_flight": self.max_in_flight,
+            "event_loop_lag": latency_stats(self.loop_lag),
+            "endpoints": endpoints,
+        }
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the working tree, if it is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict) -> None:
+    """Print a human-readable summary"""
+    summary = result["summary"]
+    print("=" * 72)
+    print(
+        f"⏱️  {summary['requests']} requests in {summary['duration_seconds']}s "
+        f"({summary['throughput_rps']} req/s), error rate {summary['error_rate']:.2%}, "
+        f"max in flight {summary['max_in_flight']}"
+    )
+    print(f"{'endpoint':>10} {'reqs':>6} {'rps':>7} {'err':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in summary["endpoints"].items():
+        latency = stats["latency"]
+        print(
+            f"{name:>10} {stats['requests']:>6} {stats['throughput_rps']:>7} {stats['error_rate']:>7.2%} "
+            f"{latency['p50_ms'] or 0:>9.1f} {latency['p95_ms'] or 0:>9.1f} {latency['p99_ms'] or 0:>9.1f}"
+        )
+    lag = summary["event_loop_lag"]
+    print(f"🔁 Event-loop lag: p50={lag['p50_ms']}ms p99={lag['p99_ms']}ms max={lag['max_ms']}ms")
+
+
+def compare(result: dict, baseline_path: str, max_regression: float) -> bool:
+    """
+    Compare a result against an earlier run
+
+    Returns:
+        bool: True if no endpoint's p95 latency or error rate regressed beyond the threshold
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["summary"]["endpoints"]
+
+    ok = True
+    print(f"📊 Comparing against {baseline_path} (max regression {max_regression:.0%})")
+    for name, stats in result["summary"]["endpoints"].items():
+        before = baseline.get(name)
+        if not before or not before["latency"]["p95_ms"] or not stats["latency"]["p95_ms"]:
+            continue
+        change = stats["latency"]["p95_ms"] / before["latency"]["p95_ms"] - 1
+        error_increase = stats["error_rate"] - before["error_rate"]
+        regressed = change > max_regression or error_increase > 0.01
+        ok = ok and not regressed
+        print(
+            f"{'❌' if regressed else '✅'} {name:>8}: p95 {before['latency']['p95_ms']}ms -> "
+            f"{stats['latency']['p95_ms']}ms ({change:+.1%}), error rate "
+            f"{before['error_rate']:.2%} -> {stats['error_rate']:.2%}"
+        )
+    return ok
+
+
+async def main(args) -> int:
+    weights = parse_mix(args.mix)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits)
+        app = None
+    else:
+        app = build_in_process_app(args)
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=timeout)
+
+    mode = f"open-loop at {args.rps} req/s" if args.rps else f"closed-loop with {args.concurrency} clients"
+    target = args.base_url or f"in-process app (fake LLM {args.llm_latency_ms}ms, in-memory DB {args.db_latency_ms}ms)"
+    print(f"🚀 Load test against {target}, {mode}, {args.duration}s (+{args.warmup}s warmup)")
+
+    try:
+        load_run = LoadRun(client, weights, args)
+        elapsed = await load_run.run()
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    result = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "summary": load_run.summary(elapsed),
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.compare and not compare(result, args.compare, args.max_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, help="Open-loop target request rate")
+    load.add_argument("--concurrency", type=int, default=10, help="Closed-loop concurrent clients (default: 10)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured warmup seconds")
+    parser.add_argument("--mix", default="roast=6,stream=2,stats=1,health=1", help="Weighted endpoint mix")
+    parser.add_argument("--unique-ratio", type=float, default=1.0, help="Share of roast requests for new startups (the rest may hit the cache)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500, help="In-process fake LLM median latency")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="In-process fake LLM failure rate")
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="In-process fake LLM malformed-JSON rate")
+    parser.add_argument("--db-latency-ms", type=float, default=30, help="In-process stand-in database latency per call")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the request mix and fake LLM")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier result file to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative p95 increase for --compare")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args)))
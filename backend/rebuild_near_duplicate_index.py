@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Rebuild the near-duplicate roast index from the Supabase roasts table.
+
+Pages through every stored roast in id order and replaces the contents of
+the index at NEAR_DUPLICATE_DB_PATH, so reuse works for submissions made
+before the index existed or after the index file was lost. Run it while the
+API is stopped; a running server only loads the index on start.
+
+Usage:
+    python rebuild_near_duplicate_index.py
+    python rebuild_near_duplicate_index.py --page-size 500
+"""
+
+import argparse
+import sys
+import time
+
+from app.config.settings import settings
+from app.services.db_service import db_service
+from app.services.near_duplicate import near_duplicate_index
+
+
+def iter_roasts(page_size: int):
+    """Yield every roast in the table, one page at a time"""
+    after_id = 0
+    while True:
+        page = db_service.get_roasts_page(after_id=after_id, limit=page_size)
+        if page is None:
+            raise RuntimeError(f"Failed to fetch roasts after id {after_id}")
+        if not page:
+            return
+        yield from page
+        after_id = page[-1]["id"]
+        print(f"   fetched roasts up to id {after_id}")
+
+
+def main(args) -> int:
+    if not settings.near_duplicate_db_path:
+        print("❌ NEAR_DUPLICATE_DB_PATH is not set; an in-memory index would be lost on exit")
+        return 1
+
+    print(f"🔁 Rebuilding near-duplicate index at {settings.near_duplicate_db_path}")
+    started = time.perf_counter()
+    try:
+        indexed = near_duplicate_index.rebuild(iter_roasts(args.page_size))
+    except RuntimeError as e:
+        print(f"❌ {str(e)}")
+        return 1
+    print(f"✅ Indexed {indexed} roasts in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=1000, help="Roasts fetched per query")
+    args = parser.parse_args()
+    sys.exit(main(args))
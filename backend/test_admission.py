@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for bounded admission of roast requests.
+
+Fills an AdmissionController with held slots and checks what happens to the
+requests behind them: waiters are admitted in FIFO order as slots free up,
+a full queue sheds new requests with 429 straight away, a request that
+waits too long is shed with 503, and both carry a Retry-After derived from
+the queue length and the average service time. Also checks that a client
+cancelled while queued gives up its place without leaking a slot, and that
+/roast/batch is shed like /roast and frees its slot once the batch is sent.
+"""
+
+import asyncio
+import json
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.config.settings import settings
+from app.main import app
+from app.services.admission import AdmissionController, roast_admission
+
+
+def test_waiters_are_admitted_in_order():
+    """Requests beyond max_active wait and get freed slots oldest first"""
+    async def run():
+        controller = AdmissionController(max_active=2, max_queue=5, max_wait_seconds=5)
+        await controller.acquire()
+        await controller.acquire()
+        admitted = []
+
+        async def wait_turn(name):
+            await controller.acquire()
+            admitted.append(name)
+
+        waiters = [asyncio.ensure_future(wait_turn(name)) for name in ("first", "second")]
+        await asyncio.sleep(0.01)
+        assert controller.snapshot()["queue_depth"] == 2 and admitted == []
+
+        controller.release(1.0)
+        await asyncio.sleep(0.01)
+        assert admitted == ["first"] and controller.active == 2
+        controller.release(1.0)
+        await asyncio.gather(*waiters)
+        assert admitted == ["first", "second"]
+
+        controller.release()
+        controller.release()
+        snapshot = controller.snapshot()
+        assert snapshot["active"] == 0 and snapshot["admitted"] == 4 and snapshot["queued"] == 2
+
+    asyncio.run(run())
+
+
+def test_full_queue_is_shed_with_429():
+    """With every slot and queue place taken, a new request is rejected immediately"""
+    async def run():
+        controller = AdmissionController(max_active=1, max_queue=2, max_wait_seconds=5)
+        controller.avg_service_seconds = 4.0
+        await controller.acquire()
+        queued = [asyncio.ensure_future(controller.acquire()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        try:
+            await controller.acquire()
+            raise AssertionError("Expected a 429")
+        except HTTPException as e:
+            assert e.status_code == 429
+            # Two queued requests plus this one, one slot, four seconds each
+            assert e.headers["Retry-After"] == "12"
+        assert controller.snapshot()["shed_queue_full"] == 1
+
+        for _ in range(3):
+            controller.release()
+        await asyncio.gather(*queued)
+
+    asyncio.run(run())
+
+
+def test_slow_queue_is_shed_with_503():
+    """A request that waits longer than max_wait_seconds is rejected and leaves the queue"""
+    async def run():
+        controller = AdmissionController(max_active=1, max_queue=2, max_wait_seconds=0.05)
+        await controller.acquire()
+        try:
+            await controller.acquire()
+            raise AssertionError("Expected a 503")
+        except HTTPException as e:
+            assert e.status_code == 503
+            assert int(e.headers["Retry-After"]) >= 1
+        snapshot = controller.snapshot()
+        assert snapshot["shed_timeout"] == 1 and snapshot["queue_depth"] == 0
+        assert snapshot["active"] == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    """A client that disconnects while queued neither blocks the queue nor keeps a slot"""
+    async def run():
+        controller = AdmissionController(max_active=1, max_queue=2, max_wait_seconds=5)
+        await controller.acquire()
+        cancelled = asyncio.ensure_future(controller.acquire())
+        behind = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert controller.snapshot()["queue_depth"] == 1
+
+        controller.release()
+        await asyncio.wait_for(behind, timeout=1)
+        controller.release()
+        assert controller.active == 0
+
+    asyncio.run(run())
+
+
+def test_batch_holds_one_slot():
+    """A batch is shed when there is no capacity and releases its slot after the last line"""
+    if settings.llm_backend != "fake":
+        print("   Skipping batch admission test: LLM_BACKEND is not fake")
+        return
+
+    client = TestClient(app)
+    batch = {"requests": [{
+        "startup_name": f"Admitted {number}",
+        "idea_description": "A marketplace that matches waiting rooms with people who enjoy waiting",
+        "target_users": "Patient people",
+        "budget": "$5k",
+        "roast_level": "Soft",
+    } for number in range(2)]}
+
+    active, queue = roast_admission.active, roast_admission.max_queue
+    roast_admission.active = roast_admission.max_active
+    roast_admission.max_queue = 0
+    try:
+        response = client.post("/roast/batch", json=batch)
+        assert response.status_code == 429 and "Retry-After" in response.headers
+    finally:
+        roast_admission.active, roast_admission.max_queue = active, queue
+
+    admitted = roast_admission.admitted
+    response = client.post("/roast/batch", json=batch)
+    assert response.status_code == 200
+    assert json.loads(response.text.strip().splitlines()[-1])["status"] == "done"
+    assert roast_admission.admitted == admitted + 1
+    assert roast_admission.active == active
+
+
+if __name__ == "__main__":
+    print("🚦 Testing admission control...")
+    test_waiters_are_admitted_in_order()
+    test_full_queue_is_shed_with_429()
+    test_slow_queue_is_shed_with_503()
+    test_cancelled_waiter_gives_up_its_place()
+    test_batch_holds_one_slot()
+    print("🎉 Admission control tests passed!")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Supabase data access layer.
+
+Serves a minimal PostgREST roasts table from an httpx MockTransport and
+checks the requests AsyncDatabaseService sends: the bulk insert headers, the
+grouped count query and its fallback to concurrent exact counts, and that
+HTTP errors come back as None/False instead of being raised.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.async_db_service import AsyncDatabaseService
+
+REQUEST = RoastRequest(
+    startup_name="PetRock",
+    idea_description="AI-powered rocks that provide emotional support to busy professionals",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+ROAST = RoastResponse(
+    brutal_roast="It is a rock.",
+    honest_feedback="Nobody needs a smart rock.",
+    competitor_reality_check="Real rocks are free.",
+    survival_tips=[f"Tip {i}" for i in range(7)],
+    pitch_rewrite="Mindfulness you can hold."
+)
+COUNTS = {None: 6, "Soft": 1, "Medium": 2, "Nuclear": 3}
+
+
+class FakeSupabase:
+    """Minimal PostgREST stand-in for the roasts table"""
+
+    def __init__(self, delay: float = 0.0, status: int = 200, aggregates: bool = False):
+        self.delay = delay
+        self.status = status
+        self.aggregates = aggregates
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status, json={"message": "unavailable"})
+
+        assert request.headers["apikey"] == "test-key"
+        assert request.url.path == "/rest/v1/roasts"
+        if request.method == "POST":
+            rows = json.loads(request.content)
+            return httpx.Response(201, json=[dict(row, id=index + 1) for index, row in enumerate(rows)])
+        if request.method == "HEAD":
+            level = request.url.params.get("roast_level")
+            count = COUNTS[level.removeprefix("eq.") if level else None]
+            return httpx.Response(200, headers={"Content-Range": f"*/{count}"})
+        if request.url.params.get("select") == "roast_level,count()":
+            if not self.aggregates:
+                return httpx.Response(400, json={"code": "PGRST123", "message": "Use of aggregate functions is not allowed"})
+            return httpx.Response(200, json=[{"roast_level": level, "count": count} for level, count in COUNTS.items() if level])
+        return httpx.Response(200, json=[{"id": 1}])
+
+
+def make_service(supabase: FakeSupabase) -> AsyncDatabaseService:
+    return AsyncDatabaseService(
+        supabase_url="http://supabase.test/",
+        supabase_key="test-key",
+        max_connections=10,
+        max_keepalive=5,
+        connect_timeout=1,
+        timeout=2,
+        transport=httpx.MockTransport(supabase)
+    )
+
+
+def test_save_roast():
+    """save_roast posts one row and returns the inserted record"""
+    async def run():
+        supabase = FakeSupabase()
+        service = make_service(supabase)
+        record = await service.save_roast(REQUEST, ROAST)
+        await service.close()
+        assert record["id"] == 1 and record["startup_name"] == "PetRock"
+        assert record["survival_tips"] == ROAST.survival_tips
+        assert supabase.requests[0].headers["Prefer"] == "return=representation"
+
+    asyncio.run(run())
+
+
+def test_stats_from_grouped_query():
+    """With PostgREST aggregates enabled the stats take one grouped query"""
+    async def run():
+        supabase = FakeSupabase(aggregates=True)
+        service = make_service(supabase)
+        stats = await service.get_roast_stats()
+        await service.close()
+        assert stats["total_roasts"] == 6
+        assert stats["roast_levels"] == {"Soft": 1, "Medium": 2, "Nuclear": 3}
+        assert len(supabase.requests) == 1
+
+    asyncio.run(run())
+
+
+def test_stats_queries_run_concurrently():
+    """Without aggregates the total and per-level counts overlap instead of running one after another"""
+    async def run():
+        supabase = FakeSupabase(delay=0.2)
+        service = make_service(supabase)
+        started = asyncio.get_running_loop().time()
+        stats = await service.get_roast_stats()
+        elapsed = asyncio.get_running_loop().time() - started
+        await service.close()
+        assert stats["total_roasts"] == 6
+        assert stats["roast_levels"] == {"Soft": 1, "Medium": 2, "Nuclear": 3}
+        assert service.aggregates_supported is False
+        # One rejected grouped query, then the four counts together
+        assert elapsed < 0.7, f"Stats took {elapsed:.2f}s"
+        assert service.snapshot()["max_in_flight"] == 4
+
+    asyncio.run(run())
+
+
+def test_failures_are_not_raised():
+    """Errors come back as None/False like the synchronous DatabaseService"""
+    async def run():
+        service = make_service(FakeSupabase(status=503))
+        assert await service.save_roast(REQUEST, ROAST) is None
+        assert await service.get_roast_stats() is None
+        assert await service.health_check() is False
+        assert service.snapshot()["failures"] >= 3
+        await service.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🗄️ Testing async database service...")
+    test_save_roast()
+    test_stats_from_grouped_query()
+    test_stats_queries_run_concurrently()
+    test_failures_are_not_raised()
+    print("🎉 Async database service tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the two-tier roast cache.
+
+Checks that request_key ignores whitespace and casing, that the memory tier
+evicts least recently used roasts and expires them after the TTL, and that
+the SQLite tier in a temporary directory serves roasts to a new cache
+instance (promoting them into memory) without blocking the event loop.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.cache_service import RoastCache, request_key
+
+REQUEST = RoastRequest(
+    startup_name="PetRock",
+    idea_description="AI-powered rocks that provide emotional support to busy professionals",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+ROAST = RoastResponse(
+    brutal_roast="PetRock is a rock with a subscription.",
+    honest_feedback="Nobody needs a smart rock.",
+    competitor_reality_check="Real rocks are free.",
+    survival_tips=[f"Tip {i}" for i in range(7)],
+    pitch_rewrite="PetRock: mindfulness you can hold."
+)
+
+
+def test_request_key_normalizes_text():
+    """Whitespace and casing do not change the key; the roast level does"""
+    variant = REQUEST.model_copy(update={"startup_name": "  petrock ", "budget": "$50K"})
+    assert request_key(variant) == request_key(REQUEST)
+    assert request_key(REQUEST.model_copy(update={"roast_level": "Soft"})) != request_key(REQUEST)
+
+
+def test_memory_tier_eviction_and_expiry():
+    """The least recently used roast is evicted, and roasts expire after the TTL"""
+    async def run():
+        cache = RoastCache(max_entries=2, ttl_seconds=3600)
+        await cache.set("a", ROAST)
+        await cache.set("b", ROAST)
+        assert await cache.get("a") == ROAST
+        await cache.set("c", ROAST)
+        assert await cache.get("b") is None
+        assert await cache.get("a") == ROAST
+
+        short = RoastCache(max_entries=2, ttl_seconds=0)
+        await short.set("a", ROAST)
+        assert await short.get("a") is None
+
+        snapshot = cache.snapshot()
+        assert snapshot["memory_hits"] == 2 and snapshot["misses"] == 1 and snapshot["evictions"] == 1
+        assert short.snapshot()["expirations"] == 1
+
+    asyncio.run(run())
+
+
+def test_disk_tier_survives_restart_off_the_loop():
+    """A new cache serves roasts from the SQLite file, and a slow disk does not stall the loop"""
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.db")
+            await RoastCache(max_entries=10, ttl_seconds=3600, db_path=path).set("key", ROAST)
+
+            restarted = RoastCache(max_entries=10, ttl_seconds=3600, db_path=path)
+            read_disk = restarted._read_disk
+
+            def slow_read(key, now):
+                time.sleep(0.2)
+                return read_disk(key, now)
+
+            restarted._read_disk = slow_read
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.ensure_future(ticker())
+            assert await restarted.get("key") == ROAST
+            ticking.cancel()
+            assert ticks >= 10, "The event loop kept running during the disk lookup"
+
+            assert await restarted.get("key") == ROAST
+            snapshot = restarted.snapshot()
+            assert snapshot["disk_hits"] == 1 and snapshot["memory_hits"] == 1
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🗄️ Testing roast cache...")
+    test_request_key_normalizes_text()
+    test_memory_tier_eviction_and_expiry()
+    test_disk_tier_survives_restart_off_the_loop()
+    print("🎉 Roast cache tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM call recording and replay.
+
+Records calls served by the fake backend into a temporary cassette, then
+replays them through RoastService with no provider behind it. No Gemini
+API key or network access is needed. Supabase settings must still be
+present in the environment.
+
+To replay a cassette captured from production instead, run the app with
+LLM_BACKEND=replay and LLM_CASSETTE_PATH pointing at it.
+"""
+
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "20")
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.llm_backend import Cassette, FakeBackend, RecordingBackend, ReplayBackend
+from app.services.roast_service import roast_service
+
+REQUEST = RoastRequest(
+    startup_name="MeetingMind",
+    idea_description="An assistant that joins your meetings and summarizes them into action items",
+    target_users="Managers at mid-size software companies",
+    budget="$200k",
+    roast_level="Medium"
+)
+
+
+def record(cassette: Cassette, **fake_options) -> RecordingBackend:
+    """Recorder around a fast, seeded fake backend"""
+    options = dict(latency_ms=5, latency_sigma=0, chunk_chars=64, failure_rate=0, malformed_rate=0, seed=3)
+    options.update(fake_options)
+    return RecordingBackend(FakeBackend("fake-model", **options), cassette)
+
+
+def test_replay_matches_recording():
+    """Replayed text and stream chunk boundaries match what was recorded"""
+    prompt = roast_service._build_prompt(REQUEST)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.jsonl.gz")
+        recorder = record(Cassette(path))
+        recorded_text = recorder.generate(prompt, {"response_mime_type": "application/json"}).text
+        recorded_chunks = list(recorder.stream(prompt + " "))
+
+        cassette = Cassette(path)
+        cassette.load()
+        replay = ReplayBackend("replayed", cassette, sequential_fallback=False, speed=0)
+
+        assert replay.generate(prompt).text == recorded_text
+        assert list(replay.stream(prompt + " ")) == recorded_chunks
+        try:
+            replay.generate("a prompt that was never recorded")
+            raise AssertionError("Expected LookupError for an unknown prompt")
+        except LookupError:
+            pass
+
+
+def test_failures_and_sequential_fallback():
+    """Recorded failures replay as errors; unknown prompts replay in order with fallback on"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.jsonl.gz")
+        try:
+            record(Cassette(path), failure_rate=1).generate("first prompt")
+        except ConnectionError:
+            pass
+        record(Cassette(path)).generate("second prompt")
+
+        cassette = Cassette(path)
+        cassette.load()
+        replay = ReplayBackend("replayed", cassette, sequential_fallback=True, speed=0)
+
+        try:
+            replay.generate("something else")
+            raise AssertionError("Expected the recorded failure to replay")
+        except ConnectionError:
+            pass
+        assert replay.generate("another unknown prompt").text
+        assert cassette.misses == 2
+
+
+def test_roast_service_replay():
+    """A roast recorded once replays through the full pipeline, including malformed output"""
+    if settings.llm_backend != "fake":
+        print("   Skipping pipeline test: LLM_BACKEND is not fake")
+        return
+
+    async def run(backend) -> RoastResponse:
+        original = [route.backend for route in roast_service.router.routes]
+        for route in roast_service.router.routes:
+            route.backend = backend
+        try:
+            return await roast_service.analyze_startup(REQUEST)
+        finally:
+            for route, backend in zip(roast_service.router.routes, original):
+                route.backend = backend
+
+    settings.roast_cache_enabled = False
+    settings.near_duplicate_enabled = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.jsonl.gz")
+        recorded = asyncio.run(run(record(Cassette(path), malformed_rate=1)))
+
+        cassette = Cassette(path)
+        cassette.load()
+        replayed = asyncio.run(run(ReplayBackend("replayed", cassette, sequential_fallback=False, speed=0)))
+
+        assert replayed == recorded
+        assert cassette.hits >= 1 and cassette.misses == 0
+
+
+if __name__ == "__main__":
+    print("📼 Testing LLM record/replay...")
+    test_replay_matches_recording()
+    test_failures_and_sequential_fallback()
+    test_roast_service_replay()
+    print("🎉 Record/replay tests passed!")
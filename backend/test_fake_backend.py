@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script for the local fake LLM backend.
+
+Runs the full RoastService pipeline (single, sectioned, packed and streaming
+generation) against the fake backend, so no Gemini API key or network access
+is needed. Supabase settings must still be present in the environment, and
+LLM_BACKEND=fake must be exported when running this script directly.
+"""
+
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "20")
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.json_repair import repair_stats
+from app.services.llm_backend import FakeBackend
+from app.services.roast_service import roast_service
+
+REQUEST = RoastRequest(
+    startup_name="PetRock 2.0",
+    idea_description="AI-powered rocks that provide emotional support to busy professionals",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+
+
+def fake_backend(**overrides) -> FakeBackend:
+    """Fast, seeded fake backend with optional overrides"""
+    options = dict(latency_ms=1, latency_sigma=0, chunk_chars=64, failure_rate=0, malformed_rate=0, seed=7)
+    options.update(overrides)
+    return FakeBackend("fake-model", **options)
+
+
+def test_output_is_deterministic_and_complete():
+    """The same prompt yields the same roast with every requested field"""
+    prompt = roast_service._build_prompt(REQUEST)
+    first = fake_backend().generate(prompt, {"response_mime_type": "application/json"}).text
+    second = fake_backend(seed=99).generate(prompt, {"response_mime_type": "application/json"}).text
+
+    assert first == second
+    roast = RoastResponse(**json.loads(first))
+    assert len(roast.survival_tips) == 7
+    assert len(roast.brutal_roast.split()) > 100
+
+
+def test_field_and_packed_prompts():
+    """Field prompts get only their fields; packed prompts get one item per startup"""
+    config = {"response_mime_type": "application/json"}
+    fields = json.loads(fake_backend().generate(roast_service._build_field_prompt(REQUEST, ["pitch_rewrite"]), config).text)
+    packed = json.loads(fake_backend().generate(roast_service._build_packed_prompt([REQUEST] * 3), config).text)
+
+    assert list(fields) == ["pitch_rewrite"]
+    assert [item["index"] for item in packed] == [0, 1, 2]
+
+
+def test_stream_reassembles_to_generate():
+    """Streamed chunks join to the same text as a full generation"""
+    prompt = roast_service._build_prompt(REQUEST)
+    chunks = list(fake_backend().stream(prompt))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == fake_backend().generate(prompt).text
+
+
+def test_fault_injection():
+    """Injected failures raise and malformed responses are not valid JSON"""
+    prompt = roast_service._build_prompt(REQUEST)
+    try:
+        fake_backend(failure_rate=1).generate(prompt)
+        raise AssertionError("Expected an injected ConnectionError")
+    except ConnectionError:
+        pass
+
+    malformed = fake_backend(malformed_rate=1).generate(prompt).text
+    try:
+        json.loads(malformed)
+        raise AssertionError("Expected malformed JSON")
+    except json.JSONDecodeError:
+        pass
+
+
+def test_pipeline_end_to_end():
+    """Every generation mode produces a valid roast through the fake backend"""
+    if settings.llm_backend != "fake":
+        print("   Skipping pipeline test: LLM_BACKEND is not fake")
+        return
+
+    async def run():
+        for mode in ("single", "sectioned"):
+            settings.roast_generation_mode = mode
+            assert isinstance(await roast_service.analyze_startup(REQUEST), RoastResponse)
+        settings.roast_generation_mode = "single"
+
+        packed = await roast_service.analyze_startups_packed([REQUEST, REQUEST])
+        assert all(isinstance(item, RoastResponse) for item in packed)
+
+        events = [event async for event, _ in roast_service.stream_startup(REQUEST)]
+        assert events[-1] == "complete" and events.count("field") >= 5
+
+    previous = (settings.roast_cache_enabled, settings.near_duplicate_enabled, settings.roast_generation_mode)
+    settings.roast_cache_enabled = False
+    settings.near_duplicate_enabled = False
+    try:
+        asyncio.run(run())
+    finally:
+        settings.roast_cache_enabled, settings.near_duplicate_enabled, settings.roast_generation_mode = previous
+
+
+def test_single_pending_item_is_not_a_packed_fallback():
+    """An item that was never packed is generated singly without counting as a packing failure"""
+    if settings.llm_backend != "fake":
+        print("   Skipping packed fallback test: LLM_BACKEND is not fake")
+        return
+
+    previous = (settings.roast_cache_enabled, settings.near_duplicate_enabled)
+    settings.roast_cache_enabled = False
+    settings.near_duplicate_enabled = False
+    fallbacks = roast_service.packed_fallbacks
+    try:
+        results = asyncio.run(roast_service.analyze_startups_packed([REQUEST]))
+    finally:
+        settings.roast_cache_enabled, settings.near_duplicate_enabled = previous
+    assert isinstance(results[0], RoastResponse)
+    assert roast_service.packed_fallbacks == fallbacks
+
+
+def test_regenerations_count_whole_roasts_only():
+    """An unrepairable field patch is not a regeneration; a retried whole roast is"""
+    if settings.llm_backend != "fake":
+        print("   Skipping regeneration test: LLM_BACKEND is not fake")
+        return
+
+    before = repair_stats.snapshot()
+    try:
+        roast_service._load_response_json("no json here", REQUEST.startup_name)
+        raise AssertionError("Expected an unrepairable response")
+    except json.JSONDecodeError:
+        pass
+    after = repair_stats.snapshot()
+    assert after["repair_failed"] == before["repair_failed"] + 1
+    assert after["regenerations"] == before["regenerations"]
+
+    async def run():
+        cache_enabled, near_duplicate_enabled = settings.roast_cache_enabled, settings.near_duplicate_enabled
+        settings.roast_cache_enabled = False
+        settings.near_duplicate_enabled = False
+        routes = roast_service.router.routes
+        originals = [route.backend.generate for route in routes]
+        calls = []
+
+        def malformed_once(prompt, generation_config=None):
+            calls.append(prompt)
+            if len(calls) == 1:
+                return SimpleNamespace(text="no json here", usage_metadata=None)
+            return originals[0](prompt, generation_config)
+
+        for route in routes:
+            route.backend.generate = malformed_once
+        try:
+            assert isinstance(await roast_service.analyze_startup(REQUEST), RoastResponse)
+        finally:
+            for route, original in zip(routes, originals):
+                route.backend.generate = original
+            settings.roast_cache_enabled = cache_enabled
+            settings.near_duplicate_enabled = near_duplicate_enabled
+        assert len(calls) == 2
+
+    asyncio.run(run())
+    assert repair_stats.snapshot()["regenerations"] == before["regenerations"] + 1
+
+
+def test_batch_saves_roasts_before_disconnect():
+    """Roasts a batch already streamed are queued for saving even if the client leaves mid-batch"""
+    if settings.llm_backend != "fake":
+        print("   Skipping batch test: LLM_BACKEND is not fake")
+        return
+
+    from app.routes.roast import _batch_result_stream
+    from app.services.write_buffer import roast_write_buffer
+
+    async def run():
+        saved = []
+        roast_write_buffer.enqueue = lambda request, response: saved.append(request.startup_name)
+        requests = [REQUEST.model_copy(update={"startup_name": f"Batch {number}"}) for number in range(3)]
+        stream = _batch_result_stream(requests)
+        try:
+            first = json.loads(await stream.__anext__())
+            await stream.aclose()
+        finally:
+            del roast_write_buffer.enqueue
+        assert first["status"] == "ok"
+        assert saved == [first["startup_name"]]
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing fake LLM backend...")
+    test_output_is_deterministic_and_complete()
+    test_field_and_packed_prompts()
+    test_stream_reassembles_to_generate()
+    test_fault_injection()
+    test_pipeline_end_to_end()
+    test_single_pending_item_is_not_a_packed_fallback()
+    test_regenerations_count_whole_roasts_only()
+    test_batch_saves_roasts_before_disconnect()
+    print("🎉 Fake backend tests passed!")
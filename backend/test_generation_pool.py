@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded Gemini worker pool.
+
+Runs blocking stand-in calls that wait on threading events, so each test
+decides exactly when a worker thread finishes. Checks that the pool caps
+concurrency and reports the overflow as queue depth, that cancelling a
+queued call frees its queue slot, that timeouts are reported, and that
+streamed items arrive before the iterator is exhausted.
+"""
+
+import asyncio
+import threading
+import time
+
+from app.services.generation_pool import GenerationPool
+
+
+def blocking_call(release: threading.Event, result: str = "done") -> str:
+    """Stand-in for a blocking SDK call that returns once released"""
+    release.wait(5)
+    return result
+
+
+def test_queue_depth_and_concurrency_cap():
+    """Calls beyond max_concurrency wait in the queue until a worker frees up"""
+    async def run():
+        pool = GenerationPool(max_concurrency=2, timeout_seconds=5)
+        release = threading.Event()
+        calls = [asyncio.ensure_future(pool.run(blocking_call, release, f"call {i}")) for i in range(5)]
+        await asyncio.sleep(0.1)
+        assert pool.in_flight == 2
+        assert pool.queue_depth == 3
+
+        release.set()
+        results = await asyncio.gather(*calls)
+        assert results == [f"call {i}" for i in range(5)]
+        snapshot = pool.snapshot()
+        assert snapshot["queue_depth"] == 0 and snapshot["in_flight"] == 0
+        assert snapshot["completed"] == 5
+        pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_cancelled_queued_call_leaves_the_queue():
+    """A caller that goes away before a worker picks up its call no longer counts as queued"""
+    async def run():
+        pool = GenerationPool(max_concurrency=1, timeout_seconds=5)
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(blocking_call, release))
+        queued = asyncio.ensure_future(pool.run(blocking_call, release))
+        await asyncio.sleep(0.1)
+        assert pool.queue_depth == 1
+
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert pool.queue_depth == 0
+
+        release.set()
+        assert await running == "done"
+        assert pool.snapshot()["completed"] == 1
+        pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_timeout_is_reported():
+    """A call that outlives the timeout raises TimeoutError and is counted"""
+    async def run():
+        pool = GenerationPool(max_concurrency=1, timeout_seconds=5)
+        release = threading.Event()
+        try:
+            await pool.run(blocking_call, release, timeout=0.1)
+            assert False, "Expected a timeout"
+        except TimeoutError:
+            pass
+        assert pool.snapshot()["timed_out"] == 1
+        release.set()
+        pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_stream_yields_items_as_they_arrive():
+    """Items reach the caller while the worker is still producing the rest"""
+    def produce(gate: threading.Event):
+        yield "first"
+        gate.wait(5)
+        yield "second"
+
+    async def run():
+        pool = GenerationPool(max_concurrency=1, timeout_seconds=5)
+        gate = threading.Event()
+        stream = pool.stream(produce, gate)
+        started = time.perf_counter()
+        assert await stream.__anext__() == "first"
+        assert time.perf_counter() - started < 1
+        gate.set()
+        assert [item async for item in stream] == ["second"]
+        pool.shutdown()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧵 Testing generation pool...")
+    test_queue_depth_and_concurrency_cap()
+    test_cancelled_queued_call_leaves_the_queue()
+    test_timeout_is_reported()
+    test_stream_yields_items_as_they_arrive()
+    print("🎉 Generation pool tests passed!")
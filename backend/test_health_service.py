@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the background dependency prober.
+
+Probes StubDependency checks whose outcome and delay can be changed, and
+checks that results are cached between rounds, that slow and failing probes
+count as unavailable, that only required dependencies decide readiness, and
+that results older than the stale limit stop counting.
+"""
+
+import asyncio
+
+from app.services.health_service import DependencyProber, DependencyStatus
+
+
+class StubDependency:
+    """A dependency whose probe outcome and delay can be changed"""
+
+    def __init__(self):
+        self.healthy = True
+        self.delay = 0.0
+        self.error = None
+        self.calls = 0
+
+    async def check(self) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.healthy
+
+
+def make_prober(interval_seconds=60.0):
+    database, llm = StubDependency(), StubDependency()
+    prober = DependencyProber(
+        dependencies=[
+            DependencyStatus("database", database.check, required=False),
+            DependencyStatus("llm", llm.check, required=True),
+        ],
+        interval_seconds=interval_seconds,
+        timeout_seconds=0.1
+    )
+    return prober, database, llm
+
+
+def test_readiness_from_cached_probes():
+    """Required dependencies decide readiness; optional ones only degrade it"""
+    async def run():
+        prober, database, llm = make_prober()
+        assert prober.readiness()["status"] == "unavailable"
+
+        await prober.probe_all()
+        readiness = prober.readiness()
+        assert readiness["status"] == "ready" and readiness["ready"]
+        assert readiness["dependencies"]["llm"]["latency_ms"] is not None
+
+        database.healthy = False
+        await prober.probe_all()
+        assert prober.readiness()["status"] == "degraded" and prober.readiness()["ready"]
+
+        llm.error = ConnectionError("API key rejected")
+        await prober.probe_all()
+        readiness = prober.readiness()
+        assert readiness["status"] == "unavailable" and not readiness["ready"]
+        assert readiness["dependencies"]["llm"]["error"] == "API key rejected"
+
+        # Reading the state does not probe again
+        assert llm.calls == 3
+        prober.readiness()
+        assert llm.calls == 3
+
+    asyncio.run(run())
+
+
+def test_slow_probe_times_out():
+    """A probe slower than the timeout counts as unavailable"""
+    async def run():
+        prober, database, llm = make_prober()
+        database.delay = 1.0
+        started = asyncio.get_running_loop().time()
+        await prober.probe_all()
+        assert asyncio.get_running_loop().time() - started < 0.5
+        assert prober.status("database") == "unavailable"
+        assert "timed out" in prober.readiness()["dependencies"]["database"]["error"]
+        assert prober.status("llm") == "healthy"
+
+    asyncio.run(run())
+
+
+def test_background_probes_and_staleness():
+    """Probes repeat on the interval; results older than the stale limit become unknown"""
+    async def run():
+        prober, database, llm = make_prober(interval_seconds=0.05)
+        await prober.start()
+        await asyncio.sleep(0.2)
+        await prober.stop()
+        assert llm.calls >= 3
+        assert prober.status("llm") == "healthy"
+
+        await asyncio.sleep(prober.stale_after_seconds + 0.05)
+        assert prober.status("llm") == "unknown"
+        assert not prober.readiness()["ready"]
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🩺 Testing dependency prober...")
+    test_readiness_from_cached_probes()
+    test_slow_probe_times_out()
+    test_background_probes_and_staleness()
+    print("🎉 Dependency prober tests passed!")
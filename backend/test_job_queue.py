@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for the durable roast job queue.
+
+Runs RoastJobQueue on a SQLite file in a temporary directory, with the roast
+pipeline replaced by a StubPipeline whose roasts finish (or fail) when the
+test says so. Checks that jobs are claimed oldest first and only once, that
+jobs left running by a dead process are queued again on the next start, and
+that long-polling returns as soon as a job finishes or the timeout passes.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import HTTPException
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.job_queue import RoastJobQueue
+from app.services.roast_service import roast_service
+from app.services.write_buffer import roast_write_buffer
+
+ROAST = RoastResponse(
+    brutal_roast="It is a rock.",
+    honest_feedback="Nobody needs a smart rock.",
+    competitor_reality_check="Real rocks are free.",
+    survival_tips=[f"Tip {i}" for i in range(7)],
+    pitch_rewrite="Mindfulness you can hold."
+)
+
+
+def make_request(name: str) -> RoastRequest:
+    return RoastRequest(
+        startup_name=name,
+        idea_description="AI-powered rocks that provide emotional support to busy professionals",
+        target_users="Millennials who want pets but can't commit to real animals",
+        budget="$50k",
+        roast_level="Nuclear"
+    )
+
+
+class StubPipeline:
+    """Stands in for analyze_startup and the write buffer; roasts finish once released"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.error = None
+        self.started = []
+        self.saved = []
+
+    async def analyze_startup(self, request: RoastRequest) -> RoastResponse:
+        self.started.append(request.startup_name)
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return ROAST
+
+    def enqueue(self, request: RoastRequest, response: RoastResponse) -> None:
+        self.saved.append(request.startup_name)
+
+    def __enter__(self):
+        roast_service.analyze_startup = self.analyze_startup
+        roast_write_buffer.enqueue = self.enqueue
+        return self
+
+    def __exit__(self, *exc):
+        del roast_service.analyze_startup
+        del roast_write_buffer.enqueue
+
+
+def test_claims_oldest_job_once():
+    """Workers take queued jobs in submission order and never the same job twice"""
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            queue = RoastJobQueue(os.path.join(directory, "jobs.db"), workers=0)
+            await queue.start()
+            submitted = []
+            for name in ("First", "Second", "Third"):
+                submitted.append(queue.submit(make_request(name))["id"])
+                time.sleep(0.002)
+
+            claimed = [queue._claim_next()["id"] for _ in range(3)]
+            assert claimed == submitted
+            assert queue._claim_next() is None
+            assert queue.get(submitted[0])["status"] == "running"
+            assert queue.snapshot()["running_jobs"] == 3 and queue.snapshot()["queue_depth"] == 0
+            await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_running_jobs_are_requeued_on_restart():
+    """A job that was running when the process stopped is queued again and then finished"""
+    async def run():
+        with tempfile.TemporaryDirectory() as directory, StubPipeline() as pipeline:
+            path = os.path.join(directory, "jobs.db")
+            queue = RoastJobQueue(path, workers=1)
+            await queue.start()
+            job_id = queue.submit(make_request("Interrupted"))["id"]
+            await asyncio.sleep(0.05)
+            assert pipeline.started == ["Interrupted"]
+            assert queue.get(job_id)["status"] == "running"
+            await queue.stop()
+
+            restarted = RoastJobQueue(path, workers=0)
+            await restarted.start()
+            job = restarted.get(job_id)
+            assert job["status"] == "queued" and job["started_at"] is None
+            await restarted.stop()
+
+            pipeline.release.set()
+            restarted = RoastJobQueue(path, workers=1)
+            await restarted.start()
+            job = await restarted.wait(job_id, timeout=5)
+            assert job["status"] == "completed"
+            assert RoastResponse.model_validate_json(job["result"]) == ROAST
+            assert pipeline.saved == ["Interrupted"]
+            await restarted.stop()
+
+    asyncio.run(run())
+
+
+def test_long_poll_returns_when_the_job_finishes():
+    """wait() times out on a running job without leaking, wakes up as soon as it finishes and reports failures"""
+    async def run():
+        with tempfile.TemporaryDirectory() as directory, StubPipeline() as pipeline:
+            queue = RoastJobQueue(os.path.join(directory, "jobs.db"), workers=1)
+            await queue.start()
+            job_id = queue.submit(make_request("Slow"))["id"]
+
+            started = time.perf_counter()
+            job = await queue.wait(job_id, timeout=0.1)
+            assert job["status"] == "running"
+            assert 0.1 <= time.perf_counter() - started < 1
+            timed_out = await asyncio.gather(queue.wait(job_id, timeout=0.05), queue.wait(job_id, timeout=0.1))
+            assert [job["status"] for job in timed_out] == ["running", "running"]
+            assert not queue._finished_events and not queue._poller_counts, "Pollers that gave up leave nothing behind"
+
+            waiter = asyncio.ensure_future(queue.wait(job_id, timeout=5))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            pipeline.release.set()
+            job = await waiter
+            assert job["status"] == "completed"
+            assert time.perf_counter() - started < 1
+
+            pipeline.error = HTTPException(status_code=503, detail="Gemini is unavailable")
+            failed_id = queue.submit(make_request("Doomed"))["id"]
+            job = await queue.wait(failed_id, timeout=5)
+            assert job["status"] == "failed" and job["error"] == "Gemini is unavailable"
+            assert pipeline.saved == ["Slow"]
+
+            assert await queue.wait("missing", timeout=1) is None
+            snapshot = queue.snapshot()
+            assert snapshot["completed"] == 1 and snapshot["failed"] == 1
+            assert not queue._finished_events and not queue._poller_counts
+            await queue.stop()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("📬 Testing roast job queue...")
+    test_claims_oldest_job_once()
+    test_running_jobs_are_requeued_on_restart()
+    test_long_poll_returns_when_the_job_finishes()
+    print("🎉 Roast job queue tests passed!")
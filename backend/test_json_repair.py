@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test script for the local JSON repair engine.
+
+Runs a corpus of malformed Gemini responses through repair_json and checks
+that each one becomes valid JSON with the expected content. No API key or
+network access is needed.
+"""
+
+import json
+import time
+
+from app.services.json_repair import repair_json
+
+TIPS = [f"Tip number {i}" for i in range(1, 8)]
+VALID_ROAST = {
+    "brutal_roast": "Your AI-powered rock is still a rock.",
+    "honest_feedback": "There is no retention loop.",
+    "competitor_reality_check": "Pet stores, adoption centers and therapy apps.",
+    "survival_tips": TIPS,
+    "pitch_rewrite": "Tactile mindfulness tools for remote teams.",
+}
+
+# (name, malformed model output, check on the parsed result)
+CORPUS = [
+    (
+        "markdown fence with prose around it",
+        "Sure! Here is the roast you asked for:\n```json\n" + json.dumps(VALID_ROAST) + "\n```\nLet me know if you need more.",
+        lambda data: data == VALID_ROAST,
+    ),
+    (
+        "trailing commas in object and array",
+        '{"brutal_roast": "a", "honest_feedback": "b", "competitor_reality_check": "c", '
+        '"survival_tips": ["one", "two",], "pitch_rewrite": "d",}',
+        lambda data: data["survival_tips"] == ["one", "two"] and data["pitch_rewrite"] == "d",
+    ),
+    (
+        "unescaped inner quotes",
+        '{"brutal_roast": "Your "AI-powered" rock is a "disruptive" paperweight.", '
+        '"honest_feedback": "Customers said "no thanks", then left.", "pitch_rewrite": "ok"}',
+        lambda data: data["brutal_roast"] == 'Your "AI-powered" rock is a "disruptive" paperweight.'
+        and data["honest_feedback"] == 'Customers said "no thanks", then left.',
+    ),
+    (
+        "quoted phrase at the end of a tip",
+        '{"survival_tips": ["Stop calling it "AI"", "Charge money"], "pitch_rewrite": "x"}',
+        lambda data: data["survival_tips"] == ['Stop calling it "AI"', "Charge money"],
+    ),
+    (
+        "raw newlines and tabs inside strings",
+        '{"brutal_roast": "Line one.\nLine two.\n\n\tIndented.", "pitch_rewrite": "p"}',
+        lambda data: data["brutal_roast"] == "Line one.\nLine two.\n\n\tIndented.",
+    ),
+    (
+        "truncated inside the last string",
+        '{"brutal_roast": "a", "honest_feedback": "b", "competitor_reality_check": "c", '
+        '"survival_tips": ["1", "2", "3", "4", "5", "6", "7"], "pitch_rewrite": "We help busy prof',
+        lambda data: data["pitch_rewrite"] == "We help busy prof" and len(data["survival_tips"]) == 7,
+    ),
+    (
+        "truncated inside the survival_tips array",
+        '{"brutal_roast": "a", "honest_feedback": "b", "competitor_reality_check": "c", '
+        '"survival_tips": ["Validate demand", "Cut the burn", "Talk to',
+        lambda data: data["survival_tips"] == ["Validate demand", "Cut the burn", "Talk to"]
+        and "pitch_rewrite" not in data,
+    ),
+    (
+        "truncated right after a key",
+        '{"brutal_roast": "a", "honest_feedback": "b", "pitch_rewrite"',
+        lambda data: data == {"brutal_roast": "a", "honest_feedback": "b"},
+    ),
+    (
+        "truncated right after a colon",
+        '{"brutal_roast": "a", "honest_feedback": ',
+        lambda data: data == {"brutal_roast": "a"},
+    ),
+    (
+        "truncated after a comma inside the array",
+        '{"survival_tips": ["one", "two", ',
+        lambda data: data == {"survival_tips": ["one", "two"]},
+    ),
+    (
+        "truncated on a dangling escape",
+        '{"brutal_roast": "It is a \\',
+        lambda data: data == {"brutal_roast": "It is a "},
+    ),
+    (
+        "single-quoted keys and values with apostrophes",
+        "{'brutal_roast': 'It's a rock, and it's not even a good one.', 'pitch_rewrite': 'Say \"calm\"'}",
+        lambda data: data["brutal_roast"] == "It's a rock, and it's not even a good one."
+        and data["pitch_rewrite"] == 'Say "calm"',
+    ),
+    (
+        "unquoted keys and Python literals",
+        '{brutal_roast: "a", viable: False, funding: None, score: 3.5}',
+        lambda data: data == {"brutal_roast": "a", "viable": False, "funding": None, "score": 3.5},
+    ),
+    (
+        "missing commas between members",
+        '{"brutal_roast": "a"\n"honest_feedback": "b"\n"survival_tips": ["x" "y"]}',
+        lambda data: data == {"brutal_roast": "a", "honest_feedback": "b", "survival_tips": ["x", "y"]},
+    ),
+    (
+        "invalid escapes",
+        '{"budget_roast": "\\$50k won\'t cover \\a single hire", "pitch_rewrite": "caf\\u00e9"}',
+        lambda data: data["budget_roast"] == "\\$50k won't cover \\a single hire" and data["pitch_rewrite"] == "café",
+    ),
+    (
+        "second JSON object after the first",
+        '{"brutal_roast": "first"} and also {"brutal_roast": "second"}',
+        lambda data: data == {"brutal_roast": "first"},
+    ),
+    (
+        "mismatched closing bracket",
+        '{"survival_tips": ["a", "b"}, "pitch_rewrite": "p"}',
+        lambda data: data["survival_tips"] == ["a", "b"],
+    ),
+    (
+        "missing colon before an array",
+        '{"survival_tips" ["a", "b"], "pitch_rewrite": "p"}',
+        lambda data: data == {"survival_tips": ["a", "b"], "pitch_rewrite": "p"},
+    ),
+    (
+        "missing colon before a string",
+        '{"brutal_roast" "a", "pitch_rewrite" "p"}',
+        lambda data: data == {"brutal_roast": "a", "pitch_rewrite": "p"},
+    ),
+]
+
+
+def test_corpus():
+    """Every corpus entry repairs into JSON with the expected content"""
+    for name, malformed, check in CORPUS:
+        repaired = repair_json(malformed)
+        data = json.loads(repaired)
+        assert check(data), f"{name}: unexpected result {data}"
+
+
+def test_valid_json_is_unchanged():
+    """Valid input survives the repair pass with identical content"""
+    assert json.loads(repair_json(json.dumps(VALID_ROAST))) == VALID_ROAST
+
+
+def test_no_json_raises():
+    """Pure prose cannot be repaired"""
+    try:
+        repair_json("I'm sorry, I can't roast this startup.")
+    except ValueError:
+        return
+    raise AssertionError("Expected ValueError for output without JSON")
+
+
+def test_repair_speed():
+    """A full-size truncated response repairs in well under a millisecond"""
+    long_roast = dict(VALID_ROAST, brutal_roast="Your \"idea\" is a rock. " * 60, honest_feedback="Honest.\n" * 120)
+    truncated = json.dumps(long_roast)[:-40]
+    runs = 200
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        repair_json(truncated)
+    per_call_ms = (time.perf_counter() - start) * 1000 / runs
+
+    print(f"   Repair time: {per_call_ms:.3f} ms for {len(truncated)} chars")
+    assert per_call_ms < 1.0, f"Repair took {per_call_ms:.3f} ms per call"
+
+
+if __name__ == "__main__":
+    print("🔧 Testing JSON repair engine...")
+    for name, malformed, check in CORPUS:
+        try:
+            data = json.loads(repair_json(malformed))
+            print(f"{'✅' if check(data) else '❌'} {name}")
+        except Exception as e:
+            print(f"❌ {name}: {str(e)}")
+    test_valid_json_is_unchanged()
+    test_no_json_raises()
+    test_repair_speed()
+    print("🎉 JSON repair tests finished!")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script for the near-duplicate roast index.
+
+Checks that reworded, re-punctuated and renamed submissions reuse a stored
+roast, that different ideas and roast levels do not, that the index survives
+a restart (and drops entries stored under an older signature scheme), that
+an in-memory index keeps to its lower cap, and that signatures and lookups
+stay fast with maximum-length submissions and a large index. Every index is built in a temporary directory
+from hand-written submissions.
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.near_duplicate import NearDuplicateIndex, signature, swap_startup_name
+
+ORIGINAL = RoastRequest(
+    startup_name="PetRock",
+    idea_description="PetRock is revolutionizing the pet industry with AI-powered rocks that provide emotional support to busy professionals who travel a lot",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+ROAST = RoastResponse(
+    brutal_roast="PetRock is a rock with a subscription.",
+    honest_feedback="Nobody needs petrock to be smart.",
+    competitor_reality_check="Real rocks are free.",
+    survival_tips=[f"Tip {i}" for i in range(7)],
+    pitch_rewrite="PetRock: mindfulness you can hold."
+)
+
+WORDS = ("ai blockchain marketplace subscription platform app pets restaurants invoices fitness students farmers "
+         "drones recipes podcasts crypto dating travel sneakers plants lawyers dentists robots coffee parking laundry "
+         "tutoring insurance gaming weddings freelancers solar payroll recruiting groceries furniture music").split()
+
+
+def make_index(db_path=None) -> NearDuplicateIndex:
+    index = NearDuplicateIndex(threshold=0.8, max_entries=1000, db_path=db_path)
+    index.add(ORIGINAL, ROAST)
+    return index
+
+
+def test_near_duplicates_reuse_roast():
+    """Casing, punctuation, budget and a new name still reuse the roast, with the name swapped in"""
+    index = make_index()
+    variant = ORIGINAL.model_copy(update={
+        "startup_name": "StoneBuddy",
+        "idea_description": "PETROCK is revolutionizing the pet industry, with AI powered rocks that provide emotional support to busy professionals who travel a lot!!",
+        "budget": "$10k",
+    })
+    reused = index.lookup(variant)
+    assert reused is not None
+    assert reused.brutal_roast == "StoneBuddy is a rock with a subscription."
+    assert reused.honest_feedback == "Nobody needs StoneBuddy to be smart."
+
+
+def test_different_submissions_miss():
+    """A different roast level or a different idea is generated fresh"""
+    index = make_index()
+    assert index.lookup(ORIGINAL.model_copy(update={"roast_level": "Soft"})) is None
+    assert index.lookup(ORIGINAL.model_copy(update={
+        "idea_description": "A marketplace connecting farmers with restaurants for same-day delivery of fresh produce"
+    })) is None
+
+
+def test_index_survives_restart():
+    """Entries written to the SQLite file are loaded by a new index"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "near_duplicates.db")
+        make_index(path)
+        reloaded = NearDuplicateIndex(threshold=0.8, max_entries=1000, db_path=path)
+        assert len(reloaded) == 1
+        assert reloaded.lookup(ORIGINAL) == ROAST
+
+
+def test_outdated_signatures_are_dropped():
+    """Entries stored under an older signature scheme are dropped on load instead of never matching"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "near_duplicates.db")
+        make_index(path)
+        db = sqlite3.connect(path)
+        db.execute("PRAGMA user_version = 1")
+        db.commit()
+        db.close()
+        assert len(NearDuplicateIndex(threshold=0.8, max_entries=1000, db_path=path)) == 0
+        assert len(make_index(path)) == 1
+
+
+def test_rebuild_from_rows():
+    """rebuild() replaces the contents with roasts table rows and skips invalid ones"""
+    index = make_index()
+    row = dict(ROAST.model_dump(), **ORIGINAL.model_dump(), id=1)
+    assert index.rebuild([row, {"id": 2, "startup_name": "Broken"}]) == 1
+    assert len(index) == 1
+    assert index.lookup(ORIGINAL) is not None
+
+
+def test_swap_startup_name_handles_special_characters():
+    """Names are replaced literally, whatever characters they contain"""
+    swapped = swap_startup_name(ROAST, "PetRock", r"Rock\1 (v2)")
+    assert swapped.pitch_rewrite == r"Rock\1 (v2): mindfulness you can hold."
+
+
+def test_swap_startup_name_matches_whole_names_only():
+    """A short name is not replaced inside other words"""
+    roast = ROAST.model_copy(update={"brutal_roast": "Go? A good idea, said nobody ago. go-karts beat Go."})
+    swapped = swap_startup_name(roast, "Go", "Uber")
+    assert swapped.brutal_roast == "Uber? A good idea, said nobody ago. Uber-karts beat Uber."
+
+
+def test_memory_store_uses_the_lower_cap():
+    """Without a file the roasts are held in memory, so the smaller cap applies"""
+    in_memory = NearDuplicateIndex(threshold=0.8, max_entries=1000, memory_max_entries=3)
+    with tempfile.TemporaryDirectory() as directory:
+        on_disk = NearDuplicateIndex(threshold=0.8, max_entries=1000, db_path=os.path.join(directory, "index.db"),
+                                     memory_max_entries=3)
+        rng = random.Random(2)
+        for number in range(5):
+            idea, users = " ".join(rng.choices(WORDS, k=16)), " ".join(rng.choices(WORDS, k=6))
+            for index in (in_memory, on_disk):
+                index._insert(f"Startup {number}", idea, users, "Medium", ROAST)
+        assert len(in_memory) == 3 and in_memory.max_entries == 3
+        assert len(on_disk) == 5
+
+
+def test_lookup_speed():
+    """Lookups stay sub-millisecond with a large index"""
+    index = NearDuplicateIndex(threshold=0.8, max_entries=100000, memory_max_entries=100000)
+    rng = random.Random(1)
+    for number in range(10000):
+        index._insert(f"Startup {number}", " ".join(rng.choices(WORDS, k=16)), " ".join(rng.choices(WORDS, k=6)),
+                      "Medium", ROAST, commit=False)
+    assert len(index) == 10000
+
+    queries = [
+        ORIGINAL.model_copy(update={"idea_description": " ".join(rng.choices(WORDS, k=16)), "roast_level": "Medium"})
+        for _ in range(200)
+    ]
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup(query)
+    per_lookup_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    print(f"   Lookup time: {per_lookup_ms:.3f} ms with {len(index)} entries")
+    assert per_lookup_ms < 1.0, f"Lookup took {per_lookup_ms:.3f} ms"
+
+
+def test_signature_speed():
+    """Signatures of maximum-length submissions stay sub-millisecond"""
+    rng = random.Random(3)
+    idea = " ".join(rng.choices(WORDS, k=400))[:2000]
+    users = " ".join(rng.choices(WORDS, k=100))[:500]
+    signature("PetRock", idea, users)
+    start = time.perf_counter()
+    for _ in range(50):
+        signature("PetRock", idea, users)
+    per_signature_ms = (time.perf_counter() - start) * 1000 / 50
+
+    print(f"   Signature time: {per_signature_ms:.3f} ms for a maximum-length submission")
+    assert per_signature_ms < 1.0, f"Signature took {per_signature_ms:.3f} ms"
+
+
+if __name__ == "__main__":
+    print("🔍 Testing near-duplicate roast index...")
+    test_near_duplicates_reuse_roast()
+    test_different_submissions_miss()
+    test_index_survives_restart()
+    test_outdated_signatures_are_dropped()
+    test_rebuild_from_rows()
+    test_swap_startup_name_handles_special_characters()
+    test_swap_startup_name_matches_whole_names_only()
+    test_memory_store_uses_the_lower_cap()
+    test_signature_speed()
+    test_lookup_speed()
+    print("🎉 Near-duplicate index tests passed!")
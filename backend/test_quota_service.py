@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Test script for roast quotas and bearer token handling.
+
+Checks SlidingWindowQuota on short windows (expiry, per-key isolation,
+multi-roast charges, refunds, key eviction and SQLite persistence in a
+temporary directory), RoastQuotas' 429 responses and 413 for charges larger
+than a whole window allows, the X-Forwarded-For hop
+counting, and the JWT claims cache. Then sends requests through the app
+with the fake backend and checks that only roasts that were actually
+generated stay charged, and that a bad token is served anonymously.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import jwt
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "20")
+
+from app.config.settings import settings
+from app.main import app
+from app.services.admission import roast_admission
+from app.services.auth_service import ClaimsCache, claims_cache, decode_jwt_token, get_optional_user
+from app.services.quota_service import RoastQuotas, SlidingWindowQuota, client_ip, roast_quotas
+from app.services.roast_service import roast_service
+
+
+def make_request(headers=None, peer="10.0.0.1") -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or [])],
+        "client": (peer, 50000),
+    })
+
+
+def test_window_expiry_and_key_isolation():
+    """Each key has its own limit, and roasts stop counting once they leave the window"""
+    window = SlidingWindowQuota(window_seconds=0.2)
+    assert window.consume("ip:a", limit=2) is None
+    assert window.consume("ip:a", limit=2) is None
+    retry_after = window.consume("ip:a", limit=2)
+    assert retry_after is not None and 0 < retry_after <= 0.2
+    assert window.consume("ip:b", limit=2) is None, "Other keys are not affected"
+
+    time.sleep(0.25)
+    assert window.remaining("ip:a", limit=2) == 2
+    assert window.consume("ip:a", limit=2) is None
+
+
+def test_multi_roast_charges_and_refunds():
+    """A charge of several roasts fits whole or not at all; refunds give back the newest roasts"""
+    window = SlidingWindowQuota(window_seconds=60)
+    assert window.consume("user:a", limit=5, cost=3) is None
+    assert window.consume("user:a", limit=5, cost=3) is not None
+    assert window.remaining("user:a", limit=5) == 2
+    assert window.consume("user:a", limit=5, cost=6) == 60, "A charge above the limit never fits"
+
+    window.refund("user:a", 2)
+    assert window.remaining("user:a", limit=5) == 4
+    window.refund("user:a", 10)
+    window.refund("user:missing", 1)
+    assert window.remaining("user:a", limit=5) == 5
+
+
+def test_least_recent_keys_are_evicted():
+    """Beyond max_keys the least recently charged key is forgotten"""
+    window = SlidingWindowQuota(window_seconds=60, max_keys=2)
+    for key in ("ip:a", "ip:b", "ip:a", "ip:c"):
+        window.consume(key, limit=10)
+    assert len(window) == 2
+    assert window.remaining("ip:b", limit=10) == 10
+    assert window.remaining("ip:a", limit=10) == 8
+
+
+def test_sqlite_persistence():
+    """Charges and refunds survive a restart; roasts outside the window are not reloaded"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quotas.db")
+        window = SlidingWindowQuota(window_seconds=60, db_path=path)
+        window.consume("user:a", limit=10, cost=4)
+        window.refund("user:a", 1)
+        window.consume("ip:b", limit=10)
+
+        reloaded = SlidingWindowQuota(window_seconds=60, db_path=path)
+        assert reloaded.remaining("user:a", limit=10) == 7
+        assert reloaded.remaining("ip:b", limit=10) == 9
+
+        time.sleep(0.15)
+        expired = SlidingWindowQuota(window_seconds=0.1, db_path=path)
+        assert len(expired) == 0
+
+
+def test_quotas_reject_with_retry_after():
+    """Signed-in users are counted by email, anonymous callers by IP, with different limits"""
+    quotas = RoastQuotas(SlidingWindowQuota(window_seconds=3600), user_limit=3, ip_limit=1)
+    user = {"email": "founder@example.com"}
+    charge = quotas.enforce(user, "10.0.0.1", cost=3)
+    assert charge.key == "user:founder@example.com" and charge.cost == 3
+    quotas.enforce(None, "10.0.0.1")
+
+    for caller in (user, None):
+        try:
+            quotas.enforce(caller, "10.0.0.1")
+            raise AssertionError("Expected a 429")
+        except HTTPException as e:
+            assert e.status_code == 429
+            assert 3500 < int(e.headers["Retry-After"]) <= 3600
+    assert quotas.snapshot()["rejected_users"] == 1 and quotas.snapshot()["rejected_ips"] == 1
+
+    charge.generated = 1
+    charge.settle()
+    charge.settle()
+    assert quotas.window.remaining("user:founder@example.com", 3) == 2
+    assert quotas.snapshot()["refunded_roasts"] == 2
+
+
+def test_charge_above_the_limit_is_rejected_outright():
+    """A batch larger than the caller's limit gets 413 without Retry-After and charges nothing"""
+    quotas = RoastQuotas(SlidingWindowQuota(window_seconds=3600), user_limit=3, ip_limit=1)
+    try:
+        quotas.enforce(None, "10.0.0.1", cost=2)
+        raise AssertionError("Expected a 413")
+    except HTTPException as e:
+        assert e.status_code == 413 and not e.headers
+    assert quotas.window.remaining("ip:10.0.0.1", 1) == 1
+    assert quotas.snapshot()["rejected_ips"] == 1
+
+    if settings.llm_backend != "fake":
+        return
+    previous = (settings.quota_enabled, roast_quotas.window)
+    settings.quota_enabled = True
+    roast_quotas.window = SlidingWindowQuota(window_seconds=3600)
+    body = {
+        "startup_name": "QuotaBatch",
+        "idea_description": "Rocks that come in bulk packs for teams that cannot agree on one rock",
+        "target_users": "Procurement departments",
+        "budget": "$5k",
+        "roast_level": "Soft",
+    }
+    try:
+        response = TestClient(app).post("/roast/batch", json={"requests": [body] * (settings.quota_ip_roasts + 1)})
+        assert response.status_code == 413 and "Retry-After" not in response.headers
+        assert roast_quotas.window.remaining("ip:testclient", settings.quota_ip_roasts) == settings.quota_ip_roasts
+    finally:
+        settings.quota_enabled, roast_quotas.window = previous
+
+
+def test_client_ip_counts_trusted_hops():
+    """The client IP is the entry added by the outermost trusted proxy, not one the client sent"""
+    hops = settings.quota_forwarded_for_hops
+    forwarded = [("X-Forwarded-For", "1.1.1.1, 203.0.113.7, 10.0.0.2")]
+    try:
+        settings.quota_forwarded_for_hops = 0
+        assert client_ip(make_request(forwarded)) == "10.0.0.1"
+
+        settings.quota_forwarded_for_hops = 1
+        assert client_ip(make_request(forwarded)) == "10.0.0.2"
+        settings.quota_forwarded_for_hops = 2
+        assert client_ip(make_request(forwarded)) == "203.0.113.7"
+        split = [("X-Forwarded-For", "1.1.1.1"), ("X-Forwarded-For", "203.0.113.7")]
+        assert client_ip(make_request(split)) == "1.1.1.1"
+
+        settings.quota_forwarded_for_hops = 4
+        assert client_ip(make_request(forwarded)) == "10.0.0.1", "Too few entries: the header is not trusted"
+    finally:
+        settings.quota_forwarded_for_hops = hops
+
+
+def test_claims_cache_expiry_and_eviction():
+    """Expired tokens are dropped on lookup and the least recently used entries are evicted"""
+    cache = ClaimsCache(max_entries=2)
+    cache.set("expired", {"email": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+    assert cache.snapshot()["entries"] == 0
+
+    cache.set("first", {"email": "a", "exp": time.time() + 60})
+    cache.set("second", {"email": "b", "exp": time.time() + 60})
+    assert cache.get("first")["email"] == "a"
+    cache.set("third", {"email": "c", "exp": time.time() + 60})
+    assert cache.get("second") is None
+    assert cache.get("first") is not None and cache.get("third") is not None
+    assert cache.snapshot()["hits"] == 3
+
+
+def test_decode_jwt_token():
+    """Valid tokens are verified once and then cached; bad and expired tokens decode to None"""
+    secret = settings.jwt_secret_key
+    settings.jwt_secret_key = "test-secret"
+    try:
+        token = jwt.encode({"email": "founder@example.com", "exp": time.time() + 60}, "test-secret", algorithm="HS256")
+        hits = claims_cache.hits
+        assert decode_jwt_token(token)["email"] == "founder@example.com"
+        assert decode_jwt_token(token)["email"] == "founder@example.com"
+        assert claims_cache.hits == hits + 1
+
+        forged = jwt.encode({"email": "founder@example.com", "exp": time.time() + 60}, "wrong", algorithm="HS256")
+        expired = jwt.encode({"email": "founder@example.com", "exp": time.time() - 60}, "test-secret", algorithm="HS256")
+        assert decode_jwt_token(forged) is None
+        assert decode_jwt_token(expired) is None
+        assert decode_jwt_token("not a token") is None
+    finally:
+        settings.jwt_secret_key = secret
+
+
+def test_only_generated_roasts_stay_charged():
+    """Cache hits, failed, shed and invalid requests do not use up the quota, and a bad token is anonymous"""
+    if settings.llm_backend != "fake":
+        print("   Skipping endpoint test: LLM_BACKEND is not fake")
+        return
+
+    previous = (settings.quota_enabled, settings.roast_cache_enabled, settings.near_duplicate_enabled, roast_quotas.window)
+    settings.quota_enabled = True
+    settings.roast_cache_enabled = True
+    settings.near_duplicate_enabled = False
+    roast_quotas.window = SlidingWindowQuota(window_seconds=3600)
+    client = TestClient(app)
+    key = "ip:testclient"
+    body = {
+        "startup_name": f"QuotaRock {time.time()}",
+        "idea_description": "Rocks that count how many times you picked them up",
+        "target_users": "Quantified-self enthusiasts",
+        "budget": "$5k",
+        "roast_level": "Soft",
+    }
+    try:
+        assert client.post("/roast", json=body).status_code == 200
+        assert roast_quotas.window.remaining(key, settings.quota_ip_roasts) == settings.quota_ip_roasts - 1
+
+        # Served from the cache, and with a token that does not verify
+        response = client.post("/roast", json=body, headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 200
+        assert roast_quotas.window.remaining(key, settings.quota_ip_roasts) == settings.quota_ip_roasts - 1
+
+        active = roast_admission.active
+        roast_admission.active = roast_admission.max_active
+        queue = roast_admission.max_queue
+        roast_admission.max_queue = 0
+        try:
+            assert client.post("/roast", json=dict(body, startup_name="Shed")).status_code == 429
+        finally:
+            roast_admission.active, roast_admission.max_queue = active, queue
+        assert roast_quotas.window.remaining(key, settings.quota_ip_roasts) == settings.quota_ip_roasts - 1
+
+        def unavailable(prompt, generation_config=None):
+            raise ConnectionError("Gemini unavailable")
+
+        routes = roast_service.router.routes
+        originals = [route.backend.generate for route in routes]
+        for route in routes:
+            route.backend.generate = unavailable
+        try:
+            assert client.post("/roast", json=dict(body, startup_name="Doomed")).status_code >= 500
+        finally:
+            for route, original in zip(routes, originals):
+                route.backend.generate = original
+        assert roast_quotas.window.remaining(key, settings.quota_ip_roasts) == settings.quota_ip_roasts - 1
+
+        invalid = dict(body, startup_name="")
+        assert client.post("/roast", json=invalid).status_code == 422
+        assert roast_quotas.window.remaining(key, settings.quota_ip_roasts) == settings.quota_ip_roasts - 1
+    finally:
+        settings.quota_enabled, settings.roast_cache_enabled, settings.near_duplicate_enabled, roast_quotas.window = previous
+
+
+def test_invalid_token_is_anonymous():
+    """An invalid bearer token is ignored rather than rejected"""
+    request = make_request([("Authorization", "Bearer not-a-token")])
+    assert asyncio.run(get_optional_user(request)) is None
+
+
+if __name__ == "__main__":
+    print("🎟️ Testing roast quotas and bearer tokens...")
+    test_window_expiry_and_key_isolation()
+    test_multi_roast_charges_and_refunds()
+    test_least_recent_keys_are_evicted()
+    test_sqlite_persistence()
+    test_quotas_reject_with_retry_after()
+    test_charge_above_the_limit_is_rejected_outright()
+    test_client_ip_counts_trusted_hops()
+    test_claims_cache_expiry_and_eviction()
+    test_decode_jwt_token()
+    test_only_generated_roasts_stay_charged()
+    test_invalid_token_is_anonymous()
+    print("🎉 Quota and token tests passed!")
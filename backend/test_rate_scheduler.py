@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound Gemini rate scheduler.
+
+Uses budgets small enough that a test can drain them and watch them refill,
+and checks that TokenBucket refills continuously up to its capacity, that
+settling a reservation corrects the token budget both ways, that queued
+calls are released by lane before arrival order, and that a call cancelled
+while queued leaves nothing behind. Finally checks that a roast call
+cancelled while waiting for budget frees the circuit breaker's half-open
+probe instead of leaving the model rejecting calls, and that failed or
+cancelled roast calls and streams hand back the output budget they reserved.
+"""
+
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest
+from app.services.rate_scheduler import OutboundScheduler, TokenBucket
+from app.services.resilience import CircuitBreaker
+from app.services.roast_service import roast_service
+
+
+def test_bucket_refills_up_to_capacity():
+    """An empty bucket refills at per_minute / 60 per second and never beyond capacity"""
+    bucket = TokenBucket(per_minute=6000)
+    bucket.take(6000)
+    assert 0.9 < bucket.wait_time(100) <= 1.0
+
+    time.sleep(0.1)
+    assert 0.8 < bucket.wait_time(100) < 0.95
+    assert bucket.wait_time(100000) > 0, "Amounts above capacity wait for a full bucket"
+
+    bucket.refund(100000)
+    assert bucket.level == bucket.capacity
+    bucket.drain()
+    assert bucket.level <= 0
+
+
+def test_settle_corrects_the_reservation():
+    """Unused tokens go back, extra tokens are taken, and an unsent call returns its request"""
+    async def run():
+        scheduler = OutboundScheduler("test", rpm=60, tpm=60000)
+        await scheduler.acquire(10000, lane="anonymous")
+        assert abs(scheduler.tokens.level - 50000) < 50
+        assert abs(scheduler.requests.level - 59) < 0.1
+
+        scheduler.settle(10000, 2000)
+        assert abs(scheduler.tokens.level - 58000) < 50
+        scheduler.settle(2000, 12000)
+        assert abs(scheduler.tokens.level - 48000) < 50
+
+        scheduler.settle(0, 0, released=True)
+        assert abs(scheduler.requests.level - 60) < 0.1
+        assert scheduler.snapshot()["lanes"]["anonymous"]["granted"] == 1
+
+    asyncio.run(run())
+
+
+def test_queued_calls_are_released_by_lane():
+    """When the budget is short, authenticated calls go before anonymous ones, then batch"""
+    async def run():
+        scheduler = OutboundScheduler("test", rpm=1200, tpm=1000000)
+        scheduler.requests.drain()
+        order = []
+
+        async def call(lane):
+            await scheduler.acquire(100, lane=lane)
+            order.append(lane)
+
+        tasks = []
+        for lane in ("batch", "anonymous", "batch", "authenticated"):
+            tasks.append(asyncio.ensure_future(call(lane)))
+            await asyncio.sleep(0)
+        assert scheduler.queue_depth == 4
+
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+        assert order == ["authenticated", "anonymous", "batch", "batch"]
+        lanes = scheduler.snapshot()["lanes"]
+        assert lanes["batch"]["delayed"] == 2 and lanes["authenticated"]["avg_wait_seconds"] > 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_queued_call_leaves_no_trace():
+    """A call cancelled while waiting is dropped from the queue and never granted"""
+    async def run():
+        scheduler = OutboundScheduler("test", rpm=600, tpm=1000000)
+        scheduler.requests.drain()
+        cancelled = asyncio.ensure_future(scheduler.acquire(100, lane="authenticated"))
+        behind = asyncio.ensure_future(scheduler.acquire(100, lane="anonymous"))
+        await asyncio.sleep(0.01)
+        assert scheduler.queue_depth == 2
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert scheduler.queue_depth == 1
+
+        await asyncio.wait_for(behind, timeout=1)
+        assert scheduler.granted["authenticated"] == 0 and scheduler.granted["anonymous"] == 1
+
+    asyncio.run(run())
+
+
+def test_cancel_while_reserving_frees_the_probe():
+    """A roast call cancelled while waiting for budget does not leave the half-open probe taken"""
+    async def run():
+        routes = roast_service.router.routes
+        originals = [(route.breaker, route.scheduler) for route in routes]
+        enabled = settings.gemini_rate_limit_enabled
+        settings.gemini_rate_limit_enabled = True
+        for route in routes:
+            route.breaker = CircuitBreaker(route.name, failure_rate=0.5, min_calls=1, window_seconds=60, open_seconds=30)
+            route.breaker.before_call()
+            route.breaker.record_failure()
+            route.breaker._opened_at -= 30
+            route.scheduler = OutboundScheduler(route.name, rpm=1, tpm=1000000)
+            route.scheduler.requests.drain()
+        try:
+            call = asyncio.ensure_future(roast_service._call_model("full", "prompt"))
+            await asyncio.sleep(0.05)
+            probing = [route for route in routes if route.breaker._probe_in_flight]
+            assert len(probing) == 1 and probing[0].scheduler.queue_depth == 1
+
+            call.cancel()
+            await asyncio.gather(call, return_exceptions=True)
+            assert not probing[0].breaker._probe_in_flight
+            assert probing[0].breaker.state == "half_open"
+            assert probing[0].scheduler.queue_depth == 0
+        finally:
+            for route, (breaker, scheduler) in zip(routes, originals):
+                route.breaker, route.scheduler = breaker, scheduler
+            settings.gemini_rate_limit_enabled = enabled
+
+    asyncio.run(run())
+
+
+def test_failed_stream_settles_its_reservation():
+    """A stream that fails is charged for its prompt only, not the full output budget"""
+    class BrokenStream:
+        def stream(self, prompt, generation_config=None):
+            raise RuntimeError("stream dropped")
+
+    async def give_up(request):
+        raise HTTPException(status_code=503, detail="unavailable")
+
+    async def run():
+        routes = roast_service.router.routes
+        originals = [(route.breaker, route.scheduler, route.backend) for route in routes]
+        enabled = settings.gemini_rate_limit_enabled
+        settings.gemini_rate_limit_enabled = True
+        for route in routes:
+            route.breaker = CircuitBreaker(route.name, failure_rate=0.5, min_calls=100, window_seconds=60, open_seconds=30)
+            route.scheduler = OutboundScheduler(route.name, rpm=60, tpm=60000)
+            route.backend = BrokenStream()
+        roast_service.analyze_startup = give_up
+        request = RoastRequest(
+            startup_name="StreamSettle",
+            idea_description="A scheduler test for streams that break before sending a single roast section",
+            target_users="Rate limiter maintainers checking token budgets",
+            budget="$1k",
+            roast_level="Medium"
+        )
+        try:
+            events = [event async for event, _ in roast_service.stream_startup(request)]
+            assert events == ["error"]
+            prompt_tokens = len(roast_service._build_prompt(request)) // 4
+            charged = [60000 - route.scheduler.tokens.level for route in routes]
+            assert max(charged) < prompt_tokens + 50, charged
+        finally:
+            for route, (breaker, scheduler, backend) in zip(routes, originals):
+                route.breaker, route.scheduler, route.backend = breaker, scheduler, backend
+            del roast_service.analyze_startup
+            settings.gemini_rate_limit_enabled = enabled
+
+    asyncio.run(run())
+
+
+def test_cancelled_calls_settle_their_reservations():
+    """A call or stream the client abandons is charged for its prompt only, not the full output budget"""
+    class SlowBackend:
+        def generate(self, prompt, generation_config=None):
+            time.sleep(0.3)
+
+        def stream(self, prompt, generation_config=None):
+            yield '{"brutal_roast": "Slow roast", '
+            time.sleep(0.3)
+
+    async def run():
+        routes = roast_service.router.routes
+        originals = [(route.breaker, route.scheduler, route.backend) for route in routes]
+        previous = (settings.gemini_rate_limit_enabled, settings.gemini_hedge_enabled,
+                    settings.roast_cache_enabled, settings.near_duplicate_enabled)
+        settings.gemini_rate_limit_enabled = True
+        settings.gemini_hedge_enabled = False
+        settings.roast_cache_enabled = False
+        settings.near_duplicate_enabled = False
+        request = RoastRequest(
+            startup_name="CancelSettle",
+            idea_description="A scheduler test for calls whose clients hang up before the model answers",
+            target_users="Rate limiter maintainers checking token budgets",
+            budget="$1k",
+            roast_level="Medium"
+        )
+        prompt = roast_service._build_prompt(request)
+
+        def reset_routes():
+            for route in routes:
+                route.breaker = CircuitBreaker(route.name, failure_rate=0.5, min_calls=100, window_seconds=60, open_seconds=30)
+                route.scheduler = OutboundScheduler(route.name, rpm=60, tpm=60000)
+                route.backend = SlowBackend()
+
+        def charged():
+            return max(60000 - route.scheduler.tokens.level for route in routes)
+
+        try:
+            reset_routes()
+            call = asyncio.ensure_future(roast_service._call_model("full", prompt))
+            await asyncio.sleep(0.05)
+            call.cancel()
+            await asyncio.gather(call, return_exceptions=True)
+            assert charged() < len(prompt) // 4 + 50
+
+            reset_routes()
+            stream = roast_service.stream_startup(request)
+            assert (await stream.__anext__())[0] == "field"
+            await stream.aclose()
+            assert charged() < len(prompt) // 4 + 50
+        finally:
+            for route, (breaker, scheduler, backend) in zip(routes, originals):
+                route.breaker, route.scheduler, route.backend = breaker, scheduler, backend
+            (settings.gemini_rate_limit_enabled, settings.gemini_hedge_enabled,
+             settings.roast_cache_enabled, settings.near_duplicate_enabled) = previous
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("⏳ Testing outbound rate scheduler...")
+    test_bucket_refills_up_to_capacity()
+    test_settle_corrects_the_reservation()
+    test_queued_calls_are_released_by_lane()
+    test_cancelled_queued_call_leaves_no_trace()
+    test_cancel_while_reserving_frees_the_probe()
+    test_failed_stream_settles_its_reservation()
+    test_cancelled_calls_settle_their_reservations()
+    print("🎉 Rate scheduler tests passed!")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test script for the Gemini circuit breaker and hedged calls.
+
+Drives CircuitBreaker through its closed, open and half-open states with
+open_seconds short enough to wait out, and runs hedged_call on attempts
+whose delay and outcome are scripted per attempt. Checks that the breaker
+trips only on enough failures, lets exactly one probe through, and recovers
+when the probe is abandoned, that hedging starts a second attempt only
+for slow calls and cancels whichever attempt loses, and that the model
+router only counts a request as fast-routed when the fast model goes first.
+"""
+
+import asyncio
+import time
+
+from app.services.llm_backend import create_backend
+from app.services.model_router import ModelRoute, ModelRouter
+from app.services.resilience import CircuitBreaker, CircuitOpenError, hedged_call
+
+
+def make_breaker(open_seconds=0.05) -> CircuitBreaker:
+    return CircuitBreaker("test", failure_rate=0.5, min_calls=4, window_seconds=60, open_seconds=open_seconds)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_trips_on_failure_rate():
+    """The breaker stays closed below min_calls or below the failure rate, then opens"""
+    breaker = make_breaker(open_seconds=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed", "Three calls are below min_calls"
+
+    for _ in range(5):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed", "4 failures in 9 calls is below the rate"
+    breaker.record_failure()
+    assert breaker.state == "open", "5 failures in 10 calls reaches the rate"
+
+    breaker = make_breaker(open_seconds=30)
+    trip(breaker)
+    assert breaker.state == "open"
+    try:
+        breaker.before_call()
+        raise AssertionError("Expected the open breaker to reject the call")
+    except CircuitOpenError as e:
+        assert 1 <= e.retry_after <= 30
+    snapshot = breaker.snapshot()
+    assert snapshot["times_opened"] == 1 and snapshot["rejected_calls"] == 1
+
+
+def test_half_open_allows_one_probe():
+    """After open_seconds one probe goes through; its outcome closes or reopens the breaker"""
+    breaker = make_breaker()
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+
+    breaker.before_call()
+    try:
+        breaker.before_call()
+        raise AssertionError("Expected a second probe to be rejected")
+    except CircuitOpenError:
+        pass
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["window_calls"] == 1
+
+
+def test_abandoned_probe_frees_the_slot():
+    """A probe cancelled before it finished lets the next call probe immediately"""
+    breaker = make_breaker(open_seconds=30)
+    trip(breaker)
+    breaker._opened_at -= 30
+    breaker.before_call()
+    breaker.record_abandoned()
+
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def scripted_call(script):
+    """Build a call factory whose n-th attempt sleeps and then returns or raises script[n]"""
+    attempts = []
+
+    async def call():
+        number = len(attempts)
+        delay, outcome = script[number]
+        attempts.append("started")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            attempts[number] = "cancelled"
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return call, attempts
+
+
+def test_fast_call_is_not_hedged():
+    """A primary that finishes before the hedge delay is the only attempt"""
+    async def run():
+        call, attempts = scripted_call([(0.01, "primary")])
+        assert await hedged_call(call, hedge_delay=0.1) == ("primary", False, False)
+        call, attempts = scripted_call([(0.05, "primary")])
+        assert await hedged_call(call, hedge_delay=None) == ("primary", False, False)
+        assert len(attempts) == 1
+
+    asyncio.run(run())
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    """A slow primary gets a hedge; the first success wins and the other attempt is cancelled"""
+    async def run():
+        call, attempts = scripted_call([(1.0, "primary"), (0.01, "hedge")])
+        started = time.perf_counter()
+        assert await hedged_call(call, hedge_delay=0.05) == ("hedge", True, True)
+        assert time.perf_counter() - started < 0.5
+        await asyncio.sleep(0)
+        assert attempts == ["cancelled", "started"]
+
+        call, attempts = scripted_call([(0.06, "primary"), (1.0, "hedge")])
+        assert await hedged_call(call, hedge_delay=0.05) == ("primary", True, False)
+        await asyncio.sleep(0)
+        assert attempts[1] == "cancelled"
+
+    asyncio.run(run())
+
+
+def test_hedge_survives_a_failed_attempt():
+    """One failing attempt does not fail the call; it fails only when every attempt has failed"""
+    async def run():
+        call, _ = scripted_call([(0.06, ConnectionError("primary down")), (0.1, "hedge")])
+        assert await hedged_call(call, hedge_delay=0.05) == ("hedge", True, True)
+
+        call, _ = scripted_call([(0.06, ConnectionError("primary down")), (0.01, TimeoutError("hedge slow"))])
+        try:
+            await hedged_call(call, hedge_delay=0.05)
+            raise AssertionError("Expected the call to fail")
+        except (ConnectionError, TimeoutError):
+            pass
+
+    asyncio.run(run())
+
+
+def test_unhealthy_fast_model_is_not_counted_as_fast_routed():
+    """A Soft roast goes to the fast model first unless its breaker is open"""
+    primary, fast = ModelRoute("primary", create_backend("primary")), ModelRoute("fast", create_backend("fast"))
+    router = ModelRouter([primary, fast], fast_model="fast")
+    assert router.candidates("Soft") == [fast, primary]
+    assert router.candidates("Nuclear") == [primary, fast]
+    assert router.fast_routed == 1
+
+    fast.breaker = make_breaker(open_seconds=60)
+    trip(fast.breaker)
+    assert router.candidates("Soft") == [primary, fast]
+    assert router.fast_routed == 1
+
+
+if __name__ == "__main__":
+    print("🛡️ Testing circuit breaker and hedged calls...")
+    test_breaker_trips_on_failure_rate()
+    test_half_open_allows_one_probe()
+    test_abandoned_probe_frees_the_slot()
+    test_fast_call_is_not_hedged()
+    test_slow_call_is_hedged_and_loser_cancelled()
+    test_hedge_survives_a_failed_attempt()
+    test_unhealthy_fast_model_is_not_counted_as_fast_routed()
+    print("🎉 Resilience tests passed!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for coalescing identical in-flight requests.
+
+Drives SingleFlight with coroutines that block on asyncio events, so each
+test controls when the shared work finishes. Checks that concurrent callers
+share one execution, that a leader's failure reaches every waiter without
+poisoning the key, and that a caller cancelled while waiting neither cancels
+the shared work nor stays counted as a waiter.
+"""
+
+import asyncio
+
+from app.services.single_flight import SingleFlight
+
+
+class SharedWork:
+    """Counts executions and finishes (or fails) when told to"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return f"result {self.calls}"
+
+
+def test_concurrent_callers_share_one_execution():
+    """Callers with the same key get the leader's result; other keys run separately"""
+    async def run():
+        group, work = SingleFlight(), SharedWork()
+        callers = [asyncio.ensure_future(group.do("same", work)) for _ in range(4)]
+        other = asyncio.ensure_future(group.do("other", work))
+        await asyncio.sleep(0)
+        assert group.snapshot()["current_waiters"] == 5
+
+        work.release.set()
+        assert await asyncio.gather(*callers) == ["result 1"] * 4
+        assert await other == "result 2"
+        snapshot = group.snapshot()
+        assert snapshot["leaders"] == 2 and snapshot["coalesced_waiters"] == 3
+        assert snapshot["in_flight_keys"] == 0 and snapshot["current_waiters"] == 0
+
+    asyncio.run(run())
+
+
+def test_leader_failure_reaches_every_waiter():
+    """Every waiter sees the exception, and the next call for the key starts fresh"""
+    async def run():
+        group, work = SingleFlight(), SharedWork()
+        work.error = ConnectionError("Gemini unavailable")
+        callers = [asyncio.ensure_future(group.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+        assert group.snapshot()["failures"] == 1
+
+        work.error = None
+        assert await group.do("key", work) == "result 2"
+        assert work.calls == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_work():
+    """A disconnecting caller, even the leader, leaves the generation running for the others"""
+    async def run():
+        group, work = SingleFlight(), SharedWork()
+        leader = asyncio.ensure_future(group.do("key", work))
+        follower = asyncio.ensure_future(group.do("key", work))
+        await asyncio.sleep(0)
+        assert group.snapshot()["current_waiters"] == 2
+
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        assert group.snapshot()["current_waiters"] == 1
+        assert group.snapshot()["in_flight_keys"] == 1
+
+        work.release.set()
+        assert await follower == "result 1"
+        assert work.calls == 1
+        assert group.snapshot()["current_waiters"] == 0
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🔗 Testing single-flight coalescing...")
+    test_concurrent_callers_share_one_execution()
+    test_leader_failure_reaches_every_waiter()
+    test_cancelled_waiter_does_not_cancel_shared_work()
+    print("🎉 Single-flight tests passed!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process roast statistics.
+
+Swaps get_roast_counts for a CountingDatabase whose rows can be changed
+behind the counters' back, and checks that /stats stays unavailable until
+the first successful seed, follows saves without querying again, keeps saves
+that land while a reconcile query is in flight, and picks up drift on the
+next reconciliation.
+"""
+
+import asyncio
+
+from app.services.async_db_service import async_db_service
+from app.services.stats_service import RoastStats
+
+
+class CountingDatabase:
+    """Counts rows per roast level; count queries can be slowed down"""
+
+    def __init__(self):
+        self.levels = {"Soft": 2, "Nuclear": 1}
+        self.down = False
+        self.delay = 0.0
+        self.queries = 0
+
+    async def get_roast_counts(self):
+        self.queries += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            return None
+        return sum(self.levels.values()), dict(self.levels)
+
+    def save(self, stats: RoastStats, level: str) -> None:
+        self.levels[level] = self.levels.get(level, 0) + 1
+        stats.record_saved([{"roast_level": level}])
+
+
+def run_with_database(scenario):
+    """Run a scenario against fresh counters backed by a CountingDatabase"""
+    database = CountingDatabase()
+    original = async_db_service.get_roast_counts
+    async_db_service.get_roast_counts = database.get_roast_counts
+    try:
+        asyncio.run(scenario(database, RoastStats(reconcile_interval_seconds=300)))
+    finally:
+        async_db_service.get_roast_counts = original
+
+
+def test_seed_and_record():
+    """Stats are unavailable until seeded, then follow saves from memory"""
+    async def scenario(database, stats):
+        database.down = True
+        assert not await stats.reconcile()
+        assert stats.get_stats() is None
+
+        database.down = False
+        assert await stats.reconcile()
+        database.save(stats, "Medium")
+        database.save(stats, "Nuclear")
+        result = stats.get_stats()
+        assert result["total_roasts"] == 5
+        assert result["roast_levels"] == {"Soft": 2, "Medium": 1, "Nuclear": 2}
+        assert result["last_updated"] >= result["last_reconciled"]
+        assert database.queries == 2
+
+    run_with_database(scenario)
+
+
+def test_saves_during_reconcile_are_kept():
+    """A save that completes while the count query runs is not lost or double counted"""
+    async def scenario(database, stats):
+        await stats.reconcile()
+        database.delay = 0.1
+        reconcile = asyncio.create_task(stats.reconcile())
+        await asyncio.sleep(0.05)
+        # Saved after the query has read the table
+        stats.record_saved([{"roast_level": "Soft"}])
+        await reconcile
+        assert stats.get_stats()["total_roasts"] == 4
+        assert stats.get_stats()["roast_levels"]["Soft"] == 3
+        assert stats.snapshot()["last_drift"] == 0
+
+    run_with_database(scenario)
+
+
+def test_reconcile_corrects_drift():
+    """Roasts saved by other processes show up after the next reconciliation"""
+    async def scenario(database, stats):
+        await stats.start()
+        await asyncio.sleep(0.05)
+        assert stats.get_stats()["total_roasts"] == 3
+
+        database.levels["Medium"] = 4
+        assert stats.get_stats()["total_roasts"] == 3
+        await stats.reconcile()
+        assert stats.get_stats()["total_roasts"] == 7
+        assert stats.snapshot()["last_drift"] == 4
+        await stats.stop()
+
+    run_with_database(scenario)
+
+
+if __name__ == "__main__":
+    print("📊 Testing roast statistics...")
+    test_seed_and_record()
+    test_saves_during_reconcile_are_kept()
+    test_reconcile_corrects_drift()
+    print("🎉 Roast statistics tests passed!")
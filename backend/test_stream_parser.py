@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental roast stream parser and the /roast/stream
+fallback.
+
+Feeds one roast document through IncrementalRoastParser split at every
+possible chunk boundary, so splits land inside keys, inside escape sequences
+and between a backslash and the character it escapes, and checks that the
+same field events come out every time. Then breaks a model stream halfway
+through and checks that RoastService.stream_startup tells the client to
+discard the fields it already sent before the regenerated roast arrives,
+and that a stream skips a model whose half-open probe is already running.
+"""
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "20")
+
+from app.config.settings import settings
+from app.schemas.roast import RoastRequest
+from app.services.llm_backend import create_backend
+from app.services.model_router import ModelRoute, ModelRouter
+from app.services.resilience import CircuitBreaker
+from app.services.roast_service import roast_service
+from app.services.stream_parser import IncrementalRoastParser
+
+ROAST = {
+    "brutal_roast": "A \"smart\" rock?\nIt's still a rock \\ paperweight.",
+    "honest_feedback": "Café owners won't pay €20 for this. Tab\there.",
+    "ignored_section": {"brutal_roast": "nested keys are not fields", "items": ["not a tip"]},
+    "competitor_reality_check": "Real rocks are free: {\"price\": 0}, [sic].",
+    "survival_tips": ["Tip with \"quotes\"", "Tip, with: punctuation", "Tip \\ with backslash"],
+    "pitch_rewrite": "Mindfulness you can hold.",
+}
+DOCUMENT = "Sure! Here it is:\n```json\n" + json.dumps(ROAST, indent=2) + "\n```"
+# The escaped form contains \u sequences that the parser must decode too
+ASCII_DOCUMENT = "```json\n" + json.dumps(ROAST, ensure_ascii=True) + "\n```"
+
+EXPECTED = [
+    ("brutal_roast", None, ROAST["brutal_roast"]),
+    ("honest_feedback", None, ROAST["honest_feedback"]),
+    ("competitor_reality_check", None, ROAST["competitor_reality_check"]),
+    ("survival_tips", 0, ROAST["survival_tips"][0]),
+    ("survival_tips", 1, ROAST["survival_tips"][1]),
+    ("survival_tips", 2, ROAST["survival_tips"][2]),
+    ("pitch_rewrite", None, ROAST["pitch_rewrite"]),
+]
+
+
+def parse_in_chunks(document: str, chunks) -> list:
+    parser = IncrementalRoastParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    assert parser.text == document
+    return events
+
+
+def test_every_two_chunk_split():
+    """Splitting the document anywhere, including inside keys and escapes, gives the same events"""
+    for document in (DOCUMENT, ASCII_DOCUMENT):
+        for split in range(len(document) + 1):
+            events = parse_in_chunks(document, [document[:split], document[split:]])
+            assert events == EXPECTED, f"Split at {split}: {document[max(0, split - 10):split]!r}|{document[split:split + 10]!r}"
+
+
+def test_single_character_chunks():
+    """Character-by-character streaming gives the same events, each as soon as its value closes"""
+    parser = IncrementalRoastParser()
+    closed_at = {}
+    for position, ch in enumerate(ASCII_DOCUMENT):
+        for field, index, value in parser.feed(ch):
+            closed_at[(field, index)] = position
+            assert ch == '"', "Events fire on the closing quote of the value"
+    assert len(closed_at) == len(EXPECTED)
+    assert closed_at[("brutal_roast", None)] < ASCII_DOCUMENT.index('"honest_feedback"')
+
+
+def test_invalid_escape_is_tolerated():
+    """A value with an invalid escape sequence is still reported"""
+    events = parse_in_chunks('{"brutal_roast": "50\\% off', ['{"brutal_roast": "50\\', '% off'])
+    assert events == []
+    parser = IncrementalRoastParser()
+    events = parser.feed('{"brutal_roast": "50\\% off"}')
+    assert events == [("brutal_roast", None, "50\\% off")]
+
+
+def test_broken_stream_resets_sent_fields():
+    """If the model stream fails after fields went out, a reset precedes the regenerated roast"""
+    async def run():
+        request = RoastRequest(
+            startup_name="StreamBreaker",
+            idea_description="A streaming service that only streams the first half of every movie",
+            target_users="People who never finish anything",
+            budget="$10k",
+            roast_level="Soft"
+        )
+        settings.roast_cache_enabled = False
+        settings.near_duplicate_enabled = False
+
+        def broken_stream(prompt, generation_config=None):
+            yield '{"brutal_roast": "Half a roast", "honest_feedback": "cut'
+            raise ConnectionError("Stream dropped")
+
+        routes = roast_service.router.routes
+        originals = [route.backend.stream for route in routes]
+        for route in routes:
+            route.backend.stream = broken_stream
+        try:
+            events = [event async for event in roast_service.stream_startup(request)]
+        finally:
+            for route, original in zip(routes, originals):
+                route.backend.stream = original
+            settings.roast_cache_enabled = True
+            settings.near_duplicate_enabled = True
+
+        names = [name for name, _ in events]
+        assert names == ["field", "reset", "complete"], names
+        assert events[0][1] == {"field": "brutal_roast", "value": "Half a roast"}
+
+    asyncio.run(run())
+
+
+def test_stream_skips_a_model_that_rejects_calls():
+    """A stream moves on to the next model when the first one's probe is already in flight"""
+    async def run():
+        request = RoastRequest(
+            startup_name="ProbeDodger",
+            idea_description="A status page that only reports outages after they are already over",
+            target_users="Engineers who like good news",
+            budget="$20k",
+            roast_level="Medium"
+        )
+        primary = ModelRoute("primary", create_backend("primary"))
+        fallback = ModelRoute("fallback", create_backend("fallback"))
+        primary.breaker = CircuitBreaker("primary", failure_rate=0.5, min_calls=1, window_seconds=60, open_seconds=30)
+        primary.breaker.before_call()
+        primary.breaker.record_failure()
+        primary.breaker._opened_at -= 30
+        primary.breaker.before_call()  # Another request holds the half-open probe
+
+        original_router = roast_service.router
+        roast_service.router = ModelRouter([primary, fallback])
+        cache_enabled, near_duplicate_enabled = settings.roast_cache_enabled, settings.near_duplicate_enabled
+        settings.roast_cache_enabled = False
+        settings.near_duplicate_enabled = False
+        try:
+            events = [name async for name, _ in roast_service.stream_startup(request)]
+        finally:
+            roast_service.router = original_router
+            settings.roast_cache_enabled = cache_enabled
+            settings.near_duplicate_enabled = near_duplicate_enabled
+
+        assert events[0] == "field" and events[-1] == "complete", events
+        assert primary.requests == 0 and fallback.requests == 1
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🌊 Testing stream parser...")
+    test_every_two_chunk_split()
+    test_single_character_chunks()
+    test_invalid_escape_is_tolerated()
+    test_broken_stream_resets_sent_fields()
+    test_stream_skips_a_model_that_rejects_calls()
+    print("🎉 Stream parser tests passed!")
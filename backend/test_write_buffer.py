@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind roast persistence buffer.
+
+Swaps the bulk insert for a FlakyDatabase that can be switched off, and
+checks batching by size and by interval, spilling to disk while inserts
+fail, replay once they succeed again (including by a restarted buffer) and
+the final flush on shutdown. Spill files live in a temporary directory.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.schemas.roast import RoastRequest, RoastResponse
+from app.services.async_db_service import async_db_service
+from app.services.write_buffer import RoastWriteBuffer
+
+REQUEST = RoastRequest(
+    startup_name="PetRock",
+    idea_description="AI-powered rocks that provide emotional support to busy professionals",
+    target_users="Millennials who want pets but can't commit to real animals",
+    budget="$50k",
+    roast_level="Nuclear"
+)
+ROAST = RoastResponse(
+    brutal_roast="It is a rock.",
+    honest_feedback="Nobody needs a smart rock.",
+    competitor_reality_check="Real rocks are free.",
+    survival_tips=[f"Tip {i}" for i in range(7)],
+    pitch_rewrite="Mindfulness you can hold."
+)
+
+
+class FlakyDatabase:
+    """Records bulk inserts; fails them while `down` is set"""
+
+    def __init__(self):
+        self.down = False
+        self.batches = []
+
+    async def insert_roast_records(self, rows):
+        if self.down:
+            return None
+        self.batches.append(list(rows))
+        return rows
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def run_with_database(scenario):
+    """Run a scenario against a fresh buffer backed by a FlakyDatabase"""
+    database = FlakyDatabase()
+    original = async_db_service.insert_roast_records
+    async_db_service.insert_roast_records = database.insert_roast_records
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            def make_buffer(flush_interval_seconds=0.05):
+                return RoastWriteBuffer(
+                    batch_size=3,
+                    flush_interval_seconds=flush_interval_seconds,
+                    max_buffer=100,
+                    spill_path=os.path.join(directory, "spill.jsonl"),
+                    replay_interval_seconds=0
+                )
+            asyncio.run(scenario(database, make_buffer))
+    finally:
+        async_db_service.insert_roast_records = original
+
+
+def test_flush_by_size_and_interval():
+    """A full batch is saved right away, a partial one after the flush interval"""
+    async def scenario(database, make_buffer):
+        buffer = make_buffer(flush_interval_seconds=0.5)
+        await buffer.start()
+        for _ in range(3):
+            buffer.enqueue(REQUEST, ROAST)
+        await asyncio.sleep(0.1)
+        assert [len(batch) for batch in database.batches] == [3]
+
+        buffer.enqueue(REQUEST, ROAST)
+        await asyncio.sleep(0.1)
+        assert len(database.rows) == 3
+        await asyncio.sleep(0.6)
+        assert len(database.rows) == 4
+        await buffer.stop()
+        assert buffer.snapshot()["saved"] == 4
+
+    run_with_database(scenario)
+
+
+def test_spill_and_replay():
+    """Roasts spill to disk while inserts fail and are replayed once they succeed"""
+    async def scenario(database, make_buffer):
+        buffer = make_buffer()
+        await buffer.start()
+        database.down = True
+        for _ in range(5):
+            buffer.enqueue(REQUEST, ROAST)
+        await asyncio.sleep(0.2)
+        assert buffer.snapshot()["spilled"] == 5 and buffer.snapshot()["spill_bytes"] > 0
+        assert not database.rows
+
+        database.down = False
+        await asyncio.sleep(0.2)
+        assert len(database.rows) == 5
+        assert database.rows[0]["startup_name"] == "PetRock"
+        assert buffer.snapshot()["replayed"] == 5 and buffer.snapshot()["spill_bytes"] == 0
+        await buffer.stop()
+
+    run_with_database(scenario)
+
+
+def test_shutdown_flush_and_restart_replay():
+    """Stopping flushes the buffer; roasts spilled before a restart are replayed by the next process"""
+    async def scenario(database, make_buffer):
+        buffer = make_buffer(flush_interval_seconds=60)
+        await buffer.start()
+        buffer.enqueue(REQUEST, ROAST)
+        await buffer.stop()
+        assert len(database.rows) == 1
+
+        database.down = True
+        buffer = make_buffer(flush_interval_seconds=60)
+        await buffer.start()
+        buffer.enqueue(REQUEST, ROAST)
+        await buffer.stop()
+        assert buffer.snapshot()["spilled"] == 1
+
+        database.down = False
+        restarted = make_buffer()
+        await restarted.start()
+        await asyncio.sleep(0.2)
+        assert len(database.rows) == 2
+        await restarted.stop()
+
+    run_with_database(scenario)
+
+
+if __name__ == "__main__":
+    print("💾 Testing roast write buffer...")
+    test_flush_by_size_and_interval()
+    test_spill_and_replay()
+    test_shutdown_flush_and_restart_replay()
+    print("🎉 Roast write buffer tests passed!")